@@ -57,6 +57,19 @@ Examples:
   
   # Show statistics
   python cli.py stats
+  
+  # Delete all chunks of a retracted source from the vector store
+  # (once snapshots are used, delete and compact publish a new one)
+  python cli.py delete --source https://example.org/retracted.html
+  
+  # Compact vector store datasets with many deleted chunks
+  python cli.py compact
+  
+  # Publish the vector store as a new snapshot for running servers to pick up
+  python cli.py snapshot
+  
+  # Serve an earlier snapshot again
+  python cli.py snapshot --rollback 00000003
         """
     )
     
@@ -87,6 +100,28 @@ Examples:
     stats_parser = subparsers.add_parser("stats", help="Show statistics")
     stats_parser.add_argument("--output", help="Output file for statistics (JSON)")
     
+    # Delete command
+    delete_parser = subparsers.add_parser("delete", help="Delete chunks from the vector store")
+    delete_parser.add_argument("--id", nargs="+", dest="ids", help="Chunk ids to delete")
+    delete_parser.add_argument("--source", nargs="+", help="Delete all chunks from these sources")
+    delete_parser.add_argument("--dataset", help="Only delete from this vector store dataset")
+    delete_parser.add_argument("--no-publish", action="store_true",
+                               help="Do not publish a new snapshot for running servers")
+    
+    # Compact command
+    compact_parser = subparsers.add_parser("compact", help="Remove deleted chunks from the vector store")
+    compact_parser.add_argument("--dataset", help="Dataset to compact (defaults to all over the threshold)")
+    compact_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="Fraction of deleted rows above which a dataset is compacted")
+    compact_parser.add_argument("--no-publish", action="store_true",
+                                help="Do not publish a new snapshot for running servers")
+    
+    # Snapshot command
+    snapshot_parser = subparsers.add_parser("snapshot", help="Publish, list or roll back vector store snapshots")
+    snapshot_parser.add_argument("--list", action="store_true", help="List snapshots instead of publishing one")
+    snapshot_parser.add_argument("--rollback", metavar="NAME", help="Make an existing snapshot current")
+    snapshot_parser.add_argument("--keep", type=int, default=3, help="Number of snapshots to keep")
+    
     return parser
 
 def handle_list_command(args):
@@ -204,6 +239,100 @@ def handle_stats_command(args):
             json.dump(stats, f, indent=2)
         print(f"Statistics saved to: {args.output}\n")
 
+def publish_changes(vector_store, args):
+    """
+    Publish a new vector store snapshot after a change, if snapshots are in use.
+    
+    Servers only see the store through snapshots once one has been published,
+    so changes to the live store would otherwise never reach them.
+    
+    Args:
+        vector_store: VectorStore that was changed
+        args: Command-line arguments
+    """
+    if args.no_publish or vector_store.snapshots.current() is None:
+        return
+    name = vector_store.publish_snapshot()
+    print(f"Published snapshot {name}\n")
+
+def handle_delete_command(args):
+    """
+    Handle the delete command to tombstone chunks in the vector store.
+    
+    Args:
+        args: Command-line arguments
+    """
+    # Imported here so other commands do not load the embedding model
+    from src.embeddings.vector_store import VectorStore
+    
+    if not args.ids and not args.source:
+        print("\nError: Specify --id and/or --source\n")
+        return
+    
+    vector_store = VectorStore()
+    vector_store.load_vector_store()
+    filters = {"source": args.source} if args.source else None
+    deleted = vector_store.delete(ids=args.ids, filters=filters, dataset_name=args.dataset)
+    
+    print(f"\nDeleted {deleted} chunks")
+    for dataset_name in vector_store.list_stored_datasets():
+        print(f"- {dataset_name}: {vector_store.dead_fraction(dataset_name):.1%} deleted")
+    print()
+    if deleted:
+        publish_changes(vector_store, args)
+
+def handle_compact_command(args):
+    """
+    Handle the compact command to rewrite datasets without deleted chunks.
+    
+    Args:
+        args: Command-line arguments
+    """
+    from src.embeddings.vector_store import VectorStore
+    
+    vector_store = VectorStore()
+    vector_store.load_vector_store()
+    if args.dataset:
+        compacted = {args.dataset: vector_store.compact(args.dataset)}
+    else:
+        compacted = vector_store.maybe_compact(args.threshold)
+    
+    print("\nCompaction results:")
+    print("------------------")
+    if not compacted:
+        print("Nothing to compact")
+    for dataset_name, removed in compacted.items():
+        print(f"- {dataset_name}: removed {removed} rows")
+    print()
+    if any(compacted.values()):
+        publish_changes(vector_store, args)
+
+def handle_snapshot_command(args):
+    """
+    Handle the snapshot command to publish, list or roll back vector store snapshots.
+    
+    Args:
+        args: Command-line arguments
+    """
+    from src.embeddings.vector_store import VectorStore
+    
+    vector_store = VectorStore()
+    snapshots = vector_store.snapshots
+    if args.rollback:
+        snapshots.set_current(args.rollback)
+        print(f"\nCurrent snapshot: {args.rollback}\n")
+        return
+    if not args.list:
+        name = vector_store.publish_snapshot(keep=args.keep)
+        print(f"\nPublished snapshot {name}")
+    
+    current = snapshots.current()
+    print("\nSnapshots:")
+    print("----------")
+    for name in snapshots.list():
+        print(f"- {name}{' (current)' if name == current else ''}")
+    print()
+
 def main():
     parser = setup_argparse()
     args = parser.parse_args()
@@ -220,6 +349,12 @@ def main():
         handle_process_oncqa_command(args)
     elif args.command == "stats":
         handle_stats_command(args)
+    elif args.command == "delete":
+        handle_delete_command(args)
+    elif args.command == "compact":
+        handle_compact_command(args)
+    elif args.command == "snapshot":
+        handle_snapshot_command(args)
     else:
         parser.print_help()
         return 1
@@ -1,9 +1,13 @@
 # pdf_utilities.py
 
 import os
+import sys
 import json
 from PyPDF2 import PdfReader
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.data_processing.dedup import deduplicate_chunks, corpus_chunks, format_report
+
 def process_additional_pdfs(pdf_dir, output_filename="additional_pdf_chunks.json"):
     """
     Process PDF files in a directory and add them to the system without losing existing chunks.
@@ -59,6 +63,11 @@ def process_additional_pdfs(pdf_dir, output_filename="additional_pdf_chunks.json
         except Exception as e:
             print(f"Error loading existing chunks: {e}")
     
+    # Drop chunks that duplicate other datasets or each other
+    all_chunks, report = deduplicate_chunks(
+        all_chunks, reference=corpus_chunks(existing_chunks, exclude_key="additional_pdfs"))
+    print(format_report(report))
+    
     # Add the new chunks
     existing_chunks["additional_pdfs"] = all_chunks
     
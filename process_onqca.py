@@ -2,6 +2,7 @@
 import json
 import os
 from datasets import load_dataset
+from src.data_processing.dedup import deduplicate_chunks, corpus_chunks, format_report
 
 def process_oncqa_dataset():
     print("Loading OncQA dataset from Hugging Face...")
@@ -42,6 +43,11 @@ def process_oncqa_dataset():
         else:
             existing_data = []
         
+        # Drop items already in the corpus (re-runs used to append the dataset again)
+        processed_data, report = deduplicate_chunks(
+            processed_data, reference=corpus_chunks(existing_data, exclude_key="oncqa"))
+        print(format_report(report))
+        
         # Add OncQA data to existing chunks
         if isinstance(existing_data, list):
             for item in processed_data:
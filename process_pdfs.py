@@ -3,6 +3,7 @@
 import os
 import json
 from PyPDF2 import PdfReader
+from src.data_processing.dedup import deduplicate_chunks, corpus_chunks, format_report
 
 def process_additional_pdfs():
     """
@@ -58,6 +59,11 @@ def process_additional_pdfs():
                 existing_data = json.load(f)
             print(f"Loaded existing data from {existing_chunks_file}")
             
+            # Drop chunks that duplicate existing ones (e.g. from a re-run)
+            all_pdf_chunks, report = deduplicate_chunks(
+                all_pdf_chunks, reference=corpus_chunks(existing_data, exclude_key="research_papers"))
+            print(format_report(report))
+            
             # Check if it's a list or a dictionary
             if isinstance(existing_data, list):
                 # It's a list, so append the new chunks
@@ -78,6 +84,8 @@ def process_additional_pdfs():
     else:
         # No existing file, create a new dictionary
         print("No existing file found, creating new data")
+        all_pdf_chunks, report = deduplicate_chunks(all_pdf_chunks)
+        print(format_report(report))
         result_data = {"research_papers": all_pdf_chunks}
     
     # Save the updated chunks
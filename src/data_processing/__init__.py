@@ -1,8 +1,12 @@
 # src/data_processing/__init__.py
 
-from . import extraction
-from . import cleaning
-from . import chunking
-from . import pdf_processor
-from . import oncqa_processor
-from . import data_registry
+# Submodules are imported on first access, so importing one of them (e.g. dedup)
+# does not pull in the scraping, PDF and dataset dependencies of the others
+import importlib
+
+__all__ = ["extraction", "cleaning", "chunking", "pdf_processor", "oncqa_processor", "data_registry"]
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
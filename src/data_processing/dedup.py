@@ -0,0 +1,233 @@
+# src/data_processing/dedup.py
+
+"""
+Module for detecting near-duplicate chunks at ingest time with MinHash signatures
+and LSH banding, so re-runs and overlapping sources do not bloat the corpus.
+"""
+
+import re
+import json
+import zlib
+import hashlib
+import logging
+import numpy as np
+from typing import List, Dict, Any, Tuple, Optional
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used for the MinHash permutations; keeps a * x + b below 2**62
+MINHASH_PRIME = (1 << 31) - 1
+
+def chunk_text(chunk: Dict[str, Any]) -> str:
+    """
+    Get the text of a chunk (``text`` or ``content`` field).
+
+    Args:
+        chunk: Chunk dictionary
+
+    Returns:
+        Chunk text
+    """
+    return chunk.get("text", "") or chunk.get("content", "")
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    Hash the word shingles of a text.
+
+    Args:
+        text: Text to shingle
+        shingle_size: Number of words per shingle
+
+    Returns:
+        Array of unique 32-bit shingle hashes
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed set of random permutations."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        """
+        Create the permutations.
+
+        Args:
+            num_perm: Signature length
+            seed: Random seed, so signatures are reproducible across runs
+        """
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Compute the MinHash signature of a set of shingle hashes.
+
+        Args:
+            hashes: Shingle hashes
+
+        Returns:
+            (num_perm,) signature
+        """
+        if len(hashes) == 0:
+            return np.full(self.num_perm, MINHASH_PRIME, dtype=np.uint64)
+        hashes = hashes % MINHASH_PRIME
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % MINHASH_PRIME).min(axis=1)
+
+def _find(parent: List[int], i: int) -> int:
+    """Find the root of ``i`` in a union-find forest (with path halving)."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def deduplicate_chunks(chunks: List[Dict[str, Any]], reference: Optional[List[Dict[str, Any]]] = None,
+                       threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                       shingle_size: int = 5, merge: bool = True) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Remove near-duplicate chunks.
+
+    Exact duplicates (after whitespace and case normalization) are caught by a
+    content hash. Everything else is compared with MinHash signatures split into
+    ``bands`` LSH bands: only chunks sharing a band bucket are compared, so the
+    cost is roughly linear in the corpus size. Candidate pairs are kept as
+    duplicates when their estimated Jaccard similarity reaches ``threshold``.
+
+    Within each group of duplicates the earliest chunk is kept, so chunks already
+    in the corpus win over re-ingested copies.
+
+    Args:
+        chunks: Chunks to deduplicate
+        reference: Chunks that are always kept (e.g. other datasets); chunks
+            duplicating one of them are removed
+        threshold: Minimum estimated Jaccard similarity of duplicates
+        num_perm: MinHash signature length (must be divisible by ``bands``)
+        bands: Number of LSH bands
+        shingle_size: Number of words per shingle
+        merge: Whether to record the sources of removed duplicates in the kept
+            chunk's ``duplicate_sources`` field
+
+    Returns:
+        Tuple of (kept chunks, report dictionary)
+    """
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+    reference = reference or []
+    items = reference + chunks
+    n_reference = len(reference)
+    rows_per_band = num_perm // bands
+    hasher = MinHasher(num_perm)
+
+    parent = list(range(len(items)))
+    exact = {}
+    buckets = [{} for _ in range(bands)]
+    signatures = [None] * len(items)
+    compared = 0
+
+    for i, item in enumerate(items):
+        text = chunk_text(item)
+        normalized = re.sub(r"\s+", " ", text).strip().lower()
+
+        # Exact duplicates need no signature
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        if digest in exact:
+            parent[i] = _find(parent, exact[digest])
+            continue
+        exact[digest] = i
+
+        signature = hasher.signature(shingle_hashes(normalized, shingle_size))
+        signatures[i] = signature
+
+        for band, bucket in enumerate(buckets):
+            key = signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes()
+            members = bucket.setdefault(key, [])
+            for candidate in members:
+                root_i, root_c = _find(parent, i), _find(parent, candidate)
+                if root_i == root_c:
+                    continue
+                compared += 1
+                if np.mean(signature == signatures[candidate]) >= threshold:
+                    # The earlier chunk becomes the root, so it is the one kept
+                    parent[max(root_i, root_c)] = min(root_i, root_c)
+            members.append(i)
+
+    roots = [_find(parent, i) for i in range(len(items))]
+    duplicates = {}
+    for i in range(n_reference, len(items)):
+        if roots[i] != i:
+            duplicates.setdefault(roots[i], []).append(items[i].get("source"))
+
+    if merge:
+        for root, sources in duplicates.items():
+            # Reference chunks are never modified
+            if root < n_reference:
+                continue
+            item = items[root]
+            known = item.get("duplicate_sources", [])
+            item["duplicate_sources"] = known + [s for s in dict.fromkeys(sources)
+                                                 if s and s not in known and s != item.get("source")]
+
+    kept = []
+    bytes_before = 0
+    bytes_after = 0
+    for i in range(n_reference, len(items)):
+        size = len(json.dumps(items[i]))
+        bytes_before += size
+        if roots[i] == i:
+            kept.append(items[i])
+            bytes_after += size
+    removed = len(chunks) - len(kept)
+
+    report = {
+        "input_chunks": len(chunks),
+        "kept_chunks": len(kept),
+        "removed_chunks": removed,
+        "candidate_pairs": compared,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+    }
+    logger.info(f"Deduplication removed {removed} of {len(chunks)} chunks "
+                f"({report['bytes_saved']} bytes saved, {compared} candidate pairs compared)")
+    return kept, report
+
+def corpus_chunks(data, exclude_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Collect the chunks of an ``all_chunks.json`` corpus.
+
+    Args:
+        data: Loaded corpus, either a list of chunks or a dictionary of chunk lists
+        exclude_key: Dataset key to leave out (e.g. the one being replaced)
+
+    Returns:
+        List of chunks
+    """
+    if isinstance(data, list):
+        return data
+    chunks = []
+    for key, value in data.items():
+        if key != exclude_key and isinstance(value, list):
+            chunks.extend(item for item in value if isinstance(item, dict))
+    return chunks
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Format a deduplication report for printing.
+
+    Args:
+        report: Report returned by ``deduplicate_chunks``
+
+    Returns:
+        One-line summary
+    """
+    return (f"Removed {report['removed_chunks']} of {report['input_chunks']} chunks as near-duplicates, "
+            f"saving {report['bytes_saved'] / 1024:.1f} KB "
+            f"({report['bytes_before'] / 1024:.1f} KB -> {report['bytes_after'] / 1024:.1f} KB)")
@@ -0,0 +1,179 @@
+# src/embeddings/bm25.py
+
+"""
+In-process BM25 inverted index over the same chunks the vector store searches.
+Postings are kept as flat numpy arrays (CSR layout) with precomputed IDF and
+per-document length norms, so a query only touches the postings of its terms.
+"""
+
+import os
+import re
+import logging
+import numpy as np
+from typing import List, Tuple, Optional
+
+from .index_backends import top_k_indices
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+# Very common English words that carry no lexical signal
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my of on or so than that the their them there these they this to was we what when
+where which who why will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms, dropping stopwords.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents (one per matrix row)."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Create an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Strength of document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}                                   # term -> term id
+        self.offsets = np.zeros(1, dtype=np.int64)       # postings of term t: offsets[t]:offsets[t + 1]
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.doc_norms = np.zeros(0, dtype=np.float32)   # k1 * (1 - b + b * len / avgdl)
+        self.n_docs = 0
+
+    def build(self, texts: List[str]):
+        """
+        Build the index.
+
+        Args:
+            texts: Document texts, aligned with matrix rows
+        """
+        term_docs = {}
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_docs.setdefault(token, []).append((doc_id, count))
+
+        terms = sorted(term_docs)
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        sizes = np.array([len(term_docs[term]) for term in terms], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+        postings = [posting for term in terms for posting in term_docs[term]]
+        self.doc_ids = np.array([doc_id for doc_id, _ in postings], dtype=np.int32)
+        self.tfs = np.array([count for _, count in postings], dtype=np.float32)
+        self.n_docs = len(texts)
+        self._precompute(doc_lengths, sizes)
+        logger.info(f"Built BM25 index with {len(terms)} terms and {len(postings)} postings")
+
+    def _precompute(self, doc_lengths: np.ndarray, doc_freqs: np.ndarray):
+        """Compute IDF per term and the length norm per document."""
+        self.idf = np.log1p((self.n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = float(doc_lengths.mean()) if self.n_docs else 0.0
+        avg_length = avg_length or 1.0
+        self.doc_lengths = doc_lengths
+        self.doc_norms = (self.k1 * (1 - self.b + self.b * doc_lengths / avg_length)).astype(np.float32)
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the documents containing any query term.
+
+        Args:
+            query: Query text
+            k: Number of documents to return
+            mask: Optional boolean array of documents that may be returned
+
+        Returns:
+            Tuple of (BM25 scores, document ids), best first
+        """
+        term_ids = sorted({self.vocab[term] for term in tokenize(query) if term in self.vocab})
+        if not term_ids or k <= 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        doc_ids = np.concatenate([self.doc_ids[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        tfs = np.concatenate([self.tfs[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        idf = np.repeat(self.idf[term_ids], np.diff(self.offsets)[term_ids])
+        contributions = idf * tfs * (self.k1 + 1) / (tfs + self.doc_norms[doc_ids])
+
+        # Accumulate only over the candidate documents, not the whole corpus
+        candidates, inverse = np.unique(doc_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+
+        top = top_k_indices(-scores, k)
+        return scores[top], candidates[top].astype(np.int64)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory used by the postings arrays."""
+        return int(self.offsets.nbytes + self.doc_ids.nbytes + self.tfs.nbytes
+                   + self.idf.nbytes + self.doc_norms.nbytes)
+
+    def save(self, path: str):
+        """Save the index to an ``.npz`` file atomically."""
+        terms = sorted(self.vocab, key=self.vocab.get)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(terms, dtype=str),
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                tfs=self.tfs,
+                doc_lengths=self.doc_lengths,
+                params=np.array([self.k1, self.b], dtype=np.float64),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, n_docs: int) -> bool:
+        """Load the index from a file, returning False if it does not match ``n_docs``."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                terms = data["terms"].tolist()
+                offsets = data["offsets"]
+                doc_ids = data["doc_ids"]
+                tfs = data["tfs"]
+                doc_lengths = data["doc_lengths"]
+                k1, b = data["params"].tolist()
+        except Exception as e:
+            logger.warning(f"Could not load BM25 index {path}: {e}")
+            return False
+        if len(doc_lengths) != n_docs or (k1, b) != (self.k1, self.b):
+            logger.warning(f"BM25 index {path} does not match the stored vectors, it will be rebuilt")
+            return False
+
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.n_docs = n_docs
+        self._precompute(doc_lengths, np.diff(offsets))
+        return True
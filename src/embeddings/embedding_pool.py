@@ -0,0 +1,180 @@
+# src/embeddings/embedding_pool.py
+
+"""
+Batching helpers for embedding texts, and a pool of worker processes, each holding its
+own embedding model, used to embed large numbers of texts (ingestion, full
+re-embedding) on every CPU core.
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterable, Optional
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default padded-token budget of one batch (batch size x longest text in the batch)
+DEFAULT_TOKEN_BUDGET = 8192
+
+def estimate_tokens(text: str, max_tokens: int = 256) -> int:
+    """
+    Cheaply estimate the number of tokens of a text (about 4 characters per token).
+
+    Args:
+        text: Text to estimate
+        max_tokens: The model's maximum sequence length (longer texts are truncated)
+
+    Returns:
+        Estimated token count, including special tokens
+    """
+    return min(max_tokens, len(text) // 4 + 2)
+
+def token_budget_batches(texts: List[str], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                         max_batch_size: int = 128, max_tokens: int = 256) -> List[np.ndarray]:
+    """
+    Group texts of similar length into batches sized by a padded-token budget.
+
+    Texts are sorted by estimated length, so each batch pads to a similar
+    length, and a batch grows until ``batch size x longest text`` would
+    exceed ``token_budget``. Short texts therefore get large batches and
+    long ones small batches.
+
+    Args:
+        texts: Texts to batch
+        token_budget: Maximum padded tokens per batch
+        max_batch_size: Maximum number of texts per batch
+        max_tokens: The model's maximum sequence length
+
+    Returns:
+        List of index arrays into ``texts``, one per batch
+    """
+    lengths = np.fromiter((estimate_tokens(text, max_tokens) for text in texts), dtype=np.int64, count=len(texts))
+    order = np.argsort(lengths, kind="stable")
+
+    batches = []
+    start = 0
+    for pos in range(len(order)):
+        size = pos - start + 1
+        if size > 1 and (size > max_batch_size or size * lengths[order[pos]] > token_budget):
+            batches.append(order[start:pos])
+            start = pos
+    if start < len(order):
+        batches.append(order[start:])
+    return batches
+
+def scatter_batches(batches: List[np.ndarray], batch_embeddings: Iterable[np.ndarray], n: int) -> np.ndarray:
+    """
+    Put the embeddings of planned batches back in the original text order.
+
+    Args:
+        batches: Index arrays from ``token_budget_batches``
+        batch_embeddings: Embeddings of each batch, aligned with ``batches``
+        n: Total number of texts
+
+    Returns:
+        (n, d) embeddings in the original order
+    """
+    embeddings = None
+    for batch, batch_embedding in zip(batches, batch_embeddings):
+        if embeddings is None:
+            embeddings = np.empty((n, batch_embedding.shape[1]), dtype=np.float32)
+        embeddings[batch] = batch_embedding
+    return embeddings if embeddings is not None else np.zeros((0, 0), dtype=np.float32)
+
+# Model of a worker process, loaded once by the initializer
+_worker_model = None
+
+def _init_worker(model_name: str, threads: int, backend: str = "torch"):
+    """Load the embedding model in a worker process."""
+    global _worker_model
+    if backend != "torch":
+        from .onnx_embeddings import load_onnx_model
+        _worker_model = load_onnx_model(model_name, backend, threads=threads)
+        return
+    try:
+        import torch
+        # Workers split the cores between them instead of each using all of them
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name)
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    """Embed one planned batch of texts in a worker process."""
+    return np.asarray(_worker_model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+class EmbeddingPool:
+    """Fans batches of texts out to worker processes and reassembles the embeddings in order."""
+
+    def __init__(self, model_name: str, workers: Optional[int] = None, batch_size: int = 128,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, max_tokens: int = 256, backend: str = "torch"):
+        """
+        Start the worker processes.
+
+        Args:
+            model_name: Name of the sentence-transformers model each worker loads
+            workers: Number of worker processes (defaults to the number of cores)
+            batch_size: Maximum number of texts per batch sent to a worker
+            token_budget: Maximum padded tokens per batch, see ``token_budget_batches``
+            max_tokens: The model's maximum sequence length
+            backend: Embedding backend ("torch", "onnx" or "onnx_int8")
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.max_tokens = max_tokens
+        self.last_stats = None
+
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # Spawn rather than fork: forking a process that already initialized torch can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, threads, backend),
+        )
+        logger.info(f"Started embedding pool with {self.workers} workers ({threads} threads each)")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts on the worker pool.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            (len(texts), d) embeddings in the order of ``texts``
+        """
+        start = time.perf_counter()
+        batches = token_budget_batches(texts, self.token_budget, self.batch_size, self.max_tokens)
+        # map() yields results in submission order, so each batch lands back at its indices
+        results = self._executor.map(_encode_batch, [[texts[i] for i in batch] for batch in batches])
+        embeddings = scatter_batches(batches, results, len(texts))
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "texts": len(texts),
+            "batches": len(batches),
+            "workers": self.workers,
+            "seconds": elapsed,
+            "texts_per_sec": len(texts) / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(f"Embedded {len(texts)} texts in {elapsed:.2f}s with {self.workers} workers "
+                    f"({self.last_stats['texts_per_sec']:.1f} texts/sec)")
+        return embeddings
+
+    def stats(self) -> Optional[Dict[str, float]]:
+        """Return throughput of the last ``encode`` call."""
+        return self.last_stats
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown(wait=True)
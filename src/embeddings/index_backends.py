@@ -0,0 +1,860 @@
+# src/embeddings/index_backends.py
+
+"""
+Index backends used by the vector store to find the nearest embeddings to a query.
+All backends work on pre-normalized float32 or float16 matrices (float16 rows are
+upcast to float32 a block at a time before scoring) and return cosine distances
+(1 - cosine similarity, lower is better) together with row indices.
+"""
+
+import os
+import math
+import time
+import heapq
+import logging
+import weakref
+import tempfile
+import itertools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Tuple, Optional
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Try to import FAISS for approximate nearest neighbour search
+try:
+    import faiss
+    HAVE_FAISS = True
+except ImportError:
+    HAVE_FAISS = False
+
+# Rows of a float16 matrix upcast to float32 at a time (4096 x 384 float32 is 6 MB,
+# small enough to stay in cache between the upcast and the product)
+UPCAST_BLOCK_SIZE = 4096
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k lowest scores, sorted by score then index.
+
+    Args:
+        scores: 1-d array of distances
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.lexsort((idx, scores[idx]))]
+
+def _pad_results(distances: list, indices: list, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack per-query results into (n_queries, k) arrays padded with inf / -1."""
+    out_d = np.full((len(indices), k), np.inf, dtype=np.float32)
+    out_i = np.full((len(indices), k), -1, dtype=np.int64)
+    for row, (d, i) in enumerate(zip(distances, indices)):
+        out_d[row, :len(i)] = d
+        out_i[row, :len(i)] = i
+    return out_d, out_i
+
+def inner_products(queries: np.ndarray, matrix: np.ndarray,
+                   block_size: int = UPCAST_BLOCK_SIZE) -> np.ndarray:
+    """
+    Score queries against every row of a matrix with float32 accumulation.
+
+    A float32 matrix is multiplied directly. Rows of any other type (float16
+    storage) are upcast one block at a time into a reused buffer, so no
+    float32 copy of the whole matrix is ever made. The upcast costs the same
+    for any number of queries, so batching queries amortizes it.
+
+    Args:
+        queries: (n_queries, d) float32 query matrix
+        matrix: (n, d) matrix
+        block_size: Rows upcast at a time
+
+    Returns:
+        (n_queries, n) float32 inner products
+    """
+    queries = np.atleast_2d(queries)
+    if matrix.dtype == np.float32:
+        return queries @ matrix.T
+    scores = np.empty((queries.shape[0], matrix.shape[0]), dtype=np.float32)
+    buffer = np.empty((min(block_size, matrix.shape[0]), matrix.shape[1]), dtype=np.float32)
+    for start in range(0, matrix.shape[0], block_size):
+        block = buffer[:min(block_size, matrix.shape[0] - start)]
+        np.copyto(block, matrix[start:start + block_size])
+        np.matmul(queries, block.T, out=scores[:, start:start + len(block)])
+    return scores
+
+def search_rows(matrix: np.ndarray, rows: np.ndarray, queries: np.ndarray,
+                k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact search restricted to a subset of matrix rows.
+
+    Only the selected rows are read and scored.
+
+    Args:
+        matrix: Pre-normalized (n, d) matrix
+        rows: Sorted array of eligible row indices
+        queries: Pre-normalized (n_queries, d) query matrix
+        k: Number of neighbours per query
+
+    Returns:
+        Tuple of (distances, row indices into ``matrix``), padded like IndexBackend.search
+    """
+    queries = np.atleast_2d(queries)
+    subset = np.asarray(matrix[rows], dtype=np.float32)
+    scores = 1.0 - queries @ subset.T
+    distances, indices = [], []
+    for row in scores:
+        top = top_k_indices(row, k)
+        distances.append(row[top])
+        indices.append(rows[top])
+    return _pad_results(distances, indices, k)
+
+def search_live(index, deleted: np.ndarray, n_deleted: int, queries: np.ndarray,
+                k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Search an index while skipping tombstoned rows.
+
+    The index is over-fetched in proportion to the dead fraction and the
+    fetch size is doubled until every query has k live results.
+
+    Args:
+        index: Built index backend
+        deleted: Boolean array marking deleted rows
+        n_deleted: Number of deleted rows
+        queries: Pre-normalized (n_queries, d) query matrix
+        k: Number of neighbours per query
+
+    Returns:
+        Tuple of (distances, row indices), padded like IndexBackend.search
+    """
+    queries = np.atleast_2d(queries)
+    n = len(deleted)
+    live = n - n_deleted
+    wanted = min(k, live)
+    fetch = min(n, 2 * k + int(math.ceil(2 * k * n_deleted / max(live, 1))))
+
+    while True:
+        distances, indices = index.search(queries, fetch)
+        # Rows added to the index after ``deleted`` was taken are skipped too
+        in_range = (indices >= 0) & (indices < n)
+        valid = in_range & ~deleted[np.where(in_range, indices, 0)]
+        if fetch >= n or (valid.sum(axis=1) >= wanted).all():
+            break
+        fetch = min(n, fetch * 2)
+
+    return _pad_results(
+        [d[v][:k] for d, v in zip(distances, valid)],
+        [i[v][:k] for i, v in zip(indices, valid)],
+        k
+    )
+
+class IndexBackend:
+    """Base class for index backends."""
+
+    name = "base"
+
+    def __init__(self, **params):
+        self.params = params
+        self.ntotal = 0
+
+    def build(self, matrix: np.ndarray):
+        """Build the index from a pre-normalized (n, d) float32 matrix."""
+        raise NotImplementedError
+
+    def save(self, path: str):
+        """Save the index to a file."""
+        raise NotImplementedError
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        """Load the index from a file, returning False if it does not match the matrix."""
+        raise NotImplementedError
+
+    def add(self, vectors: np.ndarray, matrix: np.ndarray):
+        """
+        Index rows appended to the end of the matrix.
+
+        Backends that cannot add incrementally rebuild from the full matrix.
+
+        Args:
+            vectors: The new (n, d) rows
+            matrix: The full matrix including the new rows
+        """
+        self.build(matrix)
+
+    def update(self, rows: np.ndarray, matrix: np.ndarray):
+        """
+        Re-index rows whose vectors were overwritten in place.
+
+        Backends that cannot update incrementally rebuild from the full matrix.
+
+        Args:
+            rows: Indices of the changed rows
+            matrix: The full matrix with the new values
+        """
+        self.build(matrix)
+
+    def memory_bytes(self) -> Optional[int]:
+        """Return the memory held by the scan structure, or None if unknown."""
+        return None
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the index.
+
+        Args:
+            queries: Pre-normalized (n_queries, d) float32 query matrix
+            k: Number of neighbours per query
+
+        Returns:
+            Tuple of (distances, row indices), each of shape (n_queries, k).
+            Missing results are padded with inf and -1.
+        """
+        raise NotImplementedError
+
+class FlatIndex(IndexBackend):
+    """Exact brute-force search over the matrix."""
+
+    name = "flat"
+
+    def build(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.ntotal = matrix.shape[0]
+
+    def save(self, path: str):
+        # The matrix itself is the index, nothing else to persist
+        pass
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        self.build(matrix)
+        return True
+
+    def add(self, vectors: np.ndarray, matrix: np.ndarray):
+        self.build(matrix)
+
+    def update(self, rows: np.ndarray, matrix: np.ndarray):
+        self.build(matrix)
+
+    def memory_bytes(self) -> int:
+        return int(self.matrix.nbytes)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        scores = 1.0 - inner_products(queries, self.matrix)
+        distances, indices = [], []
+        for row in scores:
+            top = top_k_indices(row, k)
+            distances.append(row[top])
+            indices.append(top)
+        return _pad_results(distances, indices, k)
+
+class _FaissIndex(IndexBackend):
+    """Shared save/load/search logic for FAISS backends."""
+
+    def _create(self, matrix: np.ndarray):
+        raise NotImplementedError
+
+    def _configure(self):
+        """Apply search-time parameters to the FAISS index."""
+        pass
+
+    def build(self, matrix: np.ndarray):
+        data = np.array(matrix, dtype=np.float32, order="C")
+        self.index = self._create(data)
+        self.index.add(data)
+        self.ntotal = self.index.ntotal
+        self._configure()
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        if not os.path.exists(path):
+            return False
+        index = faiss.read_index(path)
+        if index.ntotal != matrix.shape[0] or index.d != matrix.shape[1]:
+            logger.warning(f"Index {path} does not match the stored vectors, it will be rebuilt")
+            return False
+        self.index = index
+        self.ntotal = index.ntotal
+        self._configure()
+        return True
+
+    def add(self, vectors: np.ndarray, matrix: np.ndarray):
+        self.index.add(np.array(vectors, dtype=np.float32, order="C"))
+        self.ntotal = self.index.ntotal
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        similarities, indices = self.index.search(queries, k)
+        distances = np.where(indices >= 0, 1.0 - similarities, np.inf).astype(np.float32)
+        return distances, indices.astype(np.int64)
+
+class FaissIVFFlatIndex(_FaissIndex):
+    """FAISS inverted-file index with exact (flat) vectors in each list.
+
+    Params:
+        nlist: Number of inverted lists (defaults to 4 * sqrt(n))
+        nprobe: Number of lists scanned per query
+    """
+
+    name = "faiss_ivf"
+
+    def _create(self, matrix: np.ndarray):
+        n, d = matrix.shape
+        nlist = self.params.get("nlist") or int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(matrix)
+        return index
+
+    def _configure(self):
+        self.index.nprobe = min(self.params.get("nprobe", 8), self.index.nlist)
+
+    def update(self, rows: np.ndarray, matrix: np.ndarray):
+        rows = np.asarray(rows, dtype=np.int64)
+        self.index.remove_ids(rows)
+        self.index.add_with_ids(np.array(matrix[rows], dtype=np.float32, order="C"), rows)
+
+class FaissHNSWIndex(_FaissIndex):
+    """FAISS HNSW graph index.
+
+    Params:
+        M: Number of graph neighbours per node
+        ef_construction: Candidate list size while building
+        ef_search: Candidate list size while searching
+    """
+
+    name = "faiss_hnsw"
+
+    def _create(self, matrix: np.ndarray):
+        index = faiss.IndexHNSWFlat(matrix.shape[1], self.params.get("M", 32), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self.params.get("ef_construction", 80)
+        return index
+
+    def _configure(self):
+        self.index.hnsw.efSearch = self.params.get("ef_search", 64)
+
+def train_kmeans(data: np.ndarray, n_clusters: int, n_iter: int = 20,
+                 max_train_points: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Train spherical k-means centroids on normalized vectors.
+
+    Args:
+        data: Pre-normalized (n, d) float32 matrix
+        n_clusters: Number of centroids
+        n_iter: Number of Lloyd iterations
+        max_train_points: Maximum training points per centroid (larger inputs are subsampled)
+        seed: Random seed
+
+    Returns:
+        Normalized (n_clusters, d) float32 centroid matrix
+    """
+    rng = np.random.default_rng(seed)
+    n = data.shape[0]
+    if n > n_clusters * max_train_points:
+        data = data[np.sort(rng.choice(n, size=n_clusters * max_train_points, replace=False))]
+        n = data.shape[0]
+    data = np.asarray(data, dtype=np.float32)
+
+    centroids = data[rng.choice(n, size=n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = assign_to_centroids(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        # Reseed empty clusters from random points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = data[rng.choice(n, size=len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+
+    return centroids
+
+def assign_to_centroids(data: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """
+    Assign each vector to the centroid with the highest inner product.
+
+    Args:
+        data: (n, d) matrix
+        centroids: (n_clusters, d) matrix
+        block_size: Number of rows scored at a time
+
+    Returns:
+        Array of n centroid ids
+    """
+    assignments = np.empty(data.shape[0], dtype=np.int64)
+    for start in range(0, data.shape[0], block_size):
+        block = np.asarray(data[start:start + block_size], dtype=np.float32)
+        assignments[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+class NumpyIVFIndex(IndexBackend):
+    """Inverted-file index implemented with NumPy only (no FAISS needed).
+
+    A k-means coarse quantizer splits the vectors into lists; each list keeps
+    its vectors in one contiguous block together with their row ids. A query
+    only scores the ``nprobe`` lists whose centroids are closest.
+
+    Params:
+        nlist: Number of inverted lists (defaults to sqrt(n))
+        nprobe: Number of lists scanned per query
+        n_iter: Number of k-means iterations
+    """
+
+    name = "numpy_ivf"
+
+    def build(self, matrix: np.ndarray):
+        n = matrix.shape[0]
+        nlist = self.params.get("nlist") or int(math.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        self.centroids = train_kmeans(matrix, nlist, n_iter=self.params.get("n_iter", 20))
+        self.list_vectors = [np.zeros((0, matrix.shape[1]), dtype=np.float32) for _ in range(nlist)]
+        self.list_ids = [np.zeros(0, dtype=np.int64) for _ in range(nlist)]
+        self.ntotal = 0
+        self.add(matrix)
+
+    def add(self, vectors: np.ndarray, matrix: np.ndarray = None):
+        """
+        Assign new vectors to their nearest lists without retraining.
+
+        The new vectors get row ids following the current ``ntotal``.
+
+        Args:
+            vectors: Pre-normalized (n, d) float32 matrix of new rows
+            matrix: Unused, the lists hold their own copies of the vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = np.arange(self.ntotal, self.ntotal + vectors.shape[0], dtype=np.int64)
+        self._insert(vectors, ids)
+        self.ntotal += vectors.shape[0]
+
+    def update(self, rows: np.ndarray, matrix: np.ndarray):
+        rows = np.asarray(rows, dtype=np.int64)
+        for list_id, ids in enumerate(self.list_ids):
+            keep = ~np.isin(ids, rows)
+            if not keep.all():
+                self.list_vectors[list_id] = self.list_vectors[list_id][keep]
+                self.list_ids[list_id] = ids[keep]
+        self._insert(np.asarray(matrix[rows], dtype=np.float32), rows)
+
+    def _insert(self, vectors: np.ndarray, ids: np.ndarray):
+        """Append vectors with the given row ids to their nearest lists."""
+        assignments = assign_to_centroids(vectors, self.centroids)
+
+        order = np.argsort(assignments, kind="stable")
+        lists, starts = np.unique(assignments[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for list_id, start, end in zip(lists, starts, ends):
+            members = order[start:end]
+            self.list_vectors[list_id] = np.concatenate([self.list_vectors[list_id], vectors[members]])
+            self.list_ids[list_id] = np.concatenate([self.list_ids[list_id], ids[members]])
+
+    def save(self, path: str):
+        sizes = np.array([len(ids) for ids in self.list_ids], dtype=np.int64)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                list_sizes=sizes,
+                vectors=np.concatenate(self.list_vectors),
+                ids=np.concatenate(self.list_ids),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            centroids = data["centroids"]
+            sizes = data["list_sizes"]
+            vectors = data["vectors"]
+            ids = data["ids"]
+        if len(ids) != matrix.shape[0] or centroids.shape[1] != matrix.shape[1]:
+            logger.warning(f"Index {path} does not match the stored vectors, it will be rebuilt")
+            return False
+
+        # Split the concatenated arrays back into per-list blocks (views, no copies)
+        bounds = np.cumsum(sizes)[:-1]
+        self.centroids = centroids
+        self.list_vectors = np.split(vectors, bounds)
+        self.list_ids = np.split(ids, bounds)
+        self.ntotal = len(ids)
+        return True
+
+    def memory_bytes(self) -> int:
+        return int(self.centroids.nbytes + sum(v.nbytes + i.nbytes for v, i in zip(self.list_vectors, self.list_ids)))
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(self.params.get("nprobe", 8), len(self.list_ids))
+        centroid_scores = queries @ self.centroids.T
+
+        distances, indices = [], []
+        for query, scores in zip(queries, centroid_scores):
+            probe = top_k_indices(-scores, nprobe)
+            ids = np.concatenate([self.list_ids[p] for p in probe])
+            if len(ids) == 0:
+                distances.append(np.zeros(0, dtype=np.float32))
+                indices.append(ids)
+                continue
+            vectors = np.concatenate([self.list_vectors[p] for p in probe])
+            row_scores = 1.0 - vectors @ query
+            top = top_k_indices(row_scores, k)
+            # Order ties by row id like exact search
+            top = top[np.lexsort((ids[top], row_scores[top]))]
+            distances.append(row_scores[top])
+            indices.append(ids[top])
+        return _pad_results(distances, indices, k)
+
+class ScalarQuantizer:
+    """8-bit scalar quantizer with a per-dimension min/max range."""
+
+    def fit(self, matrix: np.ndarray, block_size: int = 65536):
+        """Learn the per-dimension minimum and step size from a matrix."""
+        mins = np.full(matrix.shape[1], np.inf, dtype=np.float32)
+        maxs = np.full(matrix.shape[1], -np.inf, dtype=np.float32)
+        for start in range(0, matrix.shape[0], block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+            mins = np.minimum(mins, block.min(axis=0))
+            maxs = np.maximum(maxs, block.max(axis=0))
+        self.mins = mins
+        self.scales = np.maximum(maxs - mins, 1e-12).astype(np.float32) / 255.0
+        return self
+
+    def encode(self, matrix: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Quantize a float matrix to uint8 codes."""
+        codes = np.empty(matrix.shape, dtype=np.uint8)
+        for start in range(0, matrix.shape[0], block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+            codes[start:start + block_size] = np.clip(np.rint((block - self.mins) / self.scales), 0, 255)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate float vectors from codes."""
+        return codes.astype(np.float32) * self.scales + self.mins
+
+class ScalarQuantizedIndex(IndexBackend):
+    """Scan 8-bit quantized codes, then rescore the best candidates with the float vectors.
+
+    The codes (1 byte per dimension) are the only structure read in full for
+    each query. The float matrix, which may be memory-mapped, is only touched
+    for the ``rescore`` candidates.
+
+    Params:
+        rescore: Number of candidates rescored per query, as a multiple of k
+        block_size: Number of code rows scored at a time
+    """
+
+    name = "int8"
+
+    def build(self, matrix: np.ndarray):
+        self.matrix = matrix
+        self.quantizer = ScalarQuantizer().fit(matrix)
+        self.codes = self.quantizer.encode(matrix)
+        self.ntotal = matrix.shape[0]
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, mins=self.quantizer.mins, scales=self.quantizer.scales, codes=self.codes)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            codes = data["codes"]
+            quantizer = ScalarQuantizer()
+            quantizer.mins = data["mins"]
+            quantizer.scales = data["scales"]
+        if codes.shape != matrix.shape:
+            logger.warning(f"Index {path} does not match the stored vectors, it will be rebuilt")
+            return False
+        self.matrix = matrix
+        self.quantizer = quantizer
+        self.codes = codes
+        self.ntotal = codes.shape[0]
+        return True
+
+    def add(self, vectors: np.ndarray, matrix: np.ndarray):
+        # New rows are encoded with the existing ranges (values outside are clipped)
+        self.codes = np.concatenate([self.codes, self.quantizer.encode(vectors)])
+        self.matrix = matrix
+        self.ntotal = self.codes.shape[0]
+
+    def update(self, rows: np.ndarray, matrix: np.ndarray):
+        rows = np.asarray(rows, dtype=np.int64)
+        self.codes = np.array(self.codes)
+        self.codes[rows] = self.quantizer.encode(np.asarray(matrix[rows], dtype=np.float32))
+        self.matrix = matrix
+
+    def memory_bytes(self) -> int:
+        return int(self.codes.nbytes + self.quantizer.mins.nbytes + self.quantizer.scales.nbytes)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_candidates = max(k, int(k * self.params.get("rescore", 4)))
+        block_size = self.params.get("block_size", 4096)
+
+        # q . x ~= q . mins + (q * scales) . codes
+        offsets = queries @ self.quantizer.mins
+        scaled = (queries * self.quantizer.scales).T
+        approx = np.empty((queries.shape[0], self.ntotal), dtype=np.float32)
+        for start in range(0, self.ntotal, block_size):
+            block = self.codes[start:start + block_size].astype(np.float32)
+            approx[:, start:start + block_size] = (block @ scaled).T
+        approx = offsets[:, None] + approx
+
+        distances, indices = [], []
+        for query, row in zip(queries, approx):
+            candidates = np.sort(top_k_indices(-row, n_candidates))
+            exact = 1.0 - np.asarray(self.matrix[candidates], dtype=np.float32) @ query
+            top = top_k_indices(exact, k)
+            distances.append(exact[top])
+            indices.append(candidates[top])
+        return _pad_results(distances, indices, k)
+
+# Matrix of a sharded search worker process, mapped by the initializer and again
+# whenever the index generation changes (rows were appended or overwritten)
+_shard_path = None
+_shard_matrix = None
+_shard_generation = 0
+
+def _init_shard_worker(path: str):
+    """Memory-map the matrix in a sharded search worker (pages are shared, not copied)."""
+    global _shard_path, _shard_matrix, _shard_generation
+    _shard_path = path
+    _shard_matrix = np.load(path, mmap_mode="r")
+    _shard_generation = 0
+
+def _search_shard(queries: np.ndarray, k: int, start: int, end: int, generation: int = 0) -> list:
+    """Return the local top k (distances, global row ids) of one shard for each query."""
+    global _shard_matrix, _shard_generation
+    if generation != _shard_generation:
+        # The file may have grown or been rewritten by an append
+        _shard_matrix = np.load(_shard_path, mmap_mode="r")
+        _shard_generation = generation
+    scores = 1.0 - inner_products(queries, _shard_matrix[start:end])
+    results = []
+    for row in scores:
+        top = top_k_indices(row, k)
+        results.append((row[top].tolist(), (top + start).tolist()))
+    return results
+
+def _shutdown_shards(pool: ProcessPoolExecutor, tmp_path: Optional[str]):
+    """Stop the worker processes and remove the temporary matrix file, if any."""
+    pool.shutdown(wait=False, cancel_futures=True)
+    if tmp_path and os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+class ShardedFlatIndex(IndexBackend):
+    """Exact search with the matrix partitioned into row ranges scored by worker processes.
+
+    Workers memory-map the stored ``.npy`` matrix (or a temporary copy in
+    /dev/shm for in-memory matrices), so the vectors are shared rather than
+    copied. Each shard returns its local top k and the results are heap-merged.
+    Rows appended to or overwritten in the stored matrix only bump a
+    generation number, on which workers map the file again; the pool keeps
+    running.
+
+    Params:
+        shards: Number of row ranges (defaults to VECTOR_SEARCH_SHARDS, or the CPU count)
+        workers: Number of worker processes (defaults to the number of shards)
+    """
+
+    name = "sharded"
+
+    def __init__(self, shards: int = None, workers: int = None, **params):
+        super().__init__(shards=shards, workers=workers, **params)
+        self.shards = shards or int(os.environ.get("VECTOR_SEARCH_SHARDS", 0)) or os.cpu_count() or 1
+        self.workers = workers or self.shards
+        self.ranges = []
+        self.matrix = None
+        self.path = None
+        self.generation = 0
+        self._pool = None
+        self._finalizer = None
+
+    def build(self, matrix: np.ndarray):
+        self.close()
+        self.matrix = matrix
+        self.ntotal = matrix.shape[0]
+
+        path = matrix.filename if isinstance(matrix, np.memmap) and matrix.filename else None
+        tmp_path = None
+        if path is None:
+            shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=shm_dir)
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.asarray(matrix))
+            path = tmp_path
+
+        self.path = path if tmp_path is None else None
+        self.generation = 0
+        self._set_ranges()
+        # Spawn rather than fork: forking after the embedding model initialized torch can deadlock
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_shard_worker, initargs=(path,))
+        self._finalizer = weakref.finalize(self, _shutdown_shards, self._pool, tmp_path)
+
+    def _set_ranges(self):
+        """Split the rows into contiguous shard ranges."""
+        bounds = np.linspace(0, self.ntotal, self.shards + 1).astype(np.int64)
+        self.ranges = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    def _refresh(self, matrix: np.ndarray) -> bool:
+        """Point the running workers at the changed stored matrix, if they map the same file."""
+        if self._pool is None or self.path is None or not isinstance(matrix, np.memmap) \
+                or matrix.filename != self.path:
+            return False
+        self.matrix = matrix
+        self.ntotal = matrix.shape[0]
+        self.generation += 1
+        self._set_ranges()
+        return True
+
+    def add(self, vectors: np.ndarray, matrix: np.ndarray):
+        if not self._refresh(matrix):
+            self.build(matrix)
+
+    def update(self, rows: np.ndarray, matrix: np.ndarray):
+        if not self._refresh(matrix):
+            self.build(matrix)
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            self._pool = None
+
+    def save(self, path: str):
+        # Workers map the stored matrix, nothing else to persist
+        pass
+
+    def load(self, path: str, matrix: np.ndarray) -> bool:
+        self.build(matrix)
+        return True
+
+    def memory_bytes(self) -> int:
+        # One copy of the matrix, shared by every worker
+        return int(self.matrix.nbytes) if self.matrix is not None else 0
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        futures = [self._pool.submit(_search_shard, queries, k, start, end, self.generation)
+                   for start, end in self.ranges]
+        shard_results = [future.result() for future in futures]
+
+        distances, indices = [], []
+        for q in range(queries.shape[0]):
+            # Each shard's list is sorted by (distance, row), so a k-way heap merge is enough
+            merged = list(itertools.islice(
+                heapq.merge(*[zip(*result[q]) for result in shard_results]), k))
+            distances.append([distance for distance, _ in merged])
+            indices.append([row for _, row in merged])
+        return _pad_results(distances, indices, k)
+
+# Registry of available backends, selectable by name
+INDEX_BACKENDS = {
+    FlatIndex.name: FlatIndex,
+    FaissIVFFlatIndex.name: FaissIVFFlatIndex,
+    FaissHNSWIndex.name: FaissHNSWIndex,
+    NumpyIVFIndex.name: NumpyIVFIndex,
+    ScalarQuantizedIndex.name: ScalarQuantizedIndex,
+    ShardedFlatIndex.name: ShardedFlatIndex,
+}
+
+FAISS_BACKENDS = {FaissIVFFlatIndex.name, FaissHNSWIndex.name}
+
+def create_index(backend: str = "flat", params: Optional[Dict[str, Any]] = None) -> IndexBackend:
+    """
+    Create an index backend by name.
+
+    Args:
+        backend: Name of the backend (see INDEX_BACKENDS)
+        params: Backend-specific parameters
+
+    Returns:
+        Unbuilt IndexBackend instance (falls back to flat search if unavailable)
+    """
+    if backend not in INDEX_BACKENDS:
+        logger.error(f"Unknown index backend: {backend}, using flat search")
+        backend = FlatIndex.name
+    if backend in FAISS_BACKENDS and not HAVE_FAISS:
+        logger.warning("faiss package not found. Please install with: pip install faiss-cpu. Using flat search")
+        backend = FlatIndex.name
+    return INDEX_BACKENDS[backend](**(params or {}))
+
+def evaluate_index(index: IndexBackend, matrix: np.ndarray, k: int = 10,
+                   n_queries: int = 100, seed: int = 0) -> Dict[str, float]:
+    """
+    Measure recall@k against exact search and per-query latency of an index.
+
+    Stored rows are perturbed slightly and used as queries.
+
+    Args:
+        index: Built index to evaluate
+        matrix: Pre-normalized matrix the index was built from
+        k: Number of neighbours to compare
+        n_queries: Number of sample queries
+        seed: Random seed for query sampling
+
+    Returns:
+        Dictionary with recall@k, latency percentiles in milliseconds and
+        the memory held by the index
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return {"recall_at_k": 1.0, "k": k, "n_queries": 0}
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(n, size=min(n_queries, n), replace=False)
+    queries = np.asarray(matrix[rows], dtype=np.float32)
+    queries = queries + rng.normal(scale=0.01, size=queries.shape).astype(np.float32)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    exact = FlatIndex()
+    exact.build(matrix)
+    k = min(k, n)
+    expected, _ = exact.search(queries, k)
+
+    latencies = []
+    hits = 0
+    for query, truth in zip(queries, expected):
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        # A result counts as a hit if it is at least as close as the k-th exact
+        # neighbour, so duplicate chunks with tied distances are not penalised
+        found = found[0][found[0] >= 0]
+        found_distances = 1.0 - np.asarray(matrix[found], dtype=np.float32) @ query
+        hits += min(k, int(np.sum(found_distances <= truth[-1] + 1e-5)))
+
+    return {
+        "recall_at_k": hits / (len(queries) * k),
+        "k": k,
+        "n_queries": len(queries),
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+        "memory_bytes": index.memory_bytes(),
+    }
@@ -0,0 +1,180 @@
+# src/embeddings/onnx_embeddings.py
+
+"""
+ONNX Runtime embedding backend: exports a sentence-transformers model to ONNX, optionally
+quantizes it to int8, and runs it on CPU with the same tokenizer, mean pooling and
+normalization as the PyTorch model.
+"""
+
+import os
+import logging
+import importlib.util
+import numpy as np
+from typing import List, Union
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# onnxruntime and transformers are imported when a model is loaded, not at import time
+HAVE_ONNXRUNTIME = (importlib.util.find_spec("onnxruntime") is not None
+                    and importlib.util.find_spec("transformers") is not None)
+
+# Embedding backends selectable in VectorStore: PyTorch, ONNX float32 and ONNX int8
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+MODELS_DIR = "data/models"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+
+def hub_name(model_name: str) -> str:
+    """
+    Get the Hugging Face hub id of a sentence-transformers model.
+
+    Args:
+        model_name: Model name, e.g. "all-MiniLM-L6-v2"
+
+    Returns:
+        Hub id, e.g. "sentence-transformers/all-MiniLM-L6-v2"
+    """
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+def model_dir_for(model_name: str, models_dir: str = MODELS_DIR) -> str:
+    """
+    Get the directory holding the exported ONNX files of a model.
+
+    Args:
+        model_name: Model name
+        models_dir: Root directory of exported models
+
+    Returns:
+        Path to the model directory
+    """
+    return os.path.join(models_dir, f"{model_name.replace('/', '_')}-onnx")
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """
+    Export a sentence-transformers model's transformer to ONNX.
+
+    Needs torch and transformers; only serving needs onnxruntime.
+
+    Args:
+        model_name: Model name
+        output_dir: Directory for the ONNX files and tokenizer
+        quantize: Whether to also write a dynamically quantized int8 model
+        opset: ONNX opset version
+
+    Returns:
+        Path to the output directory
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(hub_name(model_name))
+    model = AutoModel.from_pretrained(hub_name(model_name)).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    dummy = tokenizer(["export"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    logger.info(f"Exported {model_name} to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = os.path.join(output_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"Quantized {model_name} to int8: {int8_path} "
+                    f"({os.path.getsize(fp32_path) / 1e6:.1f} MB -> {os.path.getsize(int8_path) / 1e6:.1f} MB)")
+    return output_dir
+
+class OnnxEmbeddingModel:
+    """Drop-in replacement for SentenceTransformer.encode backed by ONNX Runtime."""
+
+    def __init__(self, model_dir: str, quantized: bool = True, max_seq_length: int = 256, threads: int = None):
+        """
+        Load an exported model.
+
+        Args:
+            model_dir: Directory written by ``export_onnx``
+            quantized: Whether to load the int8 model instead of the float32 one
+            max_seq_length: Maximum tokens per text (256 for all-MiniLM-L6-v2)
+            threads: Intra-op threads (None lets ONNX Runtime decide)
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.max_seq_length = max_seq_length
+        logger.info(f"Loaded ONNX embedding model from {path}")
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        Embed texts with mean pooling and L2 normalization, like all-MiniLM-L6-v2.
+
+        Args:
+            sentences: Text or list of texts
+            batch_size: Texts per forward pass
+
+        Returns:
+            (d,) embedding for a single text, else (n, d) embeddings
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            # Mean over real tokens only
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            outputs.append(pooled.astype(np.float32))
+
+        if not outputs:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = np.concatenate(outputs)
+        return embeddings[0] if single else embeddings
+
+def load_onnx_model(model_name: str, backend: str = "onnx_int8", models_dir: str = MODELS_DIR,
+                    threads: int = None) -> OnnxEmbeddingModel:
+    """
+    Load an ONNX embedding model, exporting (and quantizing) it first if needed.
+
+    Args:
+        model_name: Model name
+        backend: "onnx" (float32) or "onnx_int8"
+        models_dir: Root directory of exported models
+        threads: Intra-op threads
+
+    Returns:
+        OnnxEmbeddingModel instance
+    """
+    quantized = backend == "onnx_int8"
+    model_dir = model_dir_for(model_name, models_dir)
+    if not os.path.exists(os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)):
+        logger.info(f"No exported ONNX model found in {model_dir}, exporting {model_name}")
+        export_onnx(model_name, model_dir, quantize=quantized)
+    return OnnxEmbeddingModel(model_dir, quantized=quantized, threads=threads)
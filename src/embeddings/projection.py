@@ -0,0 +1,130 @@
+# src/embeddings/projection.py
+
+"""
+Learned linear projection (PCA) that reduces embeddings to fewer dimensions, so
+search matrices take less memory and each scan multiplies fewer columns.
+"""
+
+import os
+import logging
+import numpy as np
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class PCAProjection:
+    """PCA fit on the corpus; projected vectors are re-normalized for cosine search."""
+
+    def __init__(self):
+        self.mean = None                # (d,) corpus mean
+        self.components = None          # (dim, d) principal axes, largest variance first
+        self.explained_variance = None  # (dim,) variance captured by each axis
+        self.total_variance = 0.0
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Output dimension (None before fitting)."""
+        return None if self.components is None else self.components.shape[0]
+
+    @property
+    def input_dim(self) -> Optional[int]:
+        """Input (embedding) dimension (None before fitting)."""
+        return None if self.components is None else self.components.shape[1]
+
+    @property
+    def explained_variance_ratio(self) -> float:
+        """Fraction of the corpus variance kept by the projection."""
+        if self.explained_variance is None or not self.total_variance:
+            return 0.0
+        return float(self.explained_variance.sum() / self.total_variance)
+
+    def fit(self, matrix: np.ndarray, dim: int, block_size: int = 65536) -> "PCAProjection":
+        """
+        Fit the projection.
+
+        The covariance is accumulated block by block, so memory-mapped matrices
+        are streamed rather than loaded at once.
+
+        Args:
+            matrix: (n, d) embeddings to fit on
+            dim: Output dimension
+            block_size: Rows read per block
+
+        Returns:
+            self
+        """
+        n, d = matrix.shape
+        if not 0 < dim <= d:
+            raise ValueError(f"Projection dimension must be between 1 and {d}, got {dim}")
+        if n < 2:
+            raise ValueError("Need at least two vectors to fit a projection")
+
+        total = np.zeros(d, dtype=np.float64)
+        gram = np.zeros((d, d), dtype=np.float64)
+        for start in range(0, n, block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float64)
+            total += block.sum(axis=0)
+            gram += block.T @ block
+        mean = total / n
+        covariance = (gram - n * np.outer(mean, mean)) / (n - 1)
+
+        # eigh returns eigenvalues in ascending order
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:dim]
+
+        self.mean = mean.astype(np.float32)
+        self.components = np.ascontiguousarray(eigenvectors[:, order].T, dtype=np.float32)
+        self.explained_variance = np.maximum(eigenvalues[order], 0).astype(np.float32)
+        self.total_variance = float(np.maximum(eigenvalues, 0).sum())
+        logger.info(f"Fit PCA projection {d} -> {dim} on {n} vectors "
+                    f"({self.explained_variance_ratio:.1%} of variance kept)")
+        return self
+
+    def transform(self, vectors: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """
+        Project vectors and re-normalize them.
+
+        Args:
+            vectors: (n, d) or (d,) embeddings
+            block_size: Rows projected per block
+
+        Returns:
+            (n, dim) float32 unit vectors
+        """
+        vectors = np.atleast_2d(vectors)
+        out = np.empty((vectors.shape[0], self.dim), dtype=np.float32)
+        for start in range(0, vectors.shape[0], block_size):
+            block = (np.asarray(vectors[start:start + block_size], dtype=np.float32) - self.mean) @ self.components.T
+            block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+            out[start:start + block_size] = block
+        return out
+
+    def save(self, path: str):
+        """Save the projection to an ``.npz`` file atomically."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                mean=self.mean,
+                components=self.components,
+                explained_variance=self.explained_variance,
+                total_variance=np.array(self.total_variance, dtype=np.float64),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Load the projection from a file, returning False if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                self.mean = data["mean"]
+                self.components = data["components"]
+                self.explained_variance = data["explained_variance"]
+                self.total_variance = float(data["total_variance"])
+        except Exception as e:
+            logger.warning(f"Could not load projection {path}: {e}")
+            return False
+        return True
@@ -0,0 +1,184 @@
+# src/embeddings/query_cache.py
+
+"""
+In-memory LRU cache of query embeddings with optional TTL and an optional on-disk snapshot,
+so repeated questions skip the transformer forward pass.
+"""
+
+import os
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .embedding_cache import normalize_text
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings keyed by model name and normalized query text."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None,
+                 snapshot_path: Optional[str] = None, lowercase: bool = True):
+        """
+        Create the cache, loading an existing snapshot if one is configured.
+
+        Args:
+            max_entries: Maximum number of cached queries
+            ttl: Seconds after which an entry expires (None = never)
+            snapshot_path: Optional .npz file used to persist the cache across restarts
+            lowercase: Whether to lowercase queries before lookup (safe for uncased models
+                such as all-MiniLM-L6-v2)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.lowercase = lowercase
+        self._entries = OrderedDict()  # key -> (embedding, created_at)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._encode_ms_total = 0.0
+        self._encode_count = 0
+
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot()
+
+    def _key(self, model_name: str, query: str) -> str:
+        text = normalize_text(query)
+        if self.lowercase:
+            text = text.lower()
+        return f"{model_name}\x00{text}"
+
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        """
+        Look up a query embedding.
+
+        Args:
+            model_name: Name of the embedding model
+            query: Query text
+
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        key = self._key(model_name, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Credit the average encode time we just avoided
+            if self._encode_count:
+                self.saved_ms += self._encode_ms_total / self._encode_count
+            return entry[0]
+
+    def put(self, model_name: str, query: str, embedding: np.ndarray):
+        """
+        Store a query embedding, evicting the least recently used entry if full.
+
+        Args:
+            model_name: Name of the embedding model
+            query: Query text
+            embedding: Embedding of the query
+        """
+        key = self._key(model_name, query)
+        with self._lock:
+            self._entries[key] = (np.asarray(embedding, dtype=np.float32), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_encode_time(self, elapsed_ms: float, count: int = 1):
+        """Record how long encoding ``count`` queries took, used to estimate saved time."""
+        with self._lock:
+            self._encode_ms_total += elapsed_ms
+            self._encode_count += count
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, estimated milliseconds saved and size
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_ms": self.saved_ms,
+            "avg_encode_ms": self._encode_ms_total / self._encode_count if self._encode_count else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries
+        }
+
+    def save_snapshot(self, path: Optional[str] = None):
+        """
+        Write the cache contents to disk.
+
+        Args:
+            path: Snapshot file (defaults to the configured snapshot path)
+        """
+        path = path or self.snapshot_path
+        if not path:
+            return
+
+        with self._lock:
+            keys = list(self._entries.keys())
+            embeddings = [embedding for embedding, _ in self._entries.values()]
+            created = [created_at for _, created_at in self._entries.values()]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                keys=np.array(keys, dtype=str),
+                embeddings=np.stack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32),
+                created=np.array(created, dtype=np.float64),
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(keys)} query embeddings to {path}")
+
+    def load_snapshot(self, path: Optional[str] = None):
+        """
+        Load cache contents from disk, skipping expired entries.
+
+        Args:
+            path: Snapshot file (defaults to the configured snapshot path)
+        """
+        path = path or self.snapshot_path
+        try:
+            with np.load(path) as data:
+                keys = data["keys"].tolist()
+                embeddings = data["embeddings"]
+                created = data["created"]
+        except Exception as e:
+            logger.warning(f"Could not load query cache snapshot {path}: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, embedding, created_at in zip(keys, embeddings, created):
+                if self.ttl is not None and now - created_at > self.ttl:
+                    continue
+                self._entries[key] = (embedding, float(created_at))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(f"Loaded {len(self._entries)} query embeddings from {path}")
@@ -0,0 +1,313 @@
+# src/embeddings/snapshots.py
+
+"""
+Versioned, immutable snapshots of the vector store directory. Each snapshot is a
+complete copy of the stored datasets, indexes and projection in its own directory
+(files whose content is unchanged since the previous snapshot are hardlinked);
+a ``CURRENT`` file names the one being served and is swapped atomically, so a
+reader never sees a half-written store. Readers take a lease on the snapshot
+they serve so garbage collection leaves it alone.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import socket
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Directory (inside the vector store directory) holding the snapshots
+SNAPSHOTS_DIR = "snapshots"
+
+# File naming the current snapshot
+CURRENT_FILE = "CURRENT"
+
+# File (inside each snapshot) holding the content digest of every file in it
+MANIFEST_FILE = "MANIFEST.json"
+
+# Bytes read at a time when copying or hashing files
+COPY_BUFFER_SIZE = 1 << 20
+
+# Directory (inside the snapshots directory) holding the readers' lease files
+LEASES_DIR = ".leases"
+
+# Number of snapshots kept by garbage collection; older ones may still be read by
+# queries that started before a reload, so more than the current one is kept
+DEFAULT_KEEP = 3
+
+# Snapshots replaced as current less than this many seconds ago are never collected,
+# so queries still running on them (and readers about to take a lease) can finish
+GC_GRACE_SECONDS = 600
+
+# Staging directories left by an interrupted publish are removed after this many seconds
+STALE_STAGING_SECONDS = 3600
+
+def _fsync_path(path: str):
+    """Flush a file or directory to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _process_alive(pid: int) -> bool:
+    """Check whether a process of this host is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def file_digest(path: str) -> str:
+    """Return the BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _copy_with_digest(source: str, target: str) -> str:
+    """Copy a file and return the digest of the bytes copied."""
+    digest = hashlib.blake2b()
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        for block in iter(lambda: src.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+            dst.write(block)
+    return digest.hexdigest()
+
+def copy_files(source_dir: str, files: List[str], directory: str, previous_dir: Optional[str] = None) -> int:
+    """
+    Fill a snapshot directory with files, hardlinking those unchanged since the previous snapshot.
+
+    A file is unchanged when its content digest equals the one recorded in
+    the previous snapshot's manifest; timestamps are not trusted, since rows
+    are rewritten in place without changing the file size. Files whose size
+    differs are copied without hashing them first. The live file itself is
+    never linked, since it is modified in place by appends. The digests are
+    written to the new snapshot's manifest.
+
+    Args:
+        source_dir: Live vector store directory
+        files: Names of the files to put in the snapshot
+        directory: Snapshot (staging) directory
+        previous_dir: Directory of the previous snapshot, if any
+
+    Returns:
+        Number of files linked rather than copied
+    """
+    previous_manifest = {}
+    if previous_dir is not None:
+        try:
+            with open(os.path.join(previous_dir, MANIFEST_FILE), "r") as f:
+                previous_manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+
+    manifest = {}
+    linked = 0
+    for file in files:
+        source, target = os.path.join(source_dir, file), os.path.join(directory, file)
+        previous = os.path.join(previous_dir, file) if file in previous_manifest else None
+        if previous is not None and os.path.exists(previous) \
+                and os.path.getsize(previous) == os.path.getsize(source):
+            digest = file_digest(source)
+            if digest == previous_manifest[file]:
+                try:
+                    os.link(previous, target)
+                    manifest[file] = digest
+                    linked += 1
+                    continue
+                except OSError:
+                    pass
+        manifest[file] = _copy_with_digest(source, target)
+
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return linked
+
+class SnapshotManager:
+    """Publishes, lists, switches and garbage-collects snapshots under one root directory."""
+
+    def __init__(self, root: str):
+        """
+        Create the manager; nothing is written until a snapshot is published.
+
+        Args:
+            root: Directory holding one subdirectory per snapshot and the ``CURRENT`` file
+        """
+        self.root = root
+        self.current_path = os.path.join(root, CURRENT_FILE)
+        self.leases_path = os.path.join(root, LEASES_DIR)
+
+    def path(self, name: str) -> str:
+        """Return the directory of a snapshot."""
+        return os.path.join(self.root, name)
+
+    def current(self) -> Optional[str]:
+        """Return the name of the current snapshot, or None if none was published."""
+        try:
+            with open(self.current_path, "r") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name or None
+
+    def list(self) -> List[str]:
+        """List published snapshots, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if name.isdigit() and os.path.isdir(self.path(name)))
+
+    def publish(self, write: Callable[[str], None]) -> str:
+        """
+        Write a new snapshot and make it current.
+
+        ``write`` fills a staging directory. The files are flushed to disk,
+        the directory is renamed to its final name and only then is
+        ``CURRENT`` replaced, so a crash at any point leaves the previous
+        snapshot current.
+
+        Args:
+            write: Function writing the snapshot's files into the given directory
+
+        Returns:
+            Name of the new snapshot
+        """
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, f".staging-{os.getpid()}-{threading.get_ident()}-{time.time_ns()}")
+        os.makedirs(staging)
+        try:
+            write(staging)
+            for file in os.listdir(staging):
+                _fsync_path(os.path.join(staging, file))
+            _fsync_path(staging)
+
+            # Names are increasing integers; a concurrent publisher taking the same one makes the rename fail
+            while True:
+                existing = self.list()
+                name = f"{int(existing[-1]) + 1 if existing else 1:08d}"
+                try:
+                    os.rename(staging, self.path(name))
+                    break
+                except OSError:
+                    if not os.path.isdir(self.path(name)):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        _fsync_path(self.root)
+
+        self.set_current(name)
+        return name
+
+    def set_current(self, name: str):
+        """
+        Atomically point ``CURRENT`` at a snapshot (also used to roll back).
+
+        Args:
+            name: Name of a published snapshot
+        """
+        if not os.path.isdir(self.path(name)):
+            raise ValueError(f"Snapshot not found: {name}")
+        tmp_path = f"{self.current_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(name + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_path)
+        _fsync_path(self.root)
+        logger.info(f"Current vector store snapshot is now {name}")
+
+    def acquire(self, name: str) -> str:
+        """
+        Take a lease on a snapshot so garbage collection keeps it while it is served.
+
+        Leases of processes on this host that are no longer running are
+        ignored (and removed) by ``gc``; call ``release`` when done with the snapshot.
+
+        Args:
+            name: Name of a published snapshot
+
+        Returns:
+            Lease to pass to ``release``
+        """
+        os.makedirs(self.leases_path, exist_ok=True)
+        lease = os.path.join(self.leases_path,
+                             f"{name}@{socket.gethostname()}@{os.getpid()}@{threading.get_ident()}-{time.time_ns()}")
+        open(lease, "w").close()
+        return lease
+
+    def release(self, lease: str):
+        """Drop a lease taken with ``acquire``."""
+        try:
+            os.remove(lease)
+        except FileNotFoundError:
+            pass
+
+    def leased(self) -> Set[str]:
+        """Return the names of snapshots with a live lease, removing leases of dead local processes."""
+        if not os.path.isdir(self.leases_path):
+            return set()
+        hostname = socket.gethostname()
+        names = set()
+        for lease in os.listdir(self.leases_path):
+            try:
+                name, host, pid, _ = lease.split("@")
+                pid = int(pid)
+            except ValueError:
+                continue
+            if host == hostname and not _process_alive(pid):
+                self.release(os.path.join(self.leases_path, lease))
+                continue
+            names.add(name)
+        return names
+
+    def gc(self, keep: int = DEFAULT_KEEP, grace_seconds: float = GC_GRACE_SECONDS) -> List[str]:
+        """
+        Delete all but the newest ``keep`` snapshots.
+
+        The current snapshot, snapshots with a live lease and snapshots that
+        stopped being current less than ``grace_seconds`` ago (when the next
+        one was published) are always kept. Stale staging directories of
+        interrupted publishes are removed too.
+
+        Args:
+            keep: Number of snapshots to keep
+            grace_seconds: Minimum time a replaced snapshot is kept
+
+        Returns:
+            Names of the deleted snapshots
+        """
+        current = self.current()
+        names = self.list()
+        leased = self.leased()
+        now = time.time()
+        removed = []
+        for name, successor in zip(names[:max(0, len(names) - keep)], names[1:]):
+            if name == current or name in leased:
+                continue
+            if now - os.path.getmtime(self.path(successor)) < grace_seconds:
+                continue
+            removed.append(name)
+        for name in removed:
+            shutil.rmtree(self.path(name), ignore_errors=True)
+
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = self.path(name)
+                if name.startswith(".staging-") and now - os.path.getmtime(path) > STALE_STAGING_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+
+        if removed:
+            logger.info(f"Removed {len(removed)} old snapshots: {', '.join(removed)}")
+        return removed
@@ -0,0 +1,198 @@
+# src/embeddings/storage.py
+
+"""
+On-disk storage helpers for the vector store: float32 (or float16) ``.npy`` matrices
+that can be appended to in place, and append-only JSON Lines metadata logs.
+"""
+
+import io
+import os
+import json
+import logging
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Key marking a metadata record that replaces an earlier row instead of appending one
+ROW_KEY = "_row"
+
+# Key marking a tombstoned (deleted) row
+DELETED_KEY = "_deleted"
+
+# Element types a stored matrix may have; float16 halves the size, search upcasts per block
+STORAGE_DTYPES = ("float32", "float16")
+
+def write_matrix(path: str, matrix: np.ndarray, dtype: str = "float32"):
+    """
+    Write a matrix to an ``.npy`` file atomically.
+
+    Args:
+        path: Destination path
+        matrix: Matrix to write
+        dtype: Element type stored on disk (see STORAGE_DTYPES)
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.asarray(matrix, dtype=dtype))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_header(f) -> Tuple[Tuple[int, ...], np.dtype, Tuple[int, int], int]:
+    """Read an ``.npy`` header, returning (shape, dtype, version, data offset)."""
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if fortran_order:
+        raise ValueError("Fortran-ordered matrices cannot be appended to")
+    return shape, dtype, version, f.tell()
+
+def matrix_header(path: str) -> Tuple[Tuple[int, ...], np.dtype, int]:
+    """
+    Read the shape, dtype and data offset of an ``.npy`` matrix without loading it.
+
+    Args:
+        path: Path to the ``.npy`` matrix
+
+    Returns:
+        Tuple of (shape, dtype, byte offset of the data)
+    """
+    with open(path, "rb") as f:
+        shape, dtype, _, offset = _read_header(f)
+    return shape, dtype, offset
+
+def _header_bytes(shape: Tuple[int, ...], dtype: np.dtype, version: Tuple[int, int]) -> bytes:
+    """Serialize an ``.npy`` header for the given shape."""
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape}
+    buffer = io.BytesIO()
+    if version == (1, 0):
+        np.lib.format.write_array_header_1_0(buffer, header)
+    else:
+        np.lib.format.write_array_header_2_0(buffer, header)
+    return buffer.getvalue()
+
+def append_matrix_rows(path: str, rows: np.ndarray) -> int:
+    """
+    Append rows to an ``.npy`` matrix without rewriting the existing data.
+
+    The rows are written after the current data first and the header's shape
+    is updated last, so a reader (or a crash) in between only ever sees the
+    old matrix.
+
+    Args:
+        path: Path to an existing C-ordered ``.npy`` matrix
+        rows: (n, d) rows to append
+
+    Returns:
+        Number of rows in the matrix after appending
+    """
+    with open(path, "r+b") as f:
+        shape, dtype, version, offset = _read_header(f)
+        rows = np.ascontiguousarray(rows, dtype=dtype)
+        if len(shape) != 2 or rows.shape[1] != shape[1]:
+            raise ValueError(f"Cannot append rows of shape {rows.shape} to matrix of shape {shape}")
+
+        new_shape = (shape[0] + rows.shape[0], shape[1])
+        header = _header_bytes(new_shape, dtype, version)
+        if len(header) != offset:
+            # The header cannot grow in place, fall back to rewriting the file
+            f.seek(offset)
+            existing = np.frombuffer(f.read(shape[0] * shape[1] * dtype.itemsize), dtype=dtype).reshape(shape)
+            f.close()
+            write_matrix(path, np.concatenate([existing, rows]), dtype=dtype)
+            return new_shape[0]
+
+        # Drop anything left over from an interrupted append, then write the rows
+        data_end = offset + shape[0] * shape[1] * dtype.itemsize
+        f.truncate(data_end)
+        f.seek(data_end)
+        f.write(rows.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+        # Commit by updating the shape in the header
+        f.seek(0)
+        f.write(header)
+        f.flush()
+        os.fsync(f.fileno())
+    return new_shape[0]
+
+def write_matrix_rows(path: str, row_ids: np.ndarray, rows: np.ndarray):
+    """
+    Overwrite existing rows of an ``.npy`` matrix in place.
+
+    Args:
+        path: Path to the ``.npy`` matrix
+        row_ids: Indices of the rows to overwrite
+        rows: New row values aligned with ``row_ids``
+    """
+    matrix = np.load(path, mmap_mode="r+")
+    matrix[np.asarray(row_ids, dtype=np.int64)] = rows
+    matrix.flush()
+    del matrix
+
+def read_metadata_log(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a JSON Lines metadata log.
+
+    Each line is either a new record (appended as the next row) or, if it has
+    a ``_row`` key, a replacement for an earlier row. A replacement with
+    ``_deleted`` set is a tombstone for that row.
+
+    Args:
+        path: Path to the metadata log
+
+    Returns:
+        List of chunk metadata records, one per row
+    """
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            row = record.pop(ROW_KEY, None)
+            if row is None:
+                records.append(record)
+            elif row < len(records):
+                records[row] = record
+    return records
+
+def write_metadata_log(path: str, records: List[Dict[str, Any]]):
+    """
+    Write a compacted metadata log atomically (one line per row).
+
+    Args:
+        path: Destination path
+        records: Chunk metadata records
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def append_metadata_log(path: str, records: List[Dict[str, Any]], rows: List[int] = None):
+    """
+    Append records to a metadata log.
+
+    Args:
+        path: Path to the metadata log
+        records: Chunk metadata records
+        rows: Optional rows replaced by each record (None appends new rows)
+    """
+    with open(path, "a") as f:
+        for i, record in enumerate(records):
+            if rows is not None and rows[i] is not None:
+                record = {**record, ROW_KEY: int(rows[i])}
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
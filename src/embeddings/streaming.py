@@ -0,0 +1,413 @@
+# src/embeddings/streaming.py
+
+"""
+Out-of-core search over a stored dataset: the ``.npy`` matrix is memory-mapped and
+scored in fixed-size blocks with a running top-k heap per query, and chunk metadata
+stays on disk (only one byte offset per row is kept in memory), so peak memory does
+not grow with the corpus.
+"""
+
+import os
+import json
+import mmap
+import heapq
+import logging
+import threading
+import numpy as np
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from .index_backends import top_k_indices, _pad_results
+from .storage import _read_header, write_metadata_log, ROW_KEY, DELETED_KEY, STORAGE_DTYPES
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rows scored per block (65536 x 384 float32 is 96 MB, half that stored as float16)
+DEFAULT_BLOCK_SIZE = 65536
+
+# Scanned pages are dropped from the process after each block where supported
+HAVE_MADVISE = hasattr(mmap.mmap, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+
+class StreamState(NamedTuple):
+    """
+    One consistent view of a streamed dataset.
+
+    States are never modified: a refresh builds a new one and swaps it in, so a
+    search that captured a state keeps matching offsets, tombstones and matrix
+    even if the files are appended to or replaced meanwhile. The open log file
+    and matrix map keep a replaced file readable until the state is dropped.
+    """
+    offsets: np.ndarray       # Byte offset of each row's current metadata record
+    deleted: np.ndarray
+    n_deleted: int
+    rows: int                 # Rows in the matrix header
+    dim: int
+    dtype: np.dtype
+    data_offset: int
+    mapped: Any               # Read-only mmap of the matrix file
+    matrix_stat: Tuple[int, int, int]
+    log: Any                  # Open metadata log, read under log_lock
+    log_lock: Any
+    log_inode: int
+    log_position: int
+
+    @property
+    def size(self) -> int:
+        """Number of committed rows (the matrix header is the commit point)."""
+        return min(self.rows, len(self.offsets), (len(self.mapped) - self.data_offset) // max(1, self.row_bytes))
+
+    @property
+    def row_bytes(self) -> int:
+        """Bytes per stored row."""
+        return self.dim * self.dtype.itemsize
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only (size, dim) view of the committed rows."""
+        return np.frombuffer(self.mapped, dtype=self.dtype, count=self.size * self.dim,
+                             offset=self.data_offset).reshape(self.size, self.dim)
+
+class StreamingDataset:
+    """Blockwise exact search over one stored dataset without loading it."""
+
+    def __init__(self, matrix_path: str, metadata_path: str, block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Open a stored dataset.
+
+        Args:
+            matrix_path: Path to the ``<dataset>_vectors.npy`` matrix
+            metadata_path: Path to the ``<dataset>_metadata.jsonl`` log
+            block_size: Rows scored per block
+        """
+        self.matrix_path = matrix_path
+        self.metadata_path = metadata_path
+        self.block_size = block_size
+        self.state = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @property
+    def size(self) -> int:
+        """Number of committed rows (the matrix header is the commit point)."""
+        return self.state.size
+
+    @property
+    def n_deleted(self) -> int:
+        """Number of tombstoned rows."""
+        return self.state.n_deleted
+
+    @property
+    def dim(self) -> int:
+        """Vector dimension."""
+        return self.state.dim
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Element type of the stored matrix."""
+        return self.state.dtype
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only view of the committed rows, for reading individual rows."""
+        return self.state.matrix
+
+    def refresh(self) -> bool:
+        """
+        Pick up rows appended, replaced or deleted since the last call.
+
+        The metadata log is append-only, so only its new lines are read. A
+        rewritten log (save or compaction) is read again from the start.
+
+        Returns:
+            True if the dataset changed
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        """Implementation of refresh, called with the lock held."""
+        state = self.state
+        # Rewrites replace the log first and the matrix second, so opening the matrix
+        # first can only pair an old matrix with a new log, which is detected below
+        with open(self.matrix_path, "rb") as f:
+            matrix_stat = os.fstat(f.fileno())
+            key = (matrix_stat.st_ino, matrix_stat.st_size, matrix_stat.st_mtime_ns)
+            if state is not None and key == state.matrix_stat:
+                shape, dtype, data_offset, mapped = (state.rows, state.dim), state.dtype, state.data_offset, state.mapped
+            else:
+                shape, dtype, _, data_offset = _read_header(f)
+                if len(shape) != 2 or dtype.name not in STORAGE_DTYPES:
+                    raise ValueError(f"Cannot stream {self.matrix_path}: expected a 2-d "
+                                     f"{' or '.join(STORAGE_DTYPES)} matrix, got {dtype} {shape}")
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        log = open(self.metadata_path, "rb")
+        log_stat = os.fstat(log.fileno())
+        if state is not None and log_stat.st_ino == state.log_inode and log_stat.st_size >= state.log_position:
+            # Same log, possibly appended to: read the new lines, keep the open file
+            offsets, deleted, position = self._read_log(log, state.offsets, state.deleted, state.log_position)
+            log.close()
+            log, log_lock = state.log, state.log_lock
+        else:
+            offsets, deleted, position = self._read_log(log, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool), 0)
+            log_lock = threading.Lock()
+            if state is not None and log_stat.st_ino != state.log_inode and len(offsets) < shape[0]:
+                # A compacted log whose matrix is not replaced yet: keep the current state until it is
+                log.close()
+                return False
+
+        if state is not None and log is state.log and position == state.log_position \
+                and mapped is state.mapped:
+            return False
+        self.state = StreamState(
+            offsets=offsets, deleted=deleted, n_deleted=int(deleted.sum()),
+            rows=shape[0], dim=shape[1], dtype=dtype, data_offset=data_offset,
+            mapped=mapped, matrix_stat=key,
+            log=log, log_lock=log_lock, log_inode=log_stat.st_ino, log_position=position,
+        )
+        return True
+
+    @staticmethod
+    def _read_log(log, offsets: np.ndarray, deleted: np.ndarray, position: int):
+        """
+        Record the offsets of log lines written after ``position``.
+
+        Returns:
+            Tuple of (new offsets, new deleted flags, new log position); the inputs are not modified
+        """
+        appended = []
+        replaced = []
+        log.seek(position)
+        for line in log:
+            if not line.endswith(b"\n"):
+                # Still being written, read it next time
+                break
+            start = position
+            position += len(line)
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            row = record.get(ROW_KEY)
+            if row is None:
+                appended.append(start)
+            else:
+                replaced.append((row, start, DELETED_KEY in record))
+
+        offsets = np.concatenate([offsets, np.asarray(appended, dtype=np.int64)])
+        deleted = np.concatenate([deleted, np.zeros(len(appended), dtype=bool)])
+        for row, start, dead in replaced:
+            if row < len(offsets):
+                offsets[row] = start
+                deleted[row] = dead
+        return offsets, deleted, position
+
+    def search(self, queries: np.ndarray, k: int, block_size: int = None,
+               state: StreamState = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact search, one block of rows at a time.
+
+        Each block is read from the memory map, scored against every query and
+        its local top k pushed into a bounded heap per query. The block's pages
+        are then released, so memory stays around one block regardless of the
+        corpus size. Float16 blocks are upcast to float32 before scoring.
+
+        Args:
+            queries: Pre-normalized (n_queries, d) query matrix
+            k: Number of neighbours per query
+            block_size: Rows per block (defaults to the dataset's block size)
+            state: State to search (defaults to the current one); pass the same
+                state to ``records`` to read the results' metadata
+
+        Returns:
+            Tuple of (distances, rows), padded like IndexBackend.search
+        """
+        state = state or self.state
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        block_size = block_size or self.block_size
+        n = state.size
+        deleted = state.deleted if state.n_deleted else None
+        heaps = [[] for _ in range(queries.shape[0])]
+        if n == 0 or k <= 0:
+            return _pad_results([[] for _ in heaps], [[] for _ in heaps], k)
+
+        row_bytes = state.row_bytes
+        mapped = state.mapped
+        for start in range(0, n, block_size):
+            end = min(n, start + block_size)
+            byte_start = state.data_offset + start * row_bytes
+            block = np.frombuffer(mapped, dtype=state.dtype, count=(end - start) * state.dim,
+                                  offset=byte_start).reshape(end - start, state.dim)
+            distances = 1.0 - queries @ np.asarray(block, dtype=np.float32).T
+            del block
+            if deleted is not None:
+                distances[:, deleted[start:end]] = np.inf
+
+            for heap, row in zip(heaps, distances):
+                for i in top_k_indices(row, k):
+                    if not np.isfinite(row[i]):
+                        continue
+                    # Max-heap on (distance, row): the root is the current worst result
+                    item = (-float(row[i]), -(start + int(i)))
+                    if len(heap) < k:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+
+            if HAVE_MADVISE:
+                page_start = byte_start - byte_start % mmap.PAGESIZE
+                mapped.madvise(mmap.MADV_DONTNEED, page_start, state.data_offset + end * row_bytes - page_start)
+
+        results = [sorted(heap, reverse=True) for heap in heaps]
+        return _pad_results(
+            [[-item[0] for item in result] for result in results],
+            [[-item[1] for item in result] for result in results],
+            k
+        )
+
+    def records(self, rows: List[int], state: StreamState = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Read the metadata records of a few rows from the log.
+
+        Args:
+            rows: Row indices
+            state: State the rows come from (defaults to the current one)
+
+        Returns:
+            Dictionary mapping each row to its chunk metadata
+        """
+        state = state or self.state
+        records = {}
+        with state.log_lock:
+            for row in sorted(set(int(row) for row in rows)):
+                state.log.seek(state.offsets[row])
+                record = json.loads(state.log.readline())
+                record.pop(ROW_KEY, None)
+                records[row] = record
+        return records
+
+    def scan(self, predicate: Callable[[Dict[str, Any]], bool]) -> np.ndarray:
+        """
+        Find the live rows whose current metadata record matches a predicate.
+
+        The log is read sequentially and only the matching row ids are kept,
+        so memory does not grow with the corpus.
+
+        Args:
+            predicate: Function called with each record (without ``_row``)
+
+        Returns:
+            Sorted array of matching committed rows
+        """
+        while True:
+            with self._lock:
+                self._refresh()
+                state = self.state
+            with open(self.metadata_path, "rb") as f:
+                # The log was replaced since the state was read, read the new one
+                if os.fstat(f.fileno()).st_ino != state.log_inode:
+                    continue
+                matches = self._scan_log(f, state.log_position, predicate)
+            break
+        return np.array(sorted(r for r in matches if r < state.size), dtype=np.int64)
+
+    @staticmethod
+    def _scan_log(f, end: int, predicate: Callable[[Dict[str, Any]], bool]) -> set:
+        """Return the rows whose last record before ``end`` is live and matches the predicate."""
+        matches = set()
+        row = 0
+        for line in f:
+            end -= len(line)
+            if end < 0:
+                break
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            target = record.pop(ROW_KEY, None)
+            if target is None:
+                target = row
+                row += 1
+            if DELETED_KEY not in record and predicate(record):
+                matches.add(target)
+            else:
+                matches.discard(target)
+        return matches
+
+    def drop_uncommitted(self) -> int:
+        """
+        Cut metadata records of rows whose vectors were never committed off the log.
+
+        They are left by an interrupted append and would otherwise be
+        misaligned with the next rows appended.
+
+        Returns:
+            Number of records dropped
+        """
+        with self._lock:
+            self._refresh()
+            state = self.state
+            extra = len(state.offsets) - state.rows
+            if extra <= 0:
+                return 0
+            os.truncate(self.metadata_path, int(state.offsets[state.rows]))
+            self._refresh()
+        logger.warning(f"Dropped {extra} uncommitted metadata records from {self.metadata_path}")
+        return extra
+
+    def compact(self, dtype: str = None) -> int:
+        """
+        Rewrite the matrix and metadata log without tombstoned rows, a block at a time.
+
+        Both files are written in full before either is replaced. They are
+        replaced and the new state published while holding the lock, so a
+        search sees either the old pair of files or the new one, never a mix.
+
+        Args:
+            dtype: Storage type of the new matrix (defaults to the current one)
+
+        Returns:
+            Number of rows removed
+        """
+        with self._lock:
+            self._refresh()
+            state = self.state
+        live = np.flatnonzero(~state.deleted[:state.size])
+        removed = state.size - len(live)
+        if removed == 0:
+            return 0
+
+        def live_records() -> Iterator[Dict[str, Any]]:
+            for start in range(0, len(live), self.block_size):
+                rows = live[start:start + self.block_size]
+                records = self.records(rows, state=state)
+                for row in rows:
+                    yield records[int(row)]
+
+        # Write both files next to the current ones, then swap them in back to back
+        metadata_tmp = self.metadata_path + ".compact"
+        write_metadata_log(metadata_tmp, live_records())
+
+        source = state.matrix
+        matrix_tmp = self.matrix_path + ".compact"
+        matrix = np.lib.format.open_memmap(matrix_tmp, mode="w+", dtype=dtype or source.dtype,
+                                           shape=(len(live), state.dim))
+        for start in range(0, len(live), self.block_size):
+            matrix[start:start + self.block_size] = source[live[start:start + self.block_size]]
+        matrix.flush()
+        del matrix, source
+        with open(matrix_tmp, "rb+") as f:
+            os.fsync(f.fileno())
+
+        with self._lock:
+            os.replace(metadata_tmp, self.metadata_path)
+            os.replace(matrix_tmp, self.matrix_path)
+            self._refresh()
+        return removed
+
+    def memory_bytes(self, block_size: int = None) -> int:
+        """Memory held by the row offsets plus one block of vectors being scored (and its upcast copy)."""
+        state = self.state
+        block_rows = min(state.size, block_size or self.block_size)
+        upcast = 4 if state.dtype != np.float32 else 0
+        return int(state.offsets.nbytes + state.deleted.nbytes
+                   + block_rows * state.dim * (state.dtype.itemsize + upcast))
@@ -2,54 +2,253 @@
 
 import os
 import json
+import time
+import glob
+import atexit
 import logging
+import importlib.util
+import threading
 import numpy as np
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any
+
+from .embedding_cache import EmbeddingCache
+from .bm25 import BM25Index
+from .projection import PCAProjection
+from .streaming import StreamingDataset, DEFAULT_BLOCK_SIZE
+from .snapshots import SnapshotManager, copy_files, SNAPSHOTS_DIR, DEFAULT_KEEP
+from .query_cache import QueryEmbeddingCache
+from .embedding_pool import EmbeddingPool, token_budget_batches, scatter_batches, DEFAULT_TOKEN_BUDGET
+from .onnx_embeddings import load_onnx_model, HAVE_ONNXRUNTIME, EMBEDDING_BACKENDS
+from .index_backends import (create_index, evaluate_index, search_rows, search_live,
+                             FlatIndex, INDEX_BACKENDS)
+from .storage import (write_matrix, append_matrix_rows, write_matrix_rows,
+                      read_metadata_log, write_metadata_log, append_metadata_log, DELETED_KEY,
+                      STORAGE_DTYPES)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Try to import sentence-transformer for embeddings
-try:
-    from sentence_transformers import SentenceTransformer
-    HAVE_SENTENCE_TRANSFORMERS = True
-except ImportError:
+# sentence-transformers (and torch) are only imported when a model is first needed, see load_model
+HAVE_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+if not HAVE_SENTENCE_TRANSFORMERS:
     logger.warning("sentence-transformers package not found. Please install with: pip install sentence-transformers")
-    HAVE_SENTENCE_TRANSFORMERS = False
+
+# Embedding models shared by every VectorStore in the process, keyed by (model name, backend)
+_models = {}
+_models_lock = threading.Lock()
+
+# Metadata fields that search results can be filtered on
+FILTER_FIELDS = ("dataset", "source", "source_type", "page_range")
+
+# Default location of the stored datasets
+VECTOR_STORE_DIR = "data/vector_store"
+
+# On-disk file suffixes for stored datasets
+MATRIX_SUFFIX = "_vectors.npy"
+METADATA_SUFFIX = "_metadata.jsonl"
+LEGACY_SUFFIX = "_vectors.json"
+PROJECTION_FILE = "projection.npz"
+
+# Files copied into a snapshot: datasets, persisted indexes and the projection
+SNAPSHOT_SUFFIXES = (MATRIX_SUFFIX, METADATA_SUFFIX, LEGACY_SUFFIX, ".index", "_bm25.npz", PROJECTION_FILE)
+
+# Fraction of tombstoned rows above which a dataset is compacted
+COMPACTION_THRESHOLD = 0.2
 
 class VectorStore:
     """Class for managing vector embeddings of text chunks."""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        """Initialize the vector store."""
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_embedding_cache: bool = True,
+                 cache_max_entries: int = 100000, index_backend: str = None,
+                 index_params: Dict[str, Any] = None, dataset_backends: Dict[str, str] = None,
+                 query_cache_size: int = 1024, query_cache_ttl: float = None,
+                 query_cache_path: str = None, embedding_workers: int = None,
+                 embedding_batch_size: int = 128, embedding_token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 embedding_backend: str = None, projection_dim: int = None, streaming: bool = None,
+                 stream_block_size: int = DEFAULT_BLOCK_SIZE, storage_dtype: str = None,
+                 vector_store_dir: str = None, read_only: bool = False):
+        """Initialize the vector store.
+        
+        ``index_backend`` selects the search index ("flat", "faiss_ivf",
+        "faiss_hnsw", "numpy_ivf", "int8" or "sharded") and defaults to the VECTOR_INDEX_BACKEND environment
+        variable, or exact flat search if it is not set. ``dataset_backends``
+        overrides the backend for individual datasets.
+        
+        Query embeddings are kept in an LRU cache of ``query_cache_size``
+        entries (0 disables it), optionally expiring after ``query_cache_ttl``
+        seconds and snapshotted to ``query_cache_path`` on exit.
+        
+        Bulk embedding (ingestion, re-embedding) is spread over
+        ``embedding_workers`` processes, each with its own model, when more
+        than one is configured (defaults to the EMBEDDING_WORKERS environment
+        variable, or 1). Texts are sorted by length and grouped into batches
+        of at most ``embedding_batch_size`` texts and ``embedding_token_budget``
+        padded tokens.
+        
+        ``embedding_backend`` selects how the model runs: "torch"
+        (sentence-transformers), "onnx" or "onnx_int8" (ONNX Runtime on CPU,
+        float32 or dynamically quantized int8). It defaults to the
+        EMBEDDING_BACKEND environment variable, or "torch".
+        
+        A PCA projection saved with the store (see ``fit_projection``) is
+        applied to stored and query vectors before searching. Setting
+        ``projection_dim`` (or VECTOR_PROJECTION_DIM) fits one of that
+        dimension on load if none exists yet; 0 disables the projection.
+        
+        With ``streaming`` (or VECTOR_STREAMING=1), stored datasets are not
+        loaded into memory: searches scan the memory-mapped matrix in blocks
+        of ``stream_block_size`` rows and read the metadata of the top results
+        from disk, so memory stays bounded however large the corpus grows.
+        Streaming search is exact and supports only the ``dataset`` filter;
+        lexical (and so hybrid) search is not available. Writes, deletes and
+        compaction of streamed datasets work on the files directly.
+        
+        ``storage_dtype`` ("float32" or "float16", defaulting to the
+        VECTOR_STORAGE_DTYPE environment variable, or "float32") is the element
+        type of matrices written to disk. Float16 halves the memory and bandwidth
+        of flat and streaming scans; rows are upcast to float32 a block at a
+        time for scoring. Existing files keep their type until rewritten (by
+        ``save_vectors`` or ``compact``); rows appended to them are stored in
+        the file's type.
+        
+        ``vector_store_dir`` is where datasets are stored (defaults to
+        data/vector_store). ``publish_snapshot`` copies them into an immutable
+        snapshot under its ``snapshots`` directory; a snapshot is opened with
+        ``vector_store_dir`` set to the snapshot's directory and ``read_only``,
+        which rejects writes and keeps indexes built on load in memory only.
+        """
         self.model_name = model_name
-        self.vector_store_dir = "data/vector_store"
+        self.embedding_backend = embedding_backend or os.environ.get("EMBEDDING_BACKEND", "torch")
+        if self.embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{self.embedding_backend}', "
+                             f"expected one of {', '.join(EMBEDDING_BACKENDS)}")
+        self.storage_dtype = storage_dtype or os.environ.get("VECTOR_STORAGE_DTYPE", "float32")
+        if self.storage_dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype '{self.storage_dtype}', "
+                             f"expected one of {', '.join(STORAGE_DTYPES)}")
+        self.index_backend = index_backend or os.environ.get("VECTOR_INDEX_BACKEND", FlatIndex.name)
+        self.index_params = index_params or {}
+        self.dataset_backends = dataset_backends or {}
+        self.embedding_workers = embedding_workers or int(os.environ.get("EMBEDDING_WORKERS", 1))
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_token_budget = embedding_token_budget
+        self._embedding_pool = None
+        self.vector_store_dir = vector_store_dir or VECTOR_STORE_DIR
+        self.read_only = read_only
+        self.snapshots = SnapshotManager(os.path.join(self.vector_store_dir, SNAPSHOTS_DIR))
         self.processed_dir = "data/processed"
+        self.projection_path = os.path.join(self.vector_store_dir, PROJECTION_FILE)
+        if projection_dim is None and os.environ.get("VECTOR_PROJECTION_DIM"):
+            projection_dim = int(os.environ["VECTOR_PROJECTION_DIM"])
+        self.projection_dim = projection_dim
+        if streaming is None:
+            streaming = os.environ.get("VECTOR_STREAMING", "").lower() in ("1", "true", "yes")
+        self.streaming = streaming
+        self.stream_block_size = stream_block_size
+        self._streams = {}  # Datasets searched out of core, in streaming mode
         self.vectors = {}  # Dictionary to store loaded vectors
+        self._matrices = {}  # Pre-normalized embedding matrices per dataset
+        self._version = 0  # Bumped whenever a dataset's vectors change
+        self._lock = threading.RLock()  # Serializes writers and matrix rebuilds
+        self._compaction_thread = None
+        self._compaction_stop = threading.Event()
         
         # Ensure directories exist
-        os.makedirs(self.vector_store_dir, exist_ok=True)
+        if not read_only:
+            os.makedirs(self.vector_store_dir, exist_ok=True)
         
-        # Load the model if sentence-transformers is available
-        if HAVE_SENTENCE_TRANSFORMERS:
-            logger.info(f"Loading embedding model: {model_name}")
-            self.model = SentenceTransformer(model_name)
-        else:
-            self.model = None
+        # Learned projection persisted with the store, applied to every search
+        self.projection = None
+        if self.projection_dim != 0:
+            projection = PCAProjection()
+            if projection.load(self.projection_path):
+                self.projection = projection
+                logger.info(f"Loaded {projection.input_dim} -> {projection.dim} PCA projection")
+        
+        # Persistent cache so unchanged chunks are never re-embedded
+        self.embedding_cache = None
+        if use_embedding_cache and not read_only:
+            self.embedding_cache = EmbeddingCache(
+                os.path.join(self.vector_store_dir, "embedding_cache.sqlite"),
+                max_entries=cache_max_entries
+            )
+        
+        # In-memory cache of query embeddings in front of the model
+        self.query_cache = None
+        if query_cache_size:
+            self.query_cache = QueryEmbeddingCache(
+                max_entries=query_cache_size,
+                ttl=query_cache_ttl,
+                snapshot_path=query_cache_path
+            )
+            if query_cache_path:
+                atexit.register(self.query_cache.save_snapshot)
+        
+        # The model is loaded on first use (or by warmup) and shared across instances
+        self._model = None
+        if not self.model_available:
             logger.warning("No embedding model available. Vector store will not work properly.")
     
+    @property
+    def model(self):
+        """The embedding model, loaded on first access (None if its backend is not installed)."""
+        if self._model is None and self.model_available:
+            self._model = load_model(self.model_name, self.embedding_backend)
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+    
+    @property
+    def model_available(self) -> bool:
+        """Whether an embedding model is loaded or can be loaded, without loading it."""
+        if self._model is not None:
+            return True
+        return HAVE_SENTENCE_TRANSFORMERS if self.embedding_backend == "torch" else HAVE_ONNXRUNTIME
+    
+    @property
+    def model_key(self) -> str:
+        """Key of the model in the embedding caches (backends embed slightly differently)."""
+        if self.embedding_backend == "torch":
+            return self.model_name
+        return f"{self.model_name}:{self.embedding_backend}"
+    
+    def warmup(self) -> Dict[str, float]:
+        """Load the embedding model and run a dummy forward pass before traffic arrives.
+        
+        Returns:
+            Dictionary with the model load and first encode times in milliseconds
+        """
+        if not self.model_available:
+            return {}
+        
+        start = time.perf_counter()
+        model = self.model
+        load_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        model.encode("warmup")
+        encode_ms = (time.perf_counter() - start) * 1000
+        
+        logger.info(f"Warmed up {self.model_name}: load {load_ms:.1f} ms, first encode {encode_ms:.1f} ms")
+        return {"load_ms": load_ms, "encode_ms": encode_ms}
+    
     def load_vector_store(self):
         """Load all available vector data."""
         # First check if we have vector files in the vector store directory
-        vector_files = [f for f in os.listdir(self.vector_store_dir) if f.endswith("_vectors.json")]
+        stored_datasets = self.list_stored_datasets()
         
-        if vector_files:
+        if stored_datasets:
             # Load from vector files
-            for file in vector_files:
-                dataset_name = file.replace("_vectors.json", "")
-                self.vectors[dataset_name] = self.load_vectors(dataset_name)
+            for dataset_name in stored_datasets:
+                if self.streaming and self.open_stream(dataset_name):
+                    continue
+                # The entry and the chunks are set together, as by every other writer
+                with self._lock:
+                    self.vectors[dataset_name] = self.load_vectors(dataset_name)
                 logger.info(f"Loaded vectors for {dataset_name} with {len(self.vectors[dataset_name])} items")
         else:
             # If no vector files, try to load from all_chunks.json
@@ -68,7 +267,7 @@ class VectorStore:
                         texts = [chunk.get("content", "") for chunk in chunks if "content" in chunk]
                     
                     if texts:
-                        embeddings = self.create_embeddings(texts)
+                        embeddings = self.get_embeddings(texts)
                         
                         # Add embeddings to chunks
                         for i, chunk in enumerate(chunks):
@@ -89,7 +288,7 @@ class VectorStore:
                         if dataset_chunks:
                             texts = [chunk.get("text", "") for chunk in dataset_chunks if "text" in chunk]
                             if texts:
-                                embeddings = self.create_embeddings(texts)
+                                embeddings = self.get_embeddings(texts)
                                 
                                 # Add embeddings to chunks
                                 for i, chunk in enumerate(dataset_chunks):
@@ -100,26 +299,175 @@ class VectorStore:
                                 logger.info(f"Created and loaded embeddings for {len(texts)} chunks in {dataset_name}")
             else:
                 logger.warning("No vectors or chunks found. Search will not work properly.")
+        
+        if self.projection_dim and not self.read_only and (self.projection is None or self.projection.dim != self.projection_dim):
+            self.fit_projection(self.projection_dim)
+        
+        # Build search matrices and indexes up front instead of on the first query
+        for dataset_name in list(self.vectors.keys()):
+            if self.vectors[dataset_name]:
+                self.get_matrix(dataset_name)
+    
+    def open_stream(self, dataset_name: str) -> bool:
+        """Open a stored dataset for out-of-core search instead of loading it.
+        
+        Returns:
+            False if the dataset is not stored in the binary format
+        """
+        paths = self._vector_paths(dataset_name)
+        if not (os.path.exists(paths["matrix"]) and os.path.exists(paths["metadata"])):
+            return False
+        stream = StreamingDataset(paths["matrix"], paths["metadata"], self.stream_block_size)
+        with self._lock:
+            self._streams[dataset_name] = stream
+            self._version += 1
+        logger.info(f"Streaming {dataset_name}: {stream.size} rows ({stream.n_deleted} deleted), "
+                    f"about {stream.memory_bytes() / 1e6:.1f} MB while searching")
+        return True
     
     def create_embeddings(self, texts: List[str]) -> np.ndarray:
         """Create embeddings for a list of texts."""
-        if not self.model:
+        if not self.model_available:
             logger.error("No embedding model available.")
             # Return dummy embeddings for testing
             return np.zeros((len(texts), 384), dtype=np.float32)
         
+        # The pool workers load their own models, so the parent never needs one
+        if self.embedding_workers > 1 and len(texts) > self.embedding_batch_size:
+            return self.embedding_pool().encode(texts)
+        
         logger.info(f"Creating embeddings for {len(texts)} texts")
-        return self.model.encode(texts)
+        start = time.perf_counter()
+        # Similar lengths share a batch, so little of each batch is padding
+        batches = token_budget_batches(texts, self.embedding_token_budget, self.embedding_batch_size,
+                                       self.max_seq_length)
+        embeddings = scatter_batches(
+            batches,
+            (np.asarray(self.model.encode([texts[i] for i in batch], batch_size=len(batch)), dtype=np.float32)
+             for batch in batches),
+            len(texts)
+        )
+        elapsed = time.perf_counter() - start
+        if texts and elapsed > 0:
+            logger.info(f"Embedded {len(texts)} texts in {len(batches)} batches in {elapsed:.2f}s "
+                        f"({len(texts) / elapsed:.1f} texts/sec)")
+        return embeddings
+    
+    @property
+    def max_seq_length(self) -> int:
+        """Maximum number of tokens the embedding model reads per text."""
+        # Not worth loading the model for, the pool workers load their own
+        return getattr(self._model, "max_seq_length", None) or 256
+    
+    def embedding_pool(self) -> EmbeddingPool:
+        """Return the bulk embedding worker pool, starting it on first use."""
+        with self._lock:
+            if self._embedding_pool is None:
+                self._embedding_pool = EmbeddingPool(self.model_name, workers=self.embedding_workers,
+                                                     batch_size=self.embedding_batch_size,
+                                                     token_budget=self.embedding_token_budget,
+                                                     max_tokens=self.max_seq_length,
+                                                     backend=self.embedding_backend)
+                atexit.register(self._embedding_pool.close)
+        return self._embedding_pool
+    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings for a list of texts, only embedding texts missing from the cache."""
+        if not self.model_available or not self.embedding_cache or not texts:
+            return self.create_embeddings(texts)
+        
+        cached = self.embedding_cache.get_many(self.model_key, texts)
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            new_embeddings = np.asarray(self.create_embeddings(missing_texts), dtype=np.float32)
+            self.embedding_cache.put_many(self.model_key, missing_texts, new_embeddings)
+            for i, embedding in zip(missing, new_embeddings):
+                cached[i] = embedding
+        
+        stats = self.embedding_cache.stats()
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses "
+                    f"(lifetime hit rate {stats['hit_rate']:.1%}, {stats['size']} entries)")
+        return np.asarray(cached, dtype=np.float32)
+    
+    def _vector_paths(self, dataset_name: str) -> Dict[str, str]:
+        """Return the on-disk paths used to store a dataset."""
+        return {
+            "matrix": os.path.join(self.vector_store_dir, f"{dataset_name}{MATRIX_SUFFIX}"),
+            "metadata": os.path.join(self.vector_store_dir, f"{dataset_name}{METADATA_SUFFIX}"),
+            "json": os.path.join(self.vector_store_dir, f"{dataset_name}{LEGACY_SUFFIX}"),
+            "index": os.path.join(self.vector_store_dir, f"{dataset_name}_{self.backend_for(dataset_name)}"
+                                  f"{f'_pca{self.projection.dim}' if self.projection else ''}.index"),
+            "bm25": os.path.join(self.vector_store_dir, f"{dataset_name}_bm25.npz"),
+        }
+    
+    def backend_for(self, dataset_name: str) -> str:
+        """Return the index backend configured for a dataset."""
+        return self.dataset_backends.get(dataset_name, self.index_backend)
+    
+    def list_stored_datasets(self) -> List[str]:
+        """List datasets stored in the vector store directory (binary or legacy JSON)."""
+        datasets = []
+        for file in sorted(os.listdir(self.vector_store_dir)):
+            for suffix in (MATRIX_SUFFIX, LEGACY_SUFFIX):
+                if file.endswith(suffix):
+                    dataset_name = file[:-len(suffix)]
+                    if dataset_name not in datasets:
+                        datasets.append(dataset_name)
+        return datasets
     
     def load_vectors(self, dataset_name: str) -> List[Dict[str, Any]]:
-        """Load vector embeddings for a dataset."""
-        vector_path = os.path.join(self.vector_store_dir, f"{dataset_name}_vectors.json")
+        """Load vector embeddings for a dataset.
+        
+        The binary format is preferred: the embedding matrix is memory-mapped
+        read-only and only the chunk metadata log is parsed. Legacy
+        ``*_vectors.json`` files are still supported.
+        """
+        paths = self._vector_paths(dataset_name)
+        
+        if os.path.exists(paths["matrix"]) and os.path.exists(paths["metadata"]):
+            logger.info(f"Memory-mapping vectors from {paths['matrix']}")
+            matrix = np.load(paths["matrix"], mmap_mode="r")
+            vector_data = read_metadata_log(paths["metadata"])
+            
+            metadata_dirty = False
+            if len(vector_data) > matrix.shape[0]:
+                # Left over from an interrupted append: the matrix header is the commit point
+                logger.warning(f"Ignoring {len(vector_data) - matrix.shape[0]} uncommitted metadata "
+                               f"records for dataset: {dataset_name}")
+                vector_data = vector_data[:matrix.shape[0]]
+                metadata_dirty = True
+            elif len(vector_data) < matrix.shape[0]:
+                logger.error(f"Matrix rows ({matrix.shape[0]}) and metadata ({len(vector_data)}) "
+                             f"do not match for dataset: {dataset_name}")
+                return []
+            
+            deleted = np.fromiter((DELETED_KEY in record for record in vector_data),
+                                  dtype=bool, count=len(vector_data))
+            
+            # Rows on disk are already normalized and aligned with the metadata
+            with self._lock:
+                self._matrices[dataset_name] = {
+                    "source": vector_data,
+                    "size": len(vector_data),
+                    "matrix": matrix,
+                    "rows": np.arange(len(vector_data), dtype=np.int64),
+                    "metadata_dirty": metadata_dirty,
+                    "deleted": deleted,
+                    "n_deleted": int(deleted.sum()),
+                }
+                self._version += 1
+            logger.info(f"Loaded {len(vector_data)} vectors ({int(deleted.sum())} deleted)")
+            return vector_data
         
+        vector_path = paths["json"]
         if not os.path.exists(vector_path):
             logger.error(f"Vector store not found for dataset: {dataset_name}")
             return []
         
-        logger.info(f"Loading vectors from {vector_path}")
+        logger.info(f"Loading vectors from {vector_path} (legacy JSON format, "
+                    f"run src/scripts/convert_vectors.py to convert)")
         
         with open(vector_path, "r") as f:
             vector_data = json.load(f)
@@ -132,56 +480,1206 @@ class VectorStore:
         logger.info(f"Loaded {len(vector_data)} vectors")
         return vector_data
     
-    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
-        """Search for most similar chunks to a query."""
-        if not self.model:
+    def save_vectors(self, dataset_name: str, chunks: List[Dict[str, Any]] = None) -> str:
+        """Save a dataset in the binary format.
+        
+        Writes the pre-normalized matrix, as ``storage_dtype``, to ``<dataset>_vectors.npy``
+        and the chunk metadata (without embeddings) to ``<dataset>_metadata.jsonl``.
+        Chunks without content are dropped. Files are written to a temporary
+        path first and then renamed, so readers never see a partial file.
+        
+        Args:
+            dataset_name: Name of the dataset to save
+            chunks: Chunks to save (defaults to the currently loaded dataset)
+            
+        Returns:
+            Path to the saved matrix file
+        """
+        self._check_writable()
+        with self._lock:
+            if chunks is not None:
+                self.vectors[dataset_name] = chunks
+            
+            vectors = self.vectors[dataset_name]
+            entry = self._matrices.get(dataset_name)
+            if entry is None or entry["source"] is not vectors or entry["size"] != len(vectors):
+                entry = self._build_matrix(dataset_name)
+            metadata = [
+                {k: v for k, v in vectors[i].items() if k != "embedding"}
+                for i in entry["rows"]
+            ]
+            
+            paths = self._vector_paths(dataset_name)
+            
+            write_metadata_log(paths["metadata"], metadata)
+            write_matrix(paths["matrix"], entry["matrix"], dtype=self.storage_dtype)
+            
+            # Any persisted index was built from the old matrix
+            self._remove_index_files(dataset_name)
+            
+            logger.info(f"Saved {len(metadata)} vectors for {dataset_name} to {paths['matrix']}")
+            
+            # Switch the in-memory dataset over to the memory-mapped copy, or stream it
+            if self.streaming:
+                self.vectors.pop(dataset_name, None)
+                self._matrices.pop(dataset_name, None)
+                self.open_stream(dataset_name)
+            else:
+                self.vectors[dataset_name] = self.load_vectors(dataset_name)
+        return paths["matrix"]
+    
+    def _remove_index_files(self, dataset_name: str, projected_only: bool = False):
+        """Delete every persisted index (ANN and BM25) of a dataset, or only those over projected vectors."""
+        paths = []
+        for backend in INDEX_BACKENDS:
+            prefix = os.path.join(self.vector_store_dir, f"{dataset_name}_{backend}")
+            paths.extend(glob.glob(glob.escape(prefix) + "_pca*.index"))
+            if not projected_only:
+                paths.append(prefix + ".index")
+        if not projected_only:
+            paths.append(self._vector_paths(dataset_name)["bm25"])
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def add(self, chunks: List[Dict[str, Any]], dataset_name: str = "new_data") -> Dict[str, int]:
+        """Append chunks to a stored dataset without rewriting it.
+        
+        Only the new chunks are embedded. Their rows are appended to the
+        on-disk matrix and metadata log, index structures are updated in place
+        and the corpus version is bumped once the new state is swapped in.
+        
+        Args:
+            chunks: Chunks to add (chunks without text content are skipped)
+            dataset_name: Dataset to add to (created if it does not exist)
+            
+        Returns:
+            Dictionary with the number of added and updated chunks
+        """
+        return self._write_chunks(chunks, dataset_name, upsert=False)
+    
+    def upsert(self, chunks: List[Dict[str, Any]], dataset_name: str = "new_data") -> Dict[str, int]:
+        """Insert chunks or update existing ones with the same key.
+        
+        Chunks are matched on ``chunk_id``, or on ``source`` when they have no
+        chunk id. Matching rows are overwritten in place, everything else is
+        appended as in ``add``.
+        
+        Args:
+            chunks: Chunks to insert or update
+            dataset_name: Dataset to write to (created if it does not exist)
+            
+        Returns:
+            Dictionary with the number of added and updated chunks
+        """
+        return self._write_chunks(chunks, dataset_name, upsert=True)
+    
+    def _row_keys(self, entry: Dict[str, Any]) -> Dict[Any, int]:
+        """Map chunk keys to matrix rows for a stored dataset (built once per entry)."""
+        if "keys" not in entry:
+            entry["keys"] = {}
+            for row, record in enumerate(entry["source"]):
+                key = chunk_key(record)
+                if key is not None:
+                    entry["keys"][key] = row
+        return entry["keys"]
+    
+    def _write_chunks(self, chunks: List[Dict[str, Any]], dataset_name: str, upsert: bool) -> Dict[str, int]:
+        """Shared implementation of add and upsert."""
+        self._check_writable()
+        chunks = [chunk for chunk in chunks if chunk.get("text") or chunk.get("content")]
+        if upsert:
+            # Within one call the last chunk with a given key wins
+            latest = {}
+            for i, chunk in enumerate(chunks):
+                latest[chunk_key(chunk) if chunk_key(chunk) is not None else ("_index", i)] = chunk
+            chunks = list(latest.values())
+        if not chunks:
+            return {"added": 0, "updated": 0}
+        
+        with self._lock:
+            paths = self._vector_paths(dataset_name)
+            if self.streaming and dataset_name not in self.vectors and dataset_name not in self._streams:
+                self.open_stream(dataset_name)
+            if dataset_name in self._streams:
+                return self._write_stream_chunks(chunks, dataset_name, upsert)
+            if dataset_name not in self.vectors and dataset_name in self.list_stored_datasets():
+                self.vectors[dataset_name] = self.load_vectors(dataset_name)
+            
+            entry = self.get_matrix(dataset_name) if self.vectors.get(dataset_name) else None
+            if entry is None or not isinstance(entry["matrix"], np.memmap):
+                # Not in the binary format yet: write the whole dataset once
+                existing = list(self.vectors.get(dataset_name) or [])
+                updated = 0
+                if upsert:
+                    keys = {chunk_key(chunk) for chunk in chunks} - {None}
+                    kept = [item for item in existing if chunk_key(item) not in keys]
+                    updated = len(existing) - len(kept)
+                    existing = kept
+                self.save_vectors(dataset_name, existing + chunks)
+                return {"added": len(chunks) - updated, "updated": updated}
+            
+            new_vectors, new_records = self._embed_chunks(chunks)
+            if entry["matrix"].dtype != np.float32:
+                # Index the vectors as they are stored, at the file's precision
+                new_vectors = new_vectors.astype(entry["matrix"].dtype).astype(np.float32)
+            
+            keys = self._row_keys(entry) if upsert else entry.get("keys")
+            replace_rows = [keys.get(chunk_key(chunk)) if upsert else None for chunk in chunks]
+            append_idx = [i for i, row in enumerate(replace_rows) if row is None]
+            update_idx = [i for i, row in enumerate(replace_rows) if row is not None]
+            
+            records = entry["source"]
+            if entry.get("metadata_dirty"):
+                write_metadata_log(paths["metadata"], records)
+            
+            # Metadata first; appended rows only become visible once the matrix header is updated
+            append_metadata_log(
+                paths["metadata"],
+                [new_records[i] for i in append_idx] + [new_records[i] for i in update_idx],
+                rows=[None] * len(append_idx) + [replace_rows[i] for i in update_idx]
+            )
+            if update_idx:
+                write_matrix_rows(paths["matrix"], [replace_rows[i] for i in update_idx], new_vectors[update_idx])
+            if append_idx:
+                append_matrix_rows(paths["matrix"], new_vectors[append_idx])
+            
+            matrix = np.load(paths["matrix"], mmap_mode="r")
+            records = list(records)
+            for i in update_idx:
+                records[replace_rows[i]] = new_records[i]
+            for i in append_idx:
+                if keys is not None and chunk_key(new_records[i]) is not None:
+                    keys[chunk_key(new_records[i])] = len(records)
+                records.append(new_records[i])
+            
+            # The index covers the projected vectors when a projection is active
+            projection = entry.get("projection")
+            index_vectors = new_vectors
+            search_matrix = matrix
+            if projection is not None:
+                index_vectors = projection.transform(new_vectors)
+                search_matrix = self._search_matrix(entry)
+                if update_idx:
+                    search_matrix = search_matrix.copy()
+                    search_matrix[[replace_rows[i] for i in update_idx]] = index_vectors[update_idx]
+                if append_idx:
+                    search_matrix = np.concatenate([search_matrix, index_vectors[append_idx]])
+            
+            # Update the index in place instead of rebuilding it
+            index = entry["index"]
+            if append_idx:
+                index.add(index_vectors[append_idx], search_matrix)
+            if update_idx:
+                index.update(np.asarray([replace_rows[i] for i in update_idx], dtype=np.int64), search_matrix)
+            if index.name != FlatIndex.name:
+                index.save(paths["index"])
+            # BM25 statistics depend on every document, rebuild lazily on the next lexical query
+            if os.path.exists(paths["bm25"]):
+                os.remove(paths["bm25"])
+            
+            deleted = entry.get("deleted")
+            if deleted is None:
+                deleted = np.zeros(len(entry["rows"]), dtype=bool)
+            new_entry = {
+                "source": records,
+                "size": len(records),
+                "matrix": matrix,
+                "rows": np.arange(len(records), dtype=np.int64),
+                "index": index,
+                "index_report": entry.get("index_report"),
+                "deleted": np.concatenate([deleted, np.zeros(len(append_idx), dtype=bool)]),
+                "n_deleted": entry.get("n_deleted", 0),
+                "projection": projection,
+            }
+            if projection is not None:
+                new_entry["projected"] = search_matrix
+            if keys is not None:
+                new_entry["keys"] = keys
+            
+            # Swap in the new state and bump the version in one step
+            self._matrices[dataset_name] = new_entry
+            self.vectors[dataset_name] = records
+            self._version += 1
+        
+        logger.info(f"Added {len(append_idx)} and updated {len(update_idx)} chunks in {dataset_name}")
+        return {"added": len(append_idx), "updated": len(update_idx)}
+    
+    def _embed_chunks(self, chunks: List[Dict[str, Any]]):
+        """Embed the chunks that have no embedding yet.
+        
+        Returns:
+            Tuple of (normalized vectors, metadata records without embeddings)
+        """
+        missing = [i for i, chunk in enumerate(chunks) if chunk.get("embedding") is None]
+        if missing:
+            embeddings = self.get_embeddings(
+                [chunks[i].get("text", "") or chunks[i].get("content", "") for i in missing])
+            for i, embedding in zip(missing, embeddings):
+                chunks[i] = {**chunks[i], "embedding": embedding}
+        new_vectors = normalize_rows([chunk["embedding"] for chunk in chunks])
+        new_records = [{k: v for k, v in chunk.items() if k != "embedding"} for chunk in chunks]
+        return new_vectors, new_records
+    
+    def _write_stream_chunks(self, chunks: List[Dict[str, Any]], dataset_name: str,
+                             upsert: bool) -> Dict[str, int]:
+        """Add or upsert chunks of a streamed dataset on disk, without loading the dataset.
+        
+        Rows to replace are found with one sequential pass over the metadata log.
+        Called with the lock held.
+        """
+        stream = self._streams[dataset_name]
+        paths = self._vector_paths(dataset_name)
+        stream.drop_uncommitted()
+        new_vectors, new_records = self._embed_chunks(chunks)
+        
+        replace_rows = [None] * len(chunks)
+        if upsert:
+            wanted = {chunk_key(chunk) for chunk in chunks} - {None}
+            rows = stream.scan(lambda record: chunk_key(record) in wanted)
+            records = stream.records(rows)
+            keys = {chunk_key(records[int(row)]): int(row) for row in rows}
+            replace_rows = [keys.get(chunk_key(chunk)) for chunk in chunks]
+        append_idx = [i for i, row in enumerate(replace_rows) if row is None]
+        update_idx = [i for i, row in enumerate(replace_rows) if row is not None]
+        
+        # Same order as _write_chunks: metadata first, then the rows, then the matrix header
+        append_metadata_log(
+            paths["metadata"],
+            [new_records[i] for i in append_idx] + [new_records[i] for i in update_idx],
+            rows=[None] * len(append_idx) + [replace_rows[i] for i in update_idx]
+        )
+        if update_idx:
+            write_matrix_rows(paths["matrix"], [replace_rows[i] for i in update_idx], new_vectors[update_idx])
+        if append_idx:
+            append_matrix_rows(paths["matrix"], new_vectors[append_idx])
+        # Persisted indexes (used when the dataset is loaded instead of streamed) are stale now
+        self._remove_index_files(dataset_name)
+        
+        stream.refresh()
+        self._version += 1
+        logger.info(f"Added {len(append_idx)} and updated {len(update_idx)} chunks in streamed dataset {dataset_name}")
+        return {"added": len(append_idx), "updated": len(update_idx)}
+    
+    def delete(self, ids: List[Any] = None, filters: Dict[str, Any] = None,
+               dataset_name: str = None) -> int:
+        """Delete chunks by key and/or metadata filter.
+        
+        Deleted rows are tombstoned rather than removed: stored datasets get a
+        ``_deleted`` record appended to their metadata log and searches skip
+        the rows immediately. The space is reclaimed by ``compact``. Datasets
+        without a metadata log (legacy JSON files, or chunks loaded from
+        ``all_chunks.json``) are saved in the binary format first, so the
+        delete persists.
+        
+        Args:
+            ids: Chunk keys (``chunk_id``, else ``source``) to delete
+            filters: Metadata filters selecting chunks to delete, see ``eligible_rows``
+            dataset_name: Only delete from this dataset (defaults to all datasets)
+            
+        Returns:
+            Number of deleted chunks
+        """
+        if not ids and not filters:
+            raise ValueError("delete needs ids or filters")
+        self._check_writable()
+        keys = set(as_list(ids)) if ids else None
+        
+        total = 0
+        with self._lock:
+            dataset_names = [dataset_name] if dataset_name else list(self.vectors.keys())
+            for name in dataset_names:
+                if not self.vectors.get(name):
+                    continue
+                entry = self.get_matrix(name)
+                rows = entry["rows"]
+                source = entry["source"]
+                
+                selected = np.zeros(len(rows), dtype=bool)
+                eligible = self.eligible_rows(name, filters)
+                if eligible is None:
+                    selected[:] = True
+                else:
+                    selected[eligible] = True
+                if keys is not None:
+                    selected &= np.fromiter((chunk_key(source[i]) in keys for i in rows),
+                                            dtype=bool, count=len(rows))
+                deleted = entry.get("deleted")
+                if deleted is not None:
+                    selected &= ~deleted
+                targets = np.flatnonzero(selected)
+                if len(targets) == 0:
+                    continue
+                
+                if not isinstance(entry["matrix"], np.memmap):
+                    # Nothing on disk to append a tombstone to yet: write the dataset once.
+                    # Matrix rows keep their order, so the targets stay valid
+                    self.save_vectors(name)
+                    if name not in self.vectors:
+                        # Streamed now, deleted from the files below
+                        continue
+                    entry = self.get_matrix(name)
+                    rows, source, deleted = entry["rows"], entry["source"], entry.get("deleted")
+                
+                metadata_path = self._vector_paths(name)["metadata"]
+                if entry.get("metadata_dirty"):
+                    write_metadata_log(metadata_path, source)
+                append_metadata_log(metadata_path, [{DELETED_KEY: True}] * len(targets),
+                                    rows=[int(row) for row in targets])
+                
+                records = list(source)
+                for row in targets:
+                    records[rows[row]] = {DELETED_KEY: True}
+                deleted = np.zeros(len(rows), dtype=bool) if deleted is None else deleted.copy()
+                deleted[targets] = True
+                
+                new_entry = {k: v for k, v in entry.items() if k not in ("keys", "metadata_dirty")}
+                new_entry.update({
+                    "source": records,
+                    "deleted": deleted,
+                    "n_deleted": int(deleted.sum()),
+                })
+                if "keys" in entry:
+                    targets_set = set(targets.tolist())
+                    new_entry["keys"] = {key: row for key, row in entry["keys"].items()
+                                         if row not in targets_set}
+                
+                # Swap in the new state and bump the version in one step
+                self._matrices[name] = new_entry
+                self.vectors[name] = records
+                self._version += 1
+                total += len(targets)
+                logger.info(f"Deleted {len(targets)} chunks from {name} "
+                            f"({self.dead_fraction(name):.1%} of rows are tombstones)")
+            
+            # Streamed datasets: find the rows with one pass over the log and append tombstones
+            unknown = set(filters or {}) - set(FILTER_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown search filters: {sorted(unknown)}")
+            for name, stream in list(self._streams.items()):
+                if dataset_name and name != dataset_name:
+                    continue
+                targets = stream.scan(lambda record: (keys is None or chunk_key(record) in keys)
+                                      and (not filters or matches_filters(record, name, filters)))
+                if len(targets) == 0:
+                    continue
+                stream.drop_uncommitted()
+                append_metadata_log(self._vector_paths(name)["metadata"], [{DELETED_KEY: True}] * len(targets),
+                                    rows=[int(row) for row in targets])
+                stream.refresh()
+                self._version += 1
+                total += len(targets)
+                logger.info(f"Deleted {len(targets)} chunks from streamed dataset {name} "
+                            f"({self.dead_fraction(name):.1%} of rows are tombstones)")
+        return total
+    
+    def dead_fraction(self, dataset_name: str) -> float:
+        """Return the fraction of a dataset's rows that are tombstoned."""
+        stream = self._streams.get(dataset_name)
+        if stream is not None:
+            return stream.n_deleted / stream.size if stream.size else 0.0
+        entry = self._matrices.get(dataset_name)
+        if entry is None or not len(entry["rows"]):
+            return 0.0
+        return entry.get("n_deleted", 0) / len(entry["rows"])
+    
+    def compact(self, dataset_name: str) -> int:
+        """Rewrite a dataset without its tombstoned rows.
+        
+        The compacted matrix, metadata and index are built next to the current
+        ones and swapped in at the end, so searches keep using the old state
+        (and keep their latency) while compaction runs. Writers wait for it.
+        
+        Args:
+            dataset_name: Dataset to compact
+            
+        Returns:
+            Number of rows removed
+        """
+        self._check_writable()
+        if dataset_name in self._streams:
+            return self._compact_stream(dataset_name)
+        with self._lock:
+            entry = self.get_matrix(dataset_name)
+            if not entry.get("n_deleted"):
+                return 0
+            
+            start = time.perf_counter()
+            live = np.flatnonzero(~entry["deleted"])
+            records = [entry["source"][i] for i in entry["rows"][live]]
+            matrix = np.ascontiguousarray(entry["matrix"][live])
+            
+            if isinstance(entry["matrix"], np.memmap):
+                paths = self._vector_paths(dataset_name)
+                # Drop indexes of the old rows first so they are never loaded for the new ones
+                self._remove_index_files(dataset_name)
+                # Metadata before matrix: an interrupted compaction is reported as a
+                # row mismatch on load rather than silently misaligning rows
+                write_metadata_log(paths["metadata"], records)
+                write_matrix(paths["matrix"], matrix, dtype=self.storage_dtype)
+                matrix = np.load(paths["matrix"], mmap_mode="r")
+            
+            new_entry = {
+                "source": records,
+                "size": len(records),
+                "matrix": matrix,
+                "rows": np.arange(len(records), dtype=np.int64),
+            }
+            self._attach_index(dataset_name, new_entry)
+            
+            # Swap in the new state and bump the version in one step
+            self._matrices[dataset_name] = new_entry
+            self.vectors[dataset_name] = records
+            self._version += 1
+        
+        removed = len(entry["rows"]) - len(live)
+        logger.info(f"Compacted {dataset_name}: removed {removed} rows, {len(live)} left "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return removed
+    
+    def _compact_stream(self, dataset_name: str) -> int:
+        """Compact a streamed dataset block by block, without loading it."""
+        stream = self._streams[dataset_name]
+        with self._lock:
+            if not stream.n_deleted:
+                return 0
+            start = time.perf_counter()
+            stream.drop_uncommitted()
+            self._remove_index_files(dataset_name)
+            removed = stream.compact(dtype=self.storage_dtype)
+            self._version += 1
+        logger.info(f"Compacted streamed dataset {dataset_name}: removed {removed} rows, {stream.size} left "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return removed
+    
+    def maybe_compact(self, threshold: float = COMPACTION_THRESHOLD) -> Dict[str, int]:
+        """Compact every dataset whose dead fraction exceeds ``threshold``.
+        
+        Returns:
+            Dictionary mapping each compacted dataset to the number of rows removed
+        """
+        compacted = {}
+        for dataset_name in list(self.vectors.keys()) + list(self._streams.keys()):
+            if self.dead_fraction(dataset_name) > threshold:
+                compacted[dataset_name] = self.compact(dataset_name)
+        return compacted
+    
+    def start_background_compaction(self, interval: float = 60.0,
+                                    threshold: float = COMPACTION_THRESHOLD):
+        """Run ``maybe_compact`` every ``interval`` seconds in a daemon thread."""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        
+        def run():
+            while not self._compaction_stop.wait(interval):
+                try:
+                    self.maybe_compact(threshold)
+                except Exception as e:
+                    logger.error(f"Background compaction failed: {e}")
+        
+        self._compaction_stop.clear()
+        self._compaction_thread = threading.Thread(target=run, name="vector-store-compaction", daemon=True)
+        self._compaction_thread.start()
+        logger.info(f"Started background compaction (every {interval}s, threshold {threshold:.0%})")
+    
+    def stop_background_compaction(self):
+        """Stop the background compaction thread."""
+        self._compaction_stop.set()
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+    
+    def convert_json_vectors(self, dataset_name: str) -> str:
+        """Convert a legacy ``<dataset>_vectors.json`` file to the binary format."""
+        vector_path = self._vector_paths(dataset_name)["json"]
+        if not os.path.exists(vector_path):
+            logger.error(f"Legacy vector file not found for dataset: {dataset_name}")
+            return None
+        
+        with open(vector_path, "r") as f:
+            vector_data = json.load(f)
+        
+        return self.save_vectors(dataset_name, vector_data)
+    
+    def publish_snapshot(self, keep: int = DEFAULT_KEEP) -> str:
+        """Copy the stored datasets into a new immutable snapshot and make it current.
+        
+        The configured index and the BM25 index of every stored dataset are
+        built and persisted first, so servers loading the snapshot do not have
+        to. Files whose content is unchanged since the current snapshot are
+        hardlinked to it, so only the datasets that changed are copied. Writers in this process wait
+        while the files are copied; writers in other processes must not run at
+        the same time. Old snapshots are then garbage-collected, keeping the
+        newest ``keep`` and any still in use (see SnapshotManager.gc).
+        
+        Args:
+            keep: Number of snapshots to keep
+        
+        Returns:
+            Name of the new snapshot
+        """
+        self._check_writable()
+        start = time.perf_counter()
+        with self._lock:
+            for dataset_name in self.list_stored_datasets():
+                if dataset_name in self._streams:
+                    continue
+                if dataset_name not in self.vectors:
+                    self.vectors[dataset_name] = self.load_vectors(dataset_name)
+                if self.vectors[dataset_name]:
+                    # Builds the search matrix and index first, then BM25
+                    self.bm25_index(dataset_name)
+            
+            previous = self.snapshots.current()
+            files = [file for file in sorted(os.listdir(self.vector_store_dir)) if file.endswith(SNAPSHOT_SUFFIXES)]
+            linked = []
+            
+            def write(directory):
+                linked.append(copy_files(self.vector_store_dir, files, directory,
+                                         self.snapshots.path(previous) if previous else None))
+            
+            name = self.snapshots.publish(write)
+        self.snapshots.gc(keep)
+        logger.info(f"Published vector store snapshot {name} ({linked[0]} of {len(files)} files unchanged "
+                    f"and linked) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return name
+    
+    def _check_writable(self):
+        """Raise if the store was opened read-only (e.g. a published snapshot)."""
+        if self.read_only:
+            raise RuntimeError(f"Vector store {self.vector_store_dir} is read-only")
+
+    def _build_matrix(self, dataset_name: str) -> Dict[str, Any]:
+        """Build the pre-normalized float32 embedding matrix for a dataset.
+
+        Rows are only created for chunks that have text content; ``rows`` maps
+        each matrix row back to its index in ``self.vectors[dataset_name]``.
+        """
+        vectors = self.vectors.get(dataset_name) or []
+        
+        row_ids = []
+        missing = []
+        for i, item in enumerate(vectors):
+            content = item.get("text", "") or item.get("content", "")
+            if not content:
+                continue
+            if item.get("embedding") is None:
+                missing.append(i)
+            row_ids.append(i)
+        
+        # Embed any chunks that are missing an embedding in one batch
+        if missing:
+            if self.model:
+                texts = [vectors[i].get("text", "") or vectors[i].get("content", "") for i in missing]
+                embeddings = self.get_embeddings(texts)
+                for i, embedding in zip(missing, embeddings):
+                    vectors[i]["embedding"] = embedding
+            else:
+                missing_set = set(missing)
+                row_ids = [i for i in row_ids if i not in missing_set]
+        
+        if row_ids:
+            matrix = normalize_rows([vectors[i]["embedding"] for i in row_ids])
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        
+        entry = {
+            "source": vectors,
+            "size": len(vectors),
+            "matrix": np.ascontiguousarray(matrix),
+            "rows": np.asarray(row_ids, dtype=np.int64),
+        }
+        self._matrices[dataset_name] = entry
+        self._version += 1
+        logger.info(f"Built search matrix for {dataset_name} with {len(row_ids)} rows")
+        return entry
+    
+    @property
+    def corpus_version(self) -> int:
+        """Version of the searchable corpus, bumped whenever datasets are added, changed or removed."""
+        if any(dataset_name not in self.vectors for dataset_name in list(self._matrices.keys())):
+            with self._lock:
+                # Re-check now that no writer is between setting a dataset's entry and its chunks
+                for dataset_name in list(self._matrices.keys()):
+                    if dataset_name not in self.vectors:
+                        del self._matrices[dataset_name]
+                        self._version += 1
+        for dataset_name, vectors in list(self.vectors.items()):
+            if vectors:
+                # Rebuilds (and bumps the version) if the chunks were replaced
+                self.get_matrix(dataset_name)
+        for stream in list(self._streams.values()):
+            # Other processes may have appended to, deleted from or compacted the files
+            if stream.refresh():
+                self._version += 1
+        return self._version
+    
+    def get_matrix(self, dataset_name: str) -> Dict[str, Any]:
+        """Return the search matrix for a dataset, rebuilding it if the chunks changed."""
+        entry = self._matrices.get(dataset_name)
+        vectors = self.vectors.get(dataset_name)
+        if entry is None or entry["source"] is not vectors or entry["size"] != len(vectors or []) \
+                or "index" not in entry:
+            with self._lock:
+                # Re-check now that no writer is swapping the dataset
+                entry = self._matrices.get(dataset_name)
+                vectors = self.vectors.get(dataset_name)
+                if entry is None or entry["source"] is not vectors or entry["size"] != len(vectors or []):
+                    entry = self._build_matrix(dataset_name)
+                if "index" not in entry:
+                    self._attach_index(dataset_name, entry)
+        return entry
+    
+    def _attach_index(self, dataset_name: str, entry: Dict[str, Any]):
+        """Load or build the configured index backend for a dataset's matrix."""
+        index = create_index(self.backend_for(dataset_name), self.index_params)
+        entry["index"] = index
+        entry["index_report"] = None
+        entry["projection"] = self.projection
+        
+        if entry["matrix"].shape[0] == 0:
+            return
+        if self.projection is not None and self.projection.input_dim != entry["matrix"].shape[1]:
+            logger.error(f"Projection expects {self.projection.input_dim}-d vectors but {dataset_name} has "
+                         f"{entry['matrix'].shape[1]}-d vectors, searching it without the projection")
+            entry["projection"] = None
+        matrix = self._search_matrix(entry)
+        
+        # Only datasets stored on disk have a persisted index
+        persisted = isinstance(entry["matrix"], np.memmap) and entry["projection"] is self.projection
+        index_path = self._vector_paths(dataset_name)["index"]
+        
+        if index.name != FlatIndex.name and persisted and index.load(index_path, matrix):
+            logger.info(f"Loaded {index.name} index for {dataset_name} from {index_path}")
+            return
+        
+        start = time.perf_counter()
+        index.build(matrix)
+        build_ms = (time.perf_counter() - start) * 1000
+        
+        report = evaluate_index(index, matrix)
+        report["build_ms"] = build_ms
+        entry["index_report"] = report
+        logger.info(f"Built {index.name} index for {dataset_name} in {build_ms:.1f} ms: "
+                    f"recall@{report['k']}={report['recall_at_k']:.3f}, "
+                    f"p50={report.get('latency_p50_ms', 0):.3f} ms, p99={report.get('latency_p99_ms', 0):.3f} ms, "
+                    f"memory={report.get('memory_bytes')} bytes")
+        
+        if index.name != FlatIndex.name and persisted and not self.read_only:
+            index.save(index_path)
+            logger.info(f"Saved {index.name} index for {dataset_name} to {index_path}")
+    
+    def _search_matrix(self, entry: Dict[str, Any]) -> np.ndarray:
+        """Return the matrix searched for a dataset: the stored vectors, or their projection."""
+        projection = entry.get("projection")
+        if projection is None:
+            return entry["matrix"]
+        if "projected" not in entry:
+            entry["projected"] = projection.transform(entry["matrix"])
+        return entry["projected"]
+    
+    def fit_projection(self, dim: int) -> PCAProjection:
+        """Fit a PCA projection on every loaded dataset and search through it from now on.
+        
+        The projection is saved with the store and loaded by later instances.
+        Stored vectors stay at full dimension on disk; searches score the
+        projected copy held in memory.
+        
+        Args:
+            dim: Output dimension (e.g. 128 or 64)
+            
+        Returns:
+            The fitted projection
+        """
+        self._check_writable()
+        with self._lock:
+            matrices = []
+            for dataset_name in list(self.vectors.keys()):
+                if not self.vectors[dataset_name]:
+                    continue
+                entry = self.get_matrix(dataset_name)
+                if entry["matrix"].shape[0] == 0:
+                    continue
+                if entry.get("n_deleted"):
+                    matrices.append(entry["matrix"][~entry["deleted"]])
+                else:
+                    matrices.append(entry["matrix"])
+            if not matrices:
+                raise ValueError("No vectors loaded to fit a projection on")
+            
+            projection = PCAProjection().fit(matrices[0] if len(matrices) == 1 else np.concatenate(matrices), dim)
+            projection.save(self.projection_path)
+            self._set_projection(projection)
+        logger.info(f"Saved PCA projection to {self.projection_path}")
+        return projection
+    
+    def remove_projection(self):
+        """Delete the saved projection and search the full-dimension vectors again."""
+        self._check_writable()
+        with self._lock:
+            if os.path.exists(self.projection_path):
+                os.remove(self.projection_path)
+            self._set_projection(None)
+    
+    def _set_projection(self, projection: PCAProjection):
+        """Swap in a projection, dropping indexes built for the previous one."""
+        self.projection = projection
+        for dataset_name in self.list_stored_datasets():
+            self._remove_index_files(dataset_name, projected_only=True)
+        for dataset_name, entry in list(self._matrices.items()):
+            # Copy-on-write: searches holding the old entry finish with the old projection
+            self._matrices[dataset_name] = {k: v for k, v in entry.items()
+                                            if k not in ("index", "index_report", "projection", "projected")}
+        self._version += 1
+    
+    def _make_result(self, item: Dict[str, Any], dataset_name: str, score: float) -> Dict[str, Any]:
+        """Build the result dict returned by search for a single chunk."""
+        return {
+            "content": item.get("text", "") or item.get("content", ""),
+            "metadata": {k: v for k, v in item.items() if k not in ["text", "content", "embedding"]},
+            "source": item.get("source", dataset_name),
+            "source_type": item.get("source_type", "processed data"),
+            "score": score
+        }
+    
+    def search(self, query: str, k: int = 3, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Search for most similar chunks to a query.
+        
+        ``filters`` restricts the search to matching chunks, see ``eligible_rows``.
+        """
+        if not self.model_available:
             logger.error("No embedding model available for search.")
             return []
         
         logger.info(f"Searching for: {query}")
         
-        # Create query embedding
-        query_embedding = self.model.encode(query)
+        return self._search_embeddings(self.encode_queries([query]), k, filters)[0]
+    
+    def search_batch(self, queries: List[str], k: int = 3,
+                     filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """Search for the most similar chunks to each of several queries.
         
-        # Search across all datasets
-        all_results = []
+        All queries are encoded in a single ``encode`` call and scored
+        together with one matrix-matrix product per dataset.
         
-        for dataset_name, vectors in self.vectors.items():
-            # Skip empty datasets
-            if not vectors:
+        Args:
+            queries: Query strings
+            k: Number of results per query
+            filters: Optional metadata filters applied to every query
+            
+        Returns:
+            List of result lists, aligned with ``queries``
+        """
+        if not self.model_available:
+            logger.error("No embedding model available for search.")
+            return [[] for _ in queries]
+        if not queries:
+            return []
+        
+        logger.info(f"Searching for {len(queries)} queries")
+        
+        return self._search_embeddings(self.encode_queries(queries), k, filters)
+    
+    def search_mmr(self, queries: List[str], k: int = 3, pool: int = 20, lambda_mult: float = 0.5,
+                   filters: Dict[str, Any] = None,
+                   rescore: Callable[[str, List[Dict[str, Any]]], List[Dict[str, Any]]] = None
+                   ) -> List[List[Dict[str, Any]]]:
+        """Search with maximal marginal relevance, so near-identical chunks are not all returned.
+        
+        The top ``pool`` chunks of each query are retrieved as usual, then k of
+        them are picked greedily, trading relevance against similarity to the
+        chunks already picked (see ``mmr_select``).
+        
+        With ``rescore`` (e.g. a cross-encoder), relevance comes from the new
+        scores of the whole pool instead of the embedding similarity, scaled
+        to [0, 1] so it stays comparable with the similarity between chunks.
+        
+        Args:
+            queries: Query strings
+            k: Number of results per query
+            pool: Number of candidates to diversify from
+            lambda_mult: Weight of relevance versus diversity (1 is plain search)
+            filters: Optional metadata filters applied to every query
+            rescore: Optional function of (query, pool results) returning the
+                results, in the same order, with a new ``score`` (lower is better)
+            
+        Returns:
+            List of result lists, aligned with ``queries``
+        """
+        if not self.model_available:
+            logger.error("No embedding model available for search.")
+            return [[] for _ in queries]
+        if not queries:
+            return []
+        
+        results = []
+        for query, query_candidates in zip(queries, self._candidates(self.encode_queries(queries),
+                                                                     max(k, pool), filters)):
+            query_candidates = query_candidates[:max(k, pool)]
+            if not query_candidates:
+                results.append([])
                 continue
+            pool_results = [self._make_result(item, dataset_name, distance)
+                            for distance, dataset_name, item, _, _ in query_candidates]
+            if rescore is None:
+                relevance = 1.0 - np.array([candidate[0] for candidate in query_candidates], dtype=np.float32)
+            else:
+                pool_results = rescore(query, pool_results)
+                scores = -np.array([result["score"] for result in pool_results], dtype=np.float32)
+                relevance = (scores - scores.min()) / (np.ptp(scores) or 1.0)
+            # Stored (full-dimension, normalized) vectors of the candidates
+            vectors = np.stack([np.asarray(matrix[idx], dtype=np.float32)
+                                for _, _, _, matrix, idx in query_candidates])
+            selected = mmr_select(relevance, vectors, k, lambda_mult)
+            results.append([pool_results[i] for i in selected])
+        return results
+    
+    def search_lexical(self, query: str, k: int = 3, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Search for chunks matching the query terms with BM25.
+        
+        Needs no embedding model. The ``score`` of each result is the negated
+        BM25 score, so lower is better as for dense search.
+        
+        Args:
+            query: Query string
+            k: Number of results
+            filters: Optional metadata filters, see ``eligible_rows``
             
-            # Calculate similarities
-            for item in vectors:
-                content = item.get("text", "") or item.get("content", "")
-                if not content:
+        Returns:
+            List of results, best first
+        """
+        if self._streams:
+            raise ValueError("Lexical search is not supported in streaming mode")
+        candidates = []
+        for dataset_name in list(self.vectors.keys()):
+            if not self.vectors[dataset_name]:
+                continue
+            
+            entry = self.get_matrix(dataset_name)
+            if len(entry["rows"]) == 0:
+                continue
+            
+            eligible = self.eligible_rows(dataset_name, filters)
+            mask = None
+            if eligible is not None:
+                if len(eligible) == 0:
                     continue
-                    
-                embedding = item.get("embedding")
-                if embedding is None:
-                    # If no embedding, create one
-                    embedding = self.model.encode(content)
-                    item["embedding"] = embedding
-                
-                if isinstance(embedding, list):
-                    embedding = np.array(embedding, dtype=np.float32)
-                
-                # Calculate cosine similarity
-                similarity = np.dot(query_embedding, embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(embedding)
-                )
-                
-                result = {
-                    "content": content,
-                    "metadata": {k: v for k, v in item.items() if k not in ["text", "content", "embedding"]},
-                    "source": item.get("source", dataset_name),
-                    "source_type": item.get("source_type", "processed data"),
-                    "score": 1.0 - similarity  # Convert to distance (lower is better)
-                }
-                all_results.append(result)
+                mask = np.zeros(len(entry["rows"]), dtype=bool)
+                mask[eligible] = True
+            elif entry.get("n_deleted"):
+                mask = ~entry["deleted"]
+            
+            scores, indices = self.bm25_index(dataset_name).search(query, k, mask)
+            rows = entry["rows"]
+            source = entry["source"]
+            for score, idx in zip(scores, indices):
+                candidates.append((-float(score), dataset_name, source[rows[idx]]))
+        
+        candidates.sort(key=lambda x: x[0])
+        return [self._make_result(item, dataset_name, score) for score, dataset_name, item in candidates[:k]]
+    
+    def bm25_index(self, dataset_name: str) -> BM25Index:
+        """Return the BM25 index of a dataset, loading or building it on first use."""
+        entry = self.get_matrix(dataset_name)
+        if "bm25" in entry:
+            return entry["bm25"]
+        
+        with self._lock:
+            if "bm25" in entry:
+                return entry["bm25"]
+            
+            index = BM25Index()
+            path = self._vector_paths(dataset_name)["bm25"]
+            persisted = isinstance(entry["matrix"], np.memmap)
+            if persisted and index.load(path, len(entry["rows"])):
+                logger.info(f"Loaded BM25 index for {dataset_name} from {path}")
+            else:
+                source = entry["source"]
+                index.build([source[i].get("text", "") or source[i].get("content", "") for i in entry["rows"]])
+                if persisted and not self.read_only:
+                    index.save(path)
+                    logger.info(f"Saved BM25 index for {dataset_name} to {path}")
+            entry["bm25"] = index
+        return index
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return metrics of the embedding and query embedding caches."""
+        return {
+            "embedding_cache": self.embedding_cache.stats() if self.embedding_cache else None,
+            "query_cache": self.query_cache.stats() if self.query_cache else None,
+        }
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode queries into a normalized matrix, using the query cache when enabled."""
+        if not self.query_cache:
+            embeddings = self.model.encode(queries[0]) if len(queries) == 1 else self.model.encode(list(queries))
+            return normalize_rows(np.atleast_2d(embeddings))
         
-        # Sort all results by score (lower is better)
-        all_results.sort(key=lambda x: x["score"])
+        cached = [self.query_cache.get(self.model_key, query) for query in queries]
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
         
-        # Return top k results
-        return all_results[:k]
\ No newline at end of file
+        if missing:
+            missing_queries = [queries[i] for i in missing]
+            start = time.perf_counter()
+            if len(missing_queries) == 1:
+                embeddings = np.atleast_2d(self.model.encode(missing_queries[0]))
+            else:
+                embeddings = self.model.encode(missing_queries)
+            self.query_cache.record_encode_time((time.perf_counter() - start) * 1000, len(missing_queries))
+            
+            for i, query, embedding in zip(missing, missing_queries, normalize_rows(embeddings)):
+                self.query_cache.put(self.model_key, query, embedding)
+                cached[i] = embedding
+        
+        return np.stack(cached)
+    
+    def _filter_index(self, dataset_name: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Build (once per matrix) the row-id arrays used to filter a dataset."""
+        if "filter_index" in entry:
+            return entry["filter_index"]
+        
+        vectors = self.vectors[dataset_name]
+        by_source = {}
+        by_source_type = {}
+        pages = np.full(len(entry["rows"]), -1, dtype=np.int64)
+        
+        for row, i in enumerate(entry["rows"]):
+            item = vectors[i]
+            by_source.setdefault(item.get("source", dataset_name), []).append(row)
+            by_source_type.setdefault(chunk_source_type(item), []).append(row)
+            page_num = item.get("page_num")
+            if isinstance(page_num, int):
+                pages[row] = page_num
+        
+        entry["filter_index"] = {
+            "source": {value: np.asarray(rows, dtype=np.int64) for value, rows in by_source.items()},
+            "source_type": {value: np.asarray(rows, dtype=np.int64) for value, rows in by_source_type.items()},
+            "page_num": pages,
+        }
+        return entry["filter_index"]
+    
+    def eligible_rows(self, dataset_name: str, filters: Dict[str, Any] = None) -> np.ndarray:
+        """Return the sorted matrix rows of a dataset that match the filters.
+        
+        Tombstoned rows are never eligible; None means every live row is.
+        
+        Supported filters (values may be a single value or a list of values):
+            dataset: Dataset name(s) to search
+            source: Exact chunk source(s)
+            source_type: Source type(s); chunks without one are "pdf" when they
+                have a page number and "processed data" otherwise
+            page_range: Inclusive (first, last) page number range
+            
+        Returns:
+            Array of eligible row indices, or None if every row is eligible
+        """
+        if not filters:
+            return None
+        
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search filters: {sorted(unknown)}")
+        
+        entry = self.get_matrix(dataset_name)
+        
+        if "dataset" in filters and dataset_name not in as_list(filters["dataset"]):
+            return np.zeros(0, dtype=np.int64)
+        
+        eligible = None
+        filter_index = None
+        for field in ("source", "source_type"):
+            if field not in filters:
+                continue
+            filter_index = filter_index or self._filter_index(dataset_name, entry)
+            matches = [filter_index[field].get(value) for value in as_list(filters[field])]
+            matches = [rows for rows in matches if rows is not None]
+            rows = np.unique(np.concatenate(matches)) if matches else np.zeros(0, dtype=np.int64)
+            eligible = rows if eligible is None else np.intersect1d(eligible, rows, assume_unique=True)
+        
+        if "page_range" in filters:
+            filter_index = filter_index or self._filter_index(dataset_name, entry)
+            first, last = filters["page_range"]
+            pages = filter_index["page_num"]
+            rows = np.flatnonzero((pages >= first) & (pages <= last))
+            eligible = rows if eligible is None else np.intersect1d(eligible, rows, assume_unique=True)
+        
+        if eligible is not None and entry.get("n_deleted"):
+            eligible = eligible[~entry["deleted"][eligible]]
+        return eligible
+    
+    def _search_embeddings(self, query_embeddings: np.ndarray, k: int,
+                           filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """Find the top k chunks for each row of a normalized query matrix."""
+        results = []
+        for query_candidates in self._candidates(query_embeddings, k, filters):
+            # Build result dicts for the top k only
+            results.append([
+                self._make_result(item, dataset_name, score)
+                for score, dataset_name, item, _, _ in query_candidates[:k]
+            ])
+        return results
+    
+    def _candidates(self, query_embeddings: np.ndarray, k: int, filters: Dict[str, Any] = None) -> List[list]:
+        """Collect the top k candidates of every dataset for each query.
+        
+        Returns:
+            Per query, (distance, dataset name, chunk, stored matrix, row) tuples sorted by distance
+        """
+        # Collect the top k candidates of each dataset, per query
+        candidates = [[] for _ in range(query_embeddings.shape[0])]
+        
+        for dataset_name in list(self.vectors.keys()):
+            # Skip empty datasets
+            if not self.vectors[dataset_name]:
+                continue
+            
+            entry = self.get_matrix(dataset_name)
+            if entry["matrix"].shape[0] == 0:
+                continue
+            matrix = self._search_matrix(entry)
+            queries = query_embeddings
+            if entry.get("projection") is not None:
+                queries = entry["projection"].transform(query_embeddings)
+            
+            # Cosine distances (lower is better) of the top k, scoring only eligible rows
+            eligible = self.eligible_rows(dataset_name, filters)
+            if eligible is None:
+                if entry.get("n_deleted"):
+                    # Over-fetch from the index and drop tombstoned rows
+                    distances, indices = search_live(entry["index"], entry["deleted"],
+                                                     entry["n_deleted"], queries, k)
+                else:
+                    distances, indices = entry["index"].search(queries, k)
+            elif len(eligible) == 0:
+                continue
+            else:
+                distances, indices = search_rows(matrix, eligible, queries, k)
+            rows = entry["rows"]
+            source = entry["source"]
+            for query_candidates, query_distances, query_indices in zip(candidates, distances, indices):
+                for distance, idx in zip(query_distances, query_indices):
+                    # Skip padding and rows added to the index after this entry was read
+                    if idx < 0 or idx >= len(rows):
+                        continue
+                    query_candidates.append((float(distance), dataset_name, source[rows[idx]],
+                                             entry["matrix"], int(idx)))
+        
+        self._stream_candidates(candidates, query_embeddings, k, filters)
+        
+        for query_candidates in candidates:
+            # Sort candidates by score (lower is better), keeping dataset order for ties
+            query_candidates.sort(key=lambda x: x[0])
+        return candidates
+    
+    def _stream_candidates(self, candidates: List[list], query_embeddings: np.ndarray, k: int,
+                           filters: Dict[str, Any] = None):
+        """Add the top k candidates of every streamed dataset to ``candidates``."""
+        if not self._streams:
+            return
+        unsupported = set(filters or {}) - {"dataset"}
+        if unsupported:
+            raise ValueError(f"Filters {sorted(unsupported)} are not supported in streaming mode")
+        
+        for dataset_name, stream in list(self._streams.items()):
+            if filters and "dataset" in filters and dataset_name not in as_list(filters["dataset"]):
+                continue
+            stream.refresh()
+            # One state for the search, the records and the vectors, even if the dataset is compacted meanwhile
+            state = stream.state
+            distances, indices = stream.search(query_embeddings, k, state=state)
+            # Only the metadata of the results is read from disk
+            records = stream.records(indices[indices >= 0], state=state)
+            matrix = state.matrix
+            for query_candidates, query_distances, query_indices in zip(candidates, distances, indices):
+                for distance, idx in zip(query_distances, query_indices):
+                    if idx >= 0:
+                        query_candidates.append((float(distance), dataset_name, records[int(idx)],
+                                                 matrix, int(idx)))
+
+
+def load_model(model_name: str, backend: str = "torch"):
+    """Load an embedding model once per process and return the shared instance."""
+    with _models_lock:
+        if (model_name, backend) not in _models:
+            logger.info(f"Loading embedding model: {model_name} ({backend})")
+            start = time.perf_counter()
+            if backend == "torch":
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+            else:
+                model = load_onnx_model(model_name, backend)
+            _models[(model_name, backend)] = model
+            logger.info(f"Loaded embedding model {model_name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return _models[(model_name, backend)]
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """Pick k candidates by maximal marginal relevance.
+    
+    Each step picks the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max similarity to the picked ones``.
+    Pairwise similarities come from one matrix product and each step is a
+    vectorized update, so there is no pairwise Python loop.
+    
+    Args:
+        relevance: (n,) similarity of each candidate to the query
+        vectors: (n, d) normalized candidate vectors
+        k: Number of candidates to pick
+        lambda_mult: Weight of relevance versus diversity
+        
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    similarity = vectors @ vectors.T
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    
+    for _ in range(k - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, similarity[pick], out=max_similarity)
+    return selected
+
+def as_list(value) -> List[Any]:
+    """Wrap a single filter value in a list."""
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+def chunk_key(item: Dict[str, Any]):
+    """Return the key used to match a chunk on upsert (chunk_id, else source)."""
+    return item.get("chunk_id") or item.get("source")
+
+def matches_filters(item: Dict[str, Any], dataset_name: str, filters: Dict[str, Any]) -> bool:
+    """Check one chunk against search filters, with the semantics of VectorStore.eligible_rows."""
+    if "dataset" in filters and dataset_name not in as_list(filters["dataset"]):
+        return False
+    if "source" in filters and item.get("source", dataset_name) not in as_list(filters["source"]):
+        return False
+    if "source_type" in filters and chunk_source_type(item) not in as_list(filters["source_type"]):
+        return False
+    if "page_range" in filters:
+        first, last = filters["page_range"]
+        page_num = item.get("page_num")
+        if not first <= (page_num if isinstance(page_num, int) else -1) <= last:
+            return False
+    return True
+
+def chunk_source_type(item: Dict[str, Any]) -> str:
+    """Return the source type used to filter a chunk."""
+    source_type = item.get("source_type") or (item.get("metadata") or {}).get("source_type")
+    if source_type:
+        return source_type
+    return "pdf" if "page_num" in item else "processed data"
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row of a matrix to unit length (zero rows are left as zeros)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
@@ -0,0 +1,177 @@
+# src/rag/reranker.py
+
+"""
+Second retrieval stage: rescore bi-encoder candidates with a small cross-encoder on
+CPU, with a per-(query, chunk) score cache and a per-query time budget.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+import importlib.util
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from src.rag.result_cache import normalize_query
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# The cross-encoder comes from sentence-transformers, imported on first use
+HAVE_CROSS_ENCODER = importlib.util.find_spec("sentence_transformers") is not None
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+def chunk_digest(result: Dict[str, Any]) -> bytes:
+    """Identify a retrieved chunk by its source and content."""
+    return hashlib.sha1(f"{result.get('source')}\0{result.get('content', '')}".encode("utf-8")).digest()
+
+class CrossEncoderReranker:
+    """Reranks retrieval results with a cross-encoder, best-first candidates scored first."""
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, batch_size: int = 16,
+                 time_budget_ms: float = 150.0, cache_size: int = 50000, max_length: int = 256):
+        """
+        Create the reranker; the model is loaded on first use.
+
+        Args:
+            model_name: Cross-encoder model
+            batch_size: (query, chunk) pairs per forward pass
+            time_budget_ms: Time allowed for scoring the pairs of one query
+            cache_size: Maximum number of cached (query, chunk) scores
+            max_length: Maximum tokens per (query, chunk) pair
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.time_budget_ms = time_budget_ms
+        self.cache_size = cache_size
+        self.max_length = max_length
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._ms_per_pair = None
+        self.pairs_scored = 0
+        self.cache_hits = 0
+        self.budget_cutoffs = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether the cross-encoder is loaded or can be loaded."""
+        return self._model is not None or HAVE_CROSS_ENCODER
+
+    @property
+    def model(self):
+        """The cross-encoder, loaded on first access."""
+        with self._model_lock:
+            if self._model is None:
+                start = time.perf_counter()
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+                logger.info(f"Loaded reranker {self.model_name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return self._model
+
+    def _cached_scores(self, query_key: str, digests: List[bytes]) -> List[Optional[float]]:
+        """Look up cached scores, None for pairs not scored yet."""
+        with self._cache_lock:
+            scores = []
+            for digest in digests:
+                score = self._cache.get((query_key, digest))
+                if score is not None:
+                    self._cache.move_to_end((query_key, digest))
+                    self.cache_hits += 1
+                scores.append(score)
+            return scores
+
+    def _cache_scores(self, query_key: str, digests: List[bytes], scores: List[float]):
+        """Store scores, evicting the least recently used ones if full."""
+        with self._cache_lock:
+            for digest, score in zip(digests, scores):
+                self._cache[(query_key, digest)] = score
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
+        """
+        Rerank candidates and return the best ``top_n``.
+
+        Candidates are scored in their retrieval order, a batch at a time,
+        until the time budget would be exceeded. The first batch is always
+        scored (so the per-pair estimate can recover from a slow query) and
+        loading the model is not counted against the budget. Candidates left
+        unscored keep their retrieval order behind the scored ones. Each
+        reranked result's ``score`` is the negated cross-encoder score (lower
+        is better, as for retrieval) and its original score is kept as
+        ``retrieval_score``.
+
+        Args:
+            query: Query text
+            candidates: Retrieval results, best first
+            top_n: Number of results to return
+
+        Returns:
+            Up to ``top_n`` results, best first
+        """
+        if not candidates or not self.available:
+            return candidates[:top_n]
+
+        query_key = normalize_query(query)
+        digests = [chunk_digest(result) for result in candidates]
+        scores = self._cached_scores(query_key, digests)
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        # Load the model before timing, so loading it is not mistaken for scoring cost
+        model = self.model if missing else None
+        start = time.perf_counter()
+        for batch_start in range(0, len(missing), self.batch_size):
+            batch = missing[batch_start:batch_start + self.batch_size]
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Skip batches that are not expected to finish within the budget
+            if batch_start > 0 and self._ms_per_pair is not None and elapsed_ms + self._ms_per_pair * len(batch) > self.time_budget_ms:
+                self.budget_cutoffs += 1
+                logger.info(f"Rerank budget of {self.time_budget_ms:.0f} ms reached, "
+                            f"{len(missing) - batch_start} candidates left unscored")
+                break
+
+            batch_start_time = time.perf_counter()
+            batch_scores = model.predict([(query, candidates[i]["content"]) for i in batch],
+                                              batch_size=len(batch), show_progress_bar=False)
+            batch_ms = (time.perf_counter() - batch_start_time) * 1000
+            self._ms_per_pair = batch_ms / len(batch) if self._ms_per_pair is None \
+                else 0.8 * self._ms_per_pair + 0.2 * batch_ms / len(batch)
+
+            batch_scores = [float(score) for score in batch_scores]
+            self._cache_scores(query_key, [digests[i] for i in batch], batch_scores)
+            for i, score in zip(batch, batch_scores):
+                scores[i] = score
+            self.pairs_scored += len(batch)
+
+        scored = sorted((i for i, score in enumerate(scores) if score is not None), key=lambda i: -scores[i])
+        if not scored:
+            return candidates[:top_n]
+        unscored = [i for i, score in enumerate(scores) if score is None]
+
+        reranked = [{**candidates[i], "score": -scores[i], "retrieval_score": candidates[i].get("score")}
+                    for i in scored]
+        # Unscored candidates rank after every scored one
+        worst = reranked[-1]["score"]
+        reranked += [{**candidates[i], "score": worst, "retrieval_score": candidates[i].get("score")}
+                     for i in unscored]
+        return reranked[:top_n]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get reranker metrics.
+
+        Returns:
+            Dictionary with pairs scored, cache hits, budget cutoffs and cache size
+        """
+        return {
+            "pairs_scored": self.pairs_scored,
+            "cache_hits": self.cache_hits,
+            "budget_cutoffs": self.budget_cutoffs,
+            "cache_size": len(self._cache),
+            "ms_per_pair": self._ms_per_pair,
+        }
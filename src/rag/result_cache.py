@@ -0,0 +1,112 @@
+# src/rag/result_cache.py
+
+"""
+Bounded LRU cache of retrieval results keyed by normalized query, k and the corpus version.
+"""
+
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (case and whitespace insensitive)."""
+    return re.sub(r"\s+", " ", query or "").strip().lower()
+
+class RetrievalCache:
+    """LRU cache of retrieval results that is cleared whenever the corpus version changes."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Create the cache.
+
+        Args:
+            max_entries: Maximum number of cached (query, k) results
+        """
+        self.max_entries = max_entries
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        """Drop every entry if the corpus version moved on."""
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+                logger.info(f"Corpus version changed to {version}, clearing {len(self._entries)} cached results")
+            self._entries.clear()
+            self.version = version
+
+    def get(self, query: str, k: int, version, **options) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results.
+
+        Args:
+            query: Query text
+            k: Number of results requested
+            version: Current corpus version
+            options: Any other retrieval options that affect the results
+
+        Returns:
+            Copy of the cached result list, or None on a miss
+        """
+        key = (normalize_query(query), k, version, repr(sorted(options.items())))
+        with self._lock:
+            self._check_version(version)
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def put(self, query: str, k: int, version, results: List[Dict[str, Any]], **options):
+        """
+        Store results, evicting the least recently used entry if full.
+
+        Args:
+            query: Query text
+            k: Number of results requested
+            version: Corpus version the results were computed against
+            results: Retrieval results
+            options: Any other retrieval options that affect the results
+        """
+        key = (normalize_query(query), k, version, repr(sorted(options.items())))
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = list(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Dictionary with hits, misses, hit rate, invalidations and size
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "version": self.version
+        }
@@ -1,8 +1,14 @@
 # src/rag/retrieval.py
+import os
+import time
 import logging
+import threading
 import sys
 sys.path.append(".")  # Add root directory to path
-from src.embeddings.vector_store import VectorStore
+from src.embeddings.vector_store import VectorStore, VECTOR_STORE_DIR
+from src.embeddings.snapshots import SnapshotManager, SNAPSHOTS_DIR
+from src.rag.result_cache import RetrievalCache
+from src.rag.reranker import CrossEncoderReranker, chunk_digest
 
 # Configure logging
 logging.basicConfig(
@@ -11,17 +17,243 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Retrieval modes: embeddings only, BM25 only, both fused with reciprocal-rank fusion,
+# or embeddings diversified with maximal marginal relevance
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid", "mmr")
+
+# Rank offset used by reciprocal-rank fusion (60 is the usual choice)
+RRF_K = 60
+
+def reciprocal_rank_fusion(result_lists, k, rrf_k=RRF_K):
+    """Fuse ranked result lists, scoring each document by the sum of 1 / (rrf_k + rank).
+    
+    Documents are matched on source and content. The ``score`` of a fused
+    result is the negated fusion score, so lower is better as for dense search.
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = (result["source"], result["content"])
+            if key not in fused:
+                fused[key] = [0.0, result]
+            fused[key][0] += 1.0 / (rrf_k + rank)
+    
+    ranked = sorted(fused.values(), key=lambda x: -x[0])[:k]
+    return [{**result, "score": -score} for score, result in ranked]
+
 class RAGSystem:
-    def __init__(self):
-        """Initialize the RAG system with a local vector store."""
-        self.vector_store = VectorStore()
+    def __init__(self, result_cache_size=1024, warmup=False, rerank=False, rerank_candidates=20,
+                 rerank_budget_ms=150.0, mmr_lambda=0.5, mmr_pool=20, hot_reload=False,
+                 reload_interval=5.0):
+        """Initialize the RAG system with a local vector store.
+        
+        The embedding model is loaded on the first query unless ``warmup`` is
+        set, which loads it and runs a dummy forward pass up front.
+        
+        With ``rerank``, retrieval over-fetches ``rerank_candidates`` chunks
+        and rescores them with a cross-encoder within ``rerank_budget_ms`` per
+        query, so a small k (2-3) is enough context for the LLM.
+        
+        The "mmr" mode picks k of the top ``mmr_pool`` chunks, weighting
+        relevance by ``mmr_lambda`` against similarity to the chunks already
+        picked (1.0 is plain dense retrieval). With reranking, the cross-encoder
+        scores the whole pool and those scores are the relevance MMR uses.
+        
+        If a vector store snapshot has been published (see
+        VectorStore.publish_snapshot), the current one is served read-only
+        instead of the live store directory. With ``hot_reload``, the snapshot
+        pointer is checked every ``reload_interval`` seconds and a newly
+        published snapshot is loaded in the background and swapped in; queries
+        already running finish on the snapshot they started with. The served
+        snapshot is leased, so garbage collection keeps it until it is replaced.
+        """
+        self.snapshots = SnapshotManager(os.path.join(VECTOR_STORE_DIR, SNAPSHOTS_DIR))
+        self.snapshot = self.snapshots.current()
+        self._lease = self.snapshots.acquire(self.snapshot) if self.snapshot else None
+        self.vector_store = self._open_vector_store(self.snapshot)
+        self.rerank_candidates = rerank_candidates
+        self.rerank_budget_ms = rerank_budget_ms
+        self.reranker = CrossEncoderReranker(time_budget_ms=rerank_budget_ms) if rerank else None
+        # Created on the first per-call ``rerank=True`` of a system that does not rerank by default
+        self._on_demand_reranker = None
+        self.mmr_lambda = mmr_lambda
+        self.mmr_pool = mmr_pool
         
         # Load vector store
         self.vector_store.load_vector_store()
+        if warmup:
+            self.vector_store.warmup()
+        
+        # Cache of retrieval results, invalidated when the corpus version changes
+        self.result_cache = RetrievalCache(result_cache_size) if result_cache_size else None
+        
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self._reload_stop = threading.Event()
+        if hot_reload:
+            self.start_hot_reload(reload_interval)
+    
+    def _open_vector_store(self, snapshot):
+        """Open a published snapshot read-only, or the live store directory if there is none."""
+        if snapshot is None:
+            return VectorStore()
+        logger.info(f"Serving vector store snapshot {snapshot}")
+        return VectorStore(vector_store_dir=self.snapshots.path(snapshot), read_only=True)
+    
+    def reload(self):
+        """Load the current snapshot and swap it in if it changed.
+        
+        The new snapshot is fully loaded (matrices, indexes) before the swap,
+        which is a single reference assignment, so queries never wait for it.
+        
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with self._reload_lock:
+            snapshot = self.snapshots.current()
+            if snapshot is None or snapshot == self.snapshot:
+                return False
+            
+            start = time.perf_counter()
+            lease = self.snapshots.acquire(snapshot)
+            try:
+                vector_store = self._open_vector_store(snapshot)
+                vector_store.load_vector_store()
+            except BaseException:
+                self.snapshots.release(lease)
+                raise
+            # Query embeddings only depend on the model, keep them warm across snapshots
+            if vector_store.query_cache is not None and self.vector_store.query_cache is not None \
+                    and vector_store.model_key == self.vector_store.model_key:
+                vector_store.query_cache = self.vector_store.query_cache
+            
+            previous, previous_lease = self.snapshot, self._lease
+            self.vector_store = vector_store
+            self.snapshot, self._lease = snapshot, lease
+            # Queries still running on the previous snapshot are covered by the GC grace period
+            if previous_lease:
+                self.snapshots.release(previous_lease)
+            logger.info(f"Swapped vector store snapshot {previous} for {snapshot} "
+                        f"(loaded in {(time.perf_counter() - start) * 1000:.0f} ms)")
+            return True
+    
+    def start_hot_reload(self, interval=5.0):
+        """Check for a newly published snapshot every ``interval`` seconds in a daemon thread."""
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return
+        
+        def run():
+            while not self._reload_stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Loading vector store snapshot failed, still serving {self.snapshot}: {e}")
+        
+        self._reload_stop.clear()
+        self._reload_thread = threading.Thread(target=run, name="vector-store-reload", daemon=True)
+        self._reload_thread.start()
+        logger.info(f"Watching {self.snapshots.current_path} every {interval}s")
+    
+    def stop_hot_reload(self):
+        """Stop the snapshot watcher thread."""
+        self._reload_stop.set()
+        if self._reload_thread is not None:
+            self._reload_thread.join()
+            self._reload_thread = None
     
-    def retrieve(self, query, k=3):
-        """Retrieve the top k most relevant documents for the query."""
-        return self.vector_store.search(query, k=k)
+    def retrieve(self, query, k=3, filters=None, mode="dense", rerank=None):
+        """Retrieve the top k most relevant documents for the query.
+        
+        ``filters`` restricts retrieval by dataset, source, source_type or
+        page_range (see VectorStore.eligible_rows). ``mode`` is "dense"
+        (embeddings), "lexical" (BM25 only, no query embedding needed) or
+        "hybrid" (both, fused with reciprocal-rank fusion) or "mmr" (dense,
+        without near-duplicate chunks). ``rerank``
+        overrides whether the cross-encoder stage runs (defaults to on when
+        the system was created with ``rerank=True``).
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        rerank = self._use_reranker(rerank)
+        # One store for the whole query, even if a reload swaps in another meanwhile
+        vector_store = self.vector_store
+        if not self.result_cache:
+            return self._search(vector_store, [query], k, filters, mode, rerank)[0]
+        
+        version = (vector_store.vector_store_dir, vector_store.corpus_version)
+        results = self.result_cache.get(query, k, version, filters=filters, mode=mode, rerank=rerank)
+        if results is None:
+            results = self._search(vector_store, [query], k, filters, mode, rerank)[0]
+            self.result_cache.put(query, k, version, results, filters=filters, mode=mode, rerank=rerank)
+        return results
+    
+    def retrieve_batch(self, queries, k=3, filters=None, mode="dense", rerank=None):
+        """Retrieve the top k most relevant documents for each of several queries."""
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        rerank = self._use_reranker(rerank)
+        vector_store = self.vector_store
+        if not self.result_cache:
+            return self._search(vector_store, queries, k, filters, mode, rerank)
+        
+        version = (vector_store.vector_store_dir, vector_store.corpus_version)
+        results = [self.result_cache.get(query, k, version, filters=filters, mode=mode, rerank=rerank)
+                   for query in queries]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        if missing:
+            missing_queries = [queries[i] for i in missing]
+            for i, query, result in zip(missing, missing_queries,
+                                        self._search(vector_store, missing_queries, k, filters, mode, rerank)):
+                self.result_cache.put(query, k, version, result, filters=filters, mode=mode, rerank=rerank)
+                results[i] = result
+        return results
+    
+    def _use_reranker(self, rerank):
+        """Resolve the per-call rerank option against the configured reranker."""
+        if rerank is None:
+            return self.reranker is not None
+        if rerank and self.reranker is None and self._on_demand_reranker is None:
+            # Created on first use so systems that never rerank never load it
+            self._on_demand_reranker = CrossEncoderReranker(time_budget_ms=self.rerank_budget_ms)
+        return bool(rerank)
+    
+    def _search(self, vector_store, queries, k, filters, mode, rerank=False):
+        """Run uncached retrieval for several queries in the given mode."""
+        if not rerank:
+            return self._retrieve_candidates(vector_store, queries, k, filters, mode)
+        
+        reranker = self.reranker or self._on_demand_reranker
+        if mode == "mmr":
+            # Rerank the whole MMR pool, then diversify over the cross-encoder scores
+            def rescore(query, results):
+                reranked = {chunk_digest(result): result for result in reranker.rerank(query, results, len(results))}
+                return [reranked[chunk_digest(result)] for result in results]
+            
+            return vector_store.search_mmr(queries, k=k, pool=self.mmr_pool, lambda_mult=self.mmr_lambda,
+                                           filters=filters, rescore=rescore)
+        
+        # Over-fetch cheaply, then let the cross-encoder pick the best k
+        candidates = self._retrieve_candidates(vector_store, queries, max(k, self.rerank_candidates), filters, mode)
+        return [reranker.rerank(query, results, k) for query, results in zip(queries, candidates)]
+    
+    def _retrieve_candidates(self, vector_store, queries, k, filters, mode):
+        """Run first-stage retrieval for several queries in the given mode."""
+        if mode == "lexical":
+            return [vector_store.search_lexical(query, k=k, filters=filters) for query in queries]
+        if mode == "dense":
+            return vector_store.search_batch(queries, k=k, filters=filters)
+        if mode == "mmr":
+            return vector_store.search_mmr(queries, k=k, pool=self.mmr_pool,
+                                           lambda_mult=self.mmr_lambda, filters=filters)
+        
+        # Hybrid: fuse deeper candidate lists from both retrievers
+        pool = max(4 * k, 20)
+        dense = vector_store.search_batch(queries, k=pool, filters=filters)
+        return [
+            reciprocal_rank_fusion([dense_results, vector_store.search_lexical(query, k=pool, filters=filters)], k)
+            for query, dense_results in zip(queries, dense)
+        ]
     
     def format_answer(self, query, context_docs):
         """Format an answer based on the retrieval without using an LLM."""
@@ -3,7 +3,6 @@
 import os
 import sys
 import logging
-import json
 
 # Add the parent directory to the path so we can import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -35,10 +34,8 @@ def process_new_urls(urls):
         logger.error("Failed to scrape any URLs")
         return False
     
-    # Step 2: Load the vector store
-    logger.info("Loading existing vector store")
+    # Step 2: Open the vector store (datasets are loaded on demand)
     vector_store = VectorStore()
-    vector_store.load_vector_store()
     
     # Step 3: Process the newly scraped text files
     new_chunks = []
@@ -62,26 +59,16 @@ def process_new_urls(urls):
         }
         new_chunks.append(chunk)
     
-    # Step 4: Create embeddings for the new chunks
+    # Step 4: Upsert the new chunks, embedding and appending only these rows.
+    # Chunks are keyed by URL, so re-scraping a page updates it instead of duplicating it.
     if new_chunks:
-        texts = [chunk["text"] for chunk in new_chunks]
-        embeddings = vector_store.create_embeddings(texts)
-        
-        # Add embeddings to chunks
-        for i, chunk in enumerate(new_chunks):
-            if i < len(embeddings):
-                chunk["embedding"] = embeddings[i].tolist()
-        
-        # Step 5: Append new chunks to vector store
         dataset_name = "new_data"
-        vector_store.vectors[dataset_name] = new_chunks
+        counts = vector_store.upsert(new_chunks, dataset_name)
         
-        # Save the updated vectors
-        vector_path = os.path.join(vector_store.vector_store_dir, f"{dataset_name}_vectors.json")
-        with open(vector_path, "w") as f:
-            json.dump(new_chunks, f)
+        logger.info(f"Added {counts['added']} and updated {counts['updated']} chunks in the vector store")
         
-        logger.info(f"Added {len(new_chunks)} new chunks to vector store")
+        # Step 5: Publish a snapshot; running servers load it in the background and swap it in
+        vector_store.publish_snapshot()
         return True
     else:
         logger.error("No chunks were created")
@@ -0,0 +1,80 @@
+# src/scripts/benchmark_dynamic_batching.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore
+from embeddings.embedding_pool import estimate_tokens, token_budget_batches, DEFAULT_TOKEN_BUDGET
+from scripts.benchmark_embedding_pool import load_texts
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def padding_efficiency(texts, batches, max_tokens):
+    """Return the fraction of padded batch tokens that are real tokens."""
+    lengths = np.array([estimate_tokens(text, max_tokens) for text in texts])
+    padded = sum(len(batch) * lengths[batch].max() for batch in batches)
+    return lengths.sum() / padded if padded else 1.0
+
+def benchmark_dynamic_batching(batch_size=32, token_budget=DEFAULT_TOKEN_BUDGET, repeats=3,
+                               chunks_path="data/processed/all_chunks.json"):
+    """Compare fixed-size batches in arrival order with length-bucketed token-budget batches.
+    
+    Args:
+        batch_size: Batch size of the fixed-size baseline
+        token_budget: Padded-token budget of the dynamic batches
+        repeats: Timed runs per strategy (the best is reported)
+        chunks_path: Chunks file to embed
+        
+    Returns:
+        Dictionary with batches, padding efficiency and texts/sec per strategy
+    """
+    texts = load_texts(chunks_path)
+    vector_store = VectorStore(use_embedding_cache=False, embedding_token_budget=token_budget)
+    max_tokens = vector_store.max_seq_length
+    
+    fixed = [np.arange(i, min(i + batch_size, len(texts))) for i in range(0, len(texts), batch_size)]
+    dynamic = token_budget_batches(texts, token_budget, vector_store.embedding_batch_size, max_tokens)
+    
+    results = {}
+    print(f"\n{len(texts)} texts, estimated lengths {min(estimate_tokens(t, max_tokens) for t in texts)}-"
+          f"{max(estimate_tokens(t, max_tokens) for t in texts)} tokens")
+    print(f"{'strategy':<10} {'batches':>8} {'padding eff':>12} {'texts/sec':>10}")
+    for name, batches in (("fixed", fixed), ("dynamic", dynamic)):
+        texts_per_sec = None
+        if vector_store.model:
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                for batch in batches:
+                    vector_store.model.encode([texts[i] for i in batch], batch_size=len(batch))
+                best = min(best, time.perf_counter() - start)
+            texts_per_sec = len(texts) / best
+        
+        results[name] = {
+            "batches": len(batches),
+            "padding_efficiency": padding_efficiency(texts, batches, max_tokens),
+            "texts_per_sec": texts_per_sec,
+        }
+        print(f"{name:<10} {len(batches):>8} {results[name]['padding_efficiency']:>12.1%} "
+              f"{texts_per_sec or 0:>10.1f}")
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark length-bucketed dynamic batching")
+    parser.add_argument("--batch-size", type=int, default=32, help="Fixed batch size of the baseline")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Padded tokens per batch")
+    args = parser.parse_args()
+    benchmark_dynamic_batching(batch_size=args.batch_size, token_budget=args.token_budget)
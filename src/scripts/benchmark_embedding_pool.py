@@ -0,0 +1,83 @@
+# src/scripts/benchmark_embedding_pool.py
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore
+from embeddings.embedding_pool import EmbeddingPool
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_texts(chunks_path="data/processed/all_chunks.json"):
+    """Load the texts of every chunk in all_chunks.json (list or dictionary format)."""
+    with open(chunks_path, "r") as f:
+        data = json.load(f)
+    chunks = data if isinstance(data, list) else [
+        chunk for value in data.values() if isinstance(value, list) for chunk in value]
+    return [chunk.get("text", "") or chunk.get("content", "") for chunk in chunks
+            if isinstance(chunk, dict) and (chunk.get("text") or chunk.get("content"))]
+
+def benchmark_embedding_pool(worker_counts=None, batch_size=64, chunks_path="data/processed/all_chunks.json"):
+    """Report texts/sec of single-process encoding and of the worker pool.
+    
+    Args:
+        worker_counts: Worker counts to try (defaults to 2 and the number of cores)
+        batch_size: Texts per batch
+        chunks_path: Chunks file to embed
+        
+    Returns:
+        Dictionary mapping each configuration to texts per second
+    """
+    texts = load_texts(chunks_path)
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({2, cores})
+    
+    vector_store = VectorStore(use_embedding_cache=False, embedding_batch_size=batch_size)
+    if not vector_store.model:
+        logger.error("No embedding model available")
+        return {}
+    
+    print(f"\n{len(texts)} texts, batch size {batch_size}, {cores} cores")
+    print(f"{'workers':>8} {'seconds':>9} {'texts/sec':>10}")
+    
+    results = {}
+    start = time.perf_counter()
+    expected = np.asarray(vector_store.model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    results[1] = len(texts) / elapsed
+    print(f"{1:>8} {elapsed:>9.2f} {results[1]:>10.1f}")
+    
+    for workers in worker_counts:
+        pool = EmbeddingPool(vector_store.model_name, workers=workers, batch_size=batch_size)
+        # Load the models in every worker before timing
+        pool.encode(texts[:workers * batch_size])
+        embeddings = pool.encode(texts)
+        pool.close()
+        
+        if not np.allclose(embeddings, expected, atol=1e-4):
+            logger.warning(f"Embeddings from {workers} workers differ from single-process encoding")
+        stats = pool.stats()
+        results[workers] = stats["texts_per_sec"]
+        print(f"{workers:>8} {stats['seconds']:>9.2f} {stats['texts_per_sec']:>10.1f}")
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the multi-process embedding pool")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts to benchmark")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per batch")
+    args = parser.parse_args()
+    benchmark_embedding_pool(worker_counts=args.workers, batch_size=args.batch_size)
@@ -0,0 +1,149 @@
+# src/scripts/benchmark_float16.py
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore, normalize_rows
+from embeddings.index_backends import FlatIndex
+from embeddings.storage import write_matrix, STORAGE_DTYPES
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def sample_queries(matrix, n_queries, seed=0):
+    """Perturb randomly chosen stored rows slightly and use them as queries."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(matrix.shape[0], size=min(n_queries, matrix.shape[0]), replace=False)
+    queries = np.asarray(matrix[np.sort(rows)], dtype=np.float32)
+    queries = queries + rng.normal(scale=0.01, size=queries.shape).astype(np.float32)
+    return normalize_rows(queries)
+
+def compare_storage(matrix, k=10, n_queries=200, repeats=3):
+    """Compare flat search over the same vectors stored as float32 and as float16.
+
+    Both copies are written to ``.npy`` files and memory-mapped, as the vector
+    store serves them. Recall@k is the overlap of each float16 top k with the
+    float32 top k.
+
+    Args:
+        matrix: Pre-normalized (n, d) matrix
+        k: Number of neighbours to compare
+        n_queries: Number of sample queries
+        repeats: Times each query is run for the latency measurement
+
+    Returns:
+        Dictionary of measurements per storage type
+    """
+    queries = sample_queries(matrix, n_queries)
+    k = min(k, matrix.shape[0])
+    directory = tempfile.mkdtemp(prefix="float16_bench_")
+    results = {}
+    try:
+        for dtype in STORAGE_DTYPES:
+            path = os.path.join(directory, f"{dtype}_vectors.npy")
+            write_matrix(path, matrix, dtype=dtype)
+            index = FlatIndex()
+            index.build(np.load(path, mmap_mode="r"))
+            distances, rows = index.search(queries, k)  # Also pages the file in
+
+            latencies = []
+            for query in queries:
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    index.search(query[None, :], k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            index.search(queries, k)
+            batch_ms = (time.perf_counter() - start) * 1000
+
+            results[dtype] = {
+                "distances": distances,
+                "rows": rows,
+                "p50_ms": float(np.median(latencies)),
+                "batch_ms_per_query": batch_ms / len(queries),
+                "memory_bytes": index.memory_bytes(),
+            }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    exact, half = results["float32"], results["float16"]
+    overlap = [len(np.intersect1d(a, b)) for a, b in zip(exact["rows"], half["rows"])]
+    half["recall_at_k"] = float(np.sum(overlap) / (len(queries) * k))
+    half["top1_agreement"] = float(np.mean(exact["rows"][:, 0] == half["rows"][:, 0]))
+    half["max_score_error"] = float(np.max(np.abs(exact["distances"] - half["distances"])))
+    exact.update({"recall_at_k": 1.0, "top1_agreement": 1.0, "max_score_error": 0.0})
+    for row in results.values():
+        del row["distances"], row["rows"]
+    return results
+
+def print_report(name, matrix, results):
+    """Print one dataset's comparison as a table."""
+    print(f"\n{name}: {matrix.shape[0]} vectors, {matrix.shape[1]} dimensions")
+    print(f"{'storage':<8} {'recall@k':>9} {'top-1':>6} {'max err':>8} {'p50 ms':>8} "
+          f"{'batch ms/q':>11} {'memory MB':>10}")
+    for dtype, row in results.items():
+        print(f"{dtype:<8} {row['recall_at_k']:>9.4f} {row['top1_agreement']:>6.3f} {row['max_score_error']:>8.5f} "
+              f"{row['p50_ms']:>8.3f} {row['batch_ms_per_query']:>11.3f} {row['memory_bytes'] / 1e6:>10.2f}")
+
+def benchmark_float16(k=10, n_queries=200, rows=0, dim=384):
+    """Report recall parity, memory and latency of float16 storage against float32.
+
+    Args:
+        k: Number of neighbours to compare
+        n_queries: Number of sample queries per dataset
+        rows: If set, benchmark a synthetic dataset of this many rows instead of the stored ones
+        dim: Dimension of the synthetic dataset
+
+    Returns:
+        Dictionary of results per dataset
+    """
+    if rows:
+        rng = np.random.default_rng(0)
+        datasets = {"synthetic": normalize_rows(rng.standard_normal((rows, dim)).astype(np.float32))}
+    else:
+        vector_store = VectorStore(use_embedding_cache=False, query_cache_size=0, index_backend="flat")
+        vector_store.load_vector_store()
+        datasets = {name: vector_store.get_matrix(name)["matrix"] for name in vector_store.vectors
+                    if vector_store.vectors[name]}
+
+    results = {}
+    for name, matrix in datasets.items():
+        if matrix.shape[0] == 0:
+            continue
+        results[name] = compare_storage(matrix, k=k, n_queries=n_queries)
+        print_report(name, matrix, results[name])
+    return results
+
+def convert_store(dtype):
+    """Rewrite every stored dataset with the given storage type."""
+    vector_store = VectorStore(use_embedding_cache=False, query_cache_size=0, storage_dtype=dtype)
+    for dataset_name in vector_store.list_stored_datasets():
+        vector_store.vectors[dataset_name] = vector_store.load_vectors(dataset_name)
+        if vector_store.vectors[dataset_name]:
+            vector_store.save_vectors(dataset_name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare float16 and float32 embedding storage")
+    parser.add_argument("--k", type=int, default=10, help="Number of neighbours to compare")
+    parser.add_argument("--queries", type=int, default=200, help="Sample queries per dataset")
+    parser.add_argument("--rows", type=int, default=0, help="Benchmark a synthetic dataset of this many rows")
+    parser.add_argument("--convert", choices=STORAGE_DTYPES,
+                        help="Rewrite the stored datasets with this storage type after the report")
+    args = parser.parse_args()
+
+    benchmark_float16(args.k, args.queries, args.rows)
+    if args.convert:
+        convert_store(args.convert)
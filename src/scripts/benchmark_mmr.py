@@ -0,0 +1,82 @@
+# src/scripts/benchmark_mmr.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore, normalize_rows
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUERIES = [
+    "What are the symptoms of breast cancer?",
+    "How is breast cancer treated?",
+    "What are the side effects of chemotherapy?",
+    "What does HER2 positive mean?",
+    "Can I exercise during treatment?",
+]
+
+def redundancy(vector_store, results):
+    """Mean pairwise cosine similarity of the returned chunks (1.0 means all identical)."""
+    if len(results) < 2:
+        return 0.0
+    embeddings = normalize_rows(vector_store.create_embeddings([result["content"] for result in results]))
+    similarity = embeddings @ embeddings.T
+    return float(similarity[np.triu_indices(len(results), 1)].mean())
+
+def benchmark_mmr(k=5, pool=20, lambdas=(0.7, 0.5, 0.3), repeats=5):
+    """Compare plain dense search with MMR selection: latency and redundancy of the top k.
+
+    Args:
+        k: Results per query
+        pool: MMR candidate pool size
+        lambdas: MMR relevance weights to try
+        repeats: Times each query is run for the latency measurement
+
+    Returns:
+        Dictionary of p50 latency and mean redundancy per configuration
+    """
+    vector_store = VectorStore(query_cache_size=len(QUERIES))
+    vector_store.load_vector_store()
+    vector_store.search_batch(QUERIES, k=k)  # Warm up the model and the query cache
+
+    configs = [("dense", None)] + [(f"mmr {lam}", lam) for lam in lambdas]
+    results = {}
+    for name, lam in configs:
+        latencies, scores = [], []
+        for query in QUERIES:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                if lam is None:
+                    found = vector_store.search_batch([query], k=k)[0]
+                else:
+                    found = vector_store.search_mmr([query], k=k, pool=pool, lambda_mult=lam)[0]
+                latencies.append((time.perf_counter() - start) * 1000)
+            scores.append(redundancy(vector_store, found))
+        results[name] = {"p50_ms": float(np.median(latencies)), "redundancy": float(np.mean(scores))}
+
+    print(f"\n{'config':<10} {'p50 ms':>8} {'added ms':>9} {'redundancy':>11}")
+    for name, row in results.items():
+        added = row["p50_ms"] - results["dense"]["p50_ms"]
+        print(f"{name:<10} {row['p50_ms']:>8.3f} {added:>9.3f} {row['redundancy']:>11.3f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MMR diversification against plain dense search")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--pool", type=int, default=20, help="MMR candidate pool size")
+    parser.add_argument("--lambdas", type=float, nargs="+", default=[0.7, 0.5, 0.3], help="MMR relevance weights")
+    args = parser.parse_args()
+
+    benchmark_mmr(args.k, args.pool, args.lambdas)
@@ -0,0 +1,88 @@
+# src/scripts/benchmark_quantization.py
+
+import os
+import sys
+import logging
+import argparse
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore, normalize_rows
+from embeddings.index_backends import create_index, evaluate_index
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def resident_bytes(backend, index, matrix):
+    """Memory held for searching: the index, plus the float rows int8 rescores unless they are memory-mapped."""
+    if backend == "flat" or isinstance(matrix, np.memmap):
+        return index.memory_bytes()
+    return index.memory_bytes() + matrix.nbytes
+
+def benchmark_quantization(k=10, rescore_factors=(1, 2, 4, 8), n_queries=200, rows=0, dim=384):
+    """Report recall@k, latency and memory of int8 scanning against float32 flat search.
+    
+    Two memory figures are reported: the structure scanned per query, and
+    the total held while searching. int8 still rescores candidates with the
+    float vectors, so it only saves memory when those rows are memory-mapped
+    (stored datasets); for in-memory datasets it adds the codes on top.
+    
+    Args:
+        k: Number of neighbours to compare
+        rescore_factors: Candidate multiples of k rescored with float vectors
+        n_queries: Number of sample queries per dataset
+        rows: If set, benchmark a synthetic in-memory dataset of this many rows instead of the stored ones
+        dim: Dimension of the synthetic dataset
+        
+    Returns:
+        Dictionary of results per dataset and configuration
+    """
+    if rows:
+        rng = np.random.default_rng(0)
+        datasets = {"synthetic": normalize_rows(rng.standard_normal((rows, dim)).astype(np.float32))}
+    else:
+        vector_store = VectorStore(index_backend="flat")
+        vector_store.load_vector_store()
+        datasets = {name: vector_store.get_matrix(name)["matrix"] for name in vector_store.vectors
+                    if vector_store.vectors[name]}
+    
+    results = {}
+    for dataset_name, matrix in datasets.items():
+        if matrix.shape[0] == 0:
+            continue
+        
+        configs = [("flat", {})] + [("int8", {"rescore": factor}) for factor in rescore_factors]
+        results[dataset_name] = {}
+        
+        rescore_rows = "memory-mapped" if isinstance(matrix, np.memmap) else "in memory"
+        print(f"\n{dataset_name}: {matrix.shape[0]} vectors, {matrix.shape[1]} dimensions "
+              f"(float rows for rescoring {rescore_rows})")
+        print(f"{'backend':<12} {'rescore':>8} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'index MB':>9} {'total MB':>9}")
+        for backend, params in configs:
+            index = create_index(backend, params)
+            index.build(matrix)
+            report = evaluate_index(index, matrix, k=k, n_queries=n_queries)
+            report["resident_bytes"] = resident_bytes(backend, index, matrix)
+            results[dataset_name][f"{backend}:{params.get('rescore', '-')}"] = report
+            print(f"{backend:<12} {str(params.get('rescore', '-')):>8} {report['recall_at_k']:>9.3f} "
+                  f"{report['latency_p50_ms']:>8.3f} {report['latency_p99_ms']:>8.3f} "
+                  f"{report['memory_bytes'] / 1e6:>9.2f} {report['resident_bytes'] / 1e6:>9.2f}")
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare int8 scanning with float32 flat search")
+    parser.add_argument("--k", type=int, default=10, help="Number of neighbours to compare")
+    parser.add_argument("--queries", type=int, default=200, help="Sample queries per dataset")
+    parser.add_argument("--rows", type=int, default=0, help="Benchmark a synthetic dataset of this many rows")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the synthetic dataset")
+    args = parser.parse_args()
+    
+    benchmark_quantization(k=args.k, n_queries=args.queries, rows=args.rows, dim=args.dim)
@@ -0,0 +1,78 @@
+# src/scripts/benchmark_rerank.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+
+# Add the repository root to the path; the rag package imports its modules as src.*
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.rag.retrieval import RAGSystem
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUERIES = [
+    "What are the symptoms of breast cancer?",
+    "How is breast cancer treated?",
+    "What are the side effects of chemotherapy?",
+    "When should I call my oncologist about a fever?",
+    "What does HER2 positive mean?",
+    "How long does radiation therapy take?",
+    "Can I exercise during treatment?",
+    "What is a lumpectomy?",
+]
+
+def benchmark_rerank(wide_k=10, k=3, candidates=20, budget_ms=150.0):
+    """Compare passing a wide bi-encoder top k to the LLM with a reranked top k.
+
+    Args:
+        wide_k: Results per query without reranking
+        k: Results per query after reranking
+        candidates: Candidates rescored by the cross-encoder
+        budget_ms: Rerank time budget per query
+
+    Returns:
+        Dictionary of latency and context size per configuration
+    """
+    rag_system = RAGSystem(result_cache_size=0, rerank=True, rerank_candidates=candidates,
+                           rerank_budget_ms=budget_ms)
+    rag_system.retrieve(QUERIES[0], k=k)  # Load both models
+
+    results = {}
+    for name, query_k, rerank in (("bi-encoder", wide_k, False), ("reranked", k, True)):
+        latencies, context_chars = [], []
+        for query in QUERIES:
+            start = time.perf_counter()
+            docs = rag_system.retrieve(query, k=query_k, rerank=rerank)
+            latencies.append((time.perf_counter() - start) * 1000)
+            context_chars.append(sum(len(doc["content"]) for doc in docs))
+        results[name] = {
+            "k": query_k,
+            "p50_ms": float(np.median(latencies)),
+            "max_ms": float(np.max(latencies)),
+            "context_chars": float(np.mean(context_chars)),
+        }
+
+    print(f"\n{'config':<12} {'k':>3} {'p50 ms':>8} {'max ms':>8} {'context chars':>14}")
+    for name, row in results.items():
+        print(f"{name:<12} {row['k']:>3} {row['p50_ms']:>8.1f} {row['max_ms']:>8.1f} {row['context_chars']:>14.0f}")
+    print(f"Reranker: {rag_system.reranker.stats()}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking against a wide bi-encoder top k")
+    parser.add_argument("--wide-k", type=int, default=10, help="Results per query without reranking")
+    parser.add_argument("--k", type=int, default=3, help="Results per query after reranking")
+    parser.add_argument("--candidates", type=int, default=20, help="Candidates rescored by the cross-encoder")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Rerank time budget per query")
+    args = parser.parse_args()
+
+    benchmark_rerank(args.wide_k, args.k, args.candidates, args.budget_ms)
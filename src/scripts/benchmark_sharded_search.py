@@ -0,0 +1,94 @@
+# src/scripts/benchmark_sharded_search.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore, normalize_rows
+from embeddings.index_backends import create_index
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_matrix(rows=0, dim=384, seed=0):
+    """Return the largest stored dataset matrix, or a random one with ``rows`` rows."""
+    if rows:
+        rng = np.random.default_rng(seed)
+        return normalize_rows(rng.standard_normal((rows, dim)).astype(np.float32))
+    
+    vector_store = VectorStore(index_backend="flat")
+    vector_store.load_vector_store()
+    matrices = [vector_store.get_matrix(name)["matrix"] for name in vector_store.vectors if vector_store.vectors[name]]
+    return max(matrices, key=lambda m: m.shape[0])
+
+def measure_throughput(index, queries, k, clients):
+    """Run every query once from ``clients`` concurrent threads and return queries per second."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(lambda q: index.search(q[None, :], k), queries))
+    return len(queries) / (time.perf_counter() - start)
+
+def benchmark_sharded_search(rows=0, k=10, n_queries=400, clients=8, shard_counts=None):
+    """Compare query throughput of in-process flat search with sharded search.
+    
+    Args:
+        rows: Size of a random matrix to benchmark (0 uses the largest stored dataset)
+        k: Number of results per query
+        n_queries: Number of queries per configuration
+        clients: Number of concurrent client threads
+        shard_counts: Shard counts to try (defaults to powers of two up to the core count)
+        
+    Returns:
+        Dictionary mapping each configuration to queries per second
+    """
+    matrix = load_matrix(rows)
+    cores = os.cpu_count() or 1
+    if not shard_counts:
+        shard_counts = sorted({2 ** i for i in range(int(np.log2(cores)) + 1)} | {cores})
+    
+    rng = np.random.default_rng(1)
+    queries = normalize_rows(matrix[rng.choice(matrix.shape[0], size=n_queries)]
+                             + rng.normal(scale=0.01, size=(n_queries, matrix.shape[1])))
+    
+    print(f"\n{matrix.shape[0]} vectors, {matrix.shape[1]} dimensions, {cores} cores, {clients} client threads")
+    print(f"{'backend':<10} {'shards':>7} {'QPS':>10} {'speedup':>8}")
+    
+    results = {}
+    flat = create_index("flat")
+    flat.build(matrix)
+    baseline = measure_throughput(flat, queries, k, clients)
+    results["flat"] = baseline
+    print(f"{'flat':<10} {'-':>7} {baseline:>10.1f} {1.0:>8.2f}")
+    
+    for shards in shard_counts:
+        index = create_index("sharded", {"shards": shards})
+        index.build(matrix)
+        # Warm up the worker processes before timing
+        measure_throughput(index, queries[:shards * 2], k, clients)
+        qps = measure_throughput(index, queries, k, clients)
+        index.close()
+        results[f"sharded:{shards}"] = qps
+        print(f"{'sharded':<10} {shards:>7} {qps:>10.1f} {qps / baseline:>8.2f}")
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sharded multi-process search")
+    parser.add_argument("--rows", type=int, default=0, help="Benchmark a random matrix with this many rows")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--queries", type=int, default=400, help="Queries per configuration")
+    parser.add_argument("--shards", type=int, nargs="+", help="Shard counts to benchmark")
+    args = parser.parse_args()
+    benchmark_sharded_search(rows=args.rows, n_queries=args.queries, clients=args.clients,
+                             shard_counts=args.shards)
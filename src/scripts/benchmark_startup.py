@@ -0,0 +1,70 @@
+# src/scripts/benchmark_startup.py
+
+import os
+import sys
+import json
+import logging
+import subprocess
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Runs in a fresh interpreter so every measurement starts cold
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from embeddings.vector_store import VectorStore
+import_ms = (time.perf_counter() - start) * 1000
+
+start = time.perf_counter()
+vector_store = VectorStore()
+vector_store.load_vector_store()
+load_ms = (time.perf_counter() - start) * 1000
+
+warmup = {}
+if sys.argv[1] == "warmup":
+    warmup = vector_store.warmup()
+
+timings = []
+for query in ("What are the symptoms of breast cancer?", "How is breast cancer treated?"):
+    start = time.perf_counter()
+    vector_store.search(query, k=3)
+    timings.append((time.perf_counter() - start) * 1000)
+
+print(json.dumps({"import_ms": import_ms, "load_store_ms": load_ms, "warmup_ms": sum(warmup.values()),
+                  "first_query_ms": timings[0], "second_query_ms": timings[1]}))
+"""
+
+def measure(mode):
+    """Run the probe in a fresh interpreter and return its timings."""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, mode],
+        cwd=os.getcwd(), capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")]))}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def benchmark_startup():
+    """Report import time, store load time and first/second query latency, with and without warmup.
+    
+    Returns:
+        Dictionary of timings in milliseconds per mode
+    """
+    results = {mode: measure(mode) for mode in ("lazy", "warmup")}
+    
+    fields = ["import_ms", "load_store_ms", "warmup_ms", "first_query_ms", "second_query_ms"]
+    print(f"\n{'mode':<8} " + " ".join(f"{field:>16}" for field in fields))
+    for mode, timings in results.items():
+        print(f"{mode:<8} " + " ".join(f"{timings[field]:>16.1f}" for field in fields))
+    return results
+
+if __name__ == "__main__":
+    benchmark_startup()
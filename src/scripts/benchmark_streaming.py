@@ -0,0 +1,118 @@
+# src/scripts/benchmark_streaming.py
+
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.storage import write_metadata_log
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Runs in a fresh interpreter (in the synthetic store's directory) so peak RSS is per mode
+PROBE = """
+import json, sys, time
+import numpy as np
+from embeddings.vector_store import VectorStore
+mode, block_size = sys.argv[1], int(sys.argv[2])
+
+def peak_rss_kb():
+    # VmHWM rather than ru_maxrss, which a child inherits from its parent on Linux
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+
+baseline_kb = peak_rss_kb()
+
+vector_store = VectorStore(use_embedding_cache=False, query_cache_size=0, index_backend="flat",
+                           streaming=mode == "streaming", stream_block_size=block_size)
+start = time.perf_counter()
+vector_store.load_vector_store()
+load_ms = (time.perf_counter() - start) * 1000
+
+rng = np.random.default_rng(1)
+queries = rng.standard_normal((20, 384)).astype(np.float32)
+queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+timings = []
+for query in queries:
+    start = time.perf_counter()
+    vector_store._search_embeddings(query[None, :], 10)
+    timings.append((time.perf_counter() - start) * 1000)
+
+peak_kb = peak_rss_kb()
+print(json.dumps({"load_ms": load_ms, "p50_ms": float(np.median(timings)),
+                  "peak_rss_mb": (peak_kb - baseline_kb) / 1024}))
+"""
+
+def make_store(directory, rows, dim=384, seed=0, chunk=100000):
+    """Write a synthetic dataset of ``rows`` normalized vectors into ``directory``/data/vector_store."""
+    store_dir = os.path.join(directory, "data", "vector_store")
+    os.makedirs(store_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    matrix = np.lib.format.open_memmap(os.path.join(store_dir, "synthetic_vectors.npy.tmp"), mode="w+",
+                                       dtype=np.float32, shape=(rows, dim))
+    for start in range(0, rows, chunk):
+        block = rng.standard_normal((min(chunk, rows - start), dim)).astype(np.float32)
+        matrix[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    matrix.flush()
+    del matrix
+    os.replace(os.path.join(store_dir, "synthetic_vectors.npy.tmp"), os.path.join(store_dir, "synthetic_vectors.npy"))
+    write_metadata_log(os.path.join(store_dir, "synthetic_metadata.jsonl"),
+                       [{"text": f"Synthetic chunk {i} " + "lorem ipsum " * 40, "source": f"doc{i // 50}",
+                         "chunk_id": i} for i in range(rows)])
+
+def measure(directory, mode, block_size):
+    """Run the probe in a fresh interpreter and return its measurements."""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, mode, str(block_size)],
+        cwd=directory, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")]))}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def benchmark_streaming(rows=200000, block_sizes=(4096, 16384, 65536)):
+    """Compare peak RSS and latency of in-memory search with blockwise streaming search.
+
+    Args:
+        rows: Rows in the synthetic dataset
+        block_sizes: Streaming block sizes to try
+
+    Returns:
+        Dictionary of measurements per configuration
+    """
+    directory = tempfile.mkdtemp(prefix="streaming_bench_")
+    try:
+        make_store(directory, rows)
+        logger.info(f"Wrote {rows} synthetic vectors ({rows * 384 * 4 / 1e6:.0f} MB) to {directory}")
+        results = {"in-memory": measure(directory, "memory", 0)}
+        for block_size in block_sizes:
+            results[f"stream {block_size}"] = measure(directory, "streaming", block_size)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"\n{rows} rows")
+    print(f"{'config':<14} {'load ms':>9} {'p50 ms':>8} {'peak RSS MB':>12}")
+    for name, row in results.items():
+        print(f"{name:<14} {row['load_ms']:>9.1f} {row['p50_ms']:>8.1f} {row['peak_rss_mb']:>12.1f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of streaming search against in-memory search")
+    parser.add_argument("--rows", type=int, default=200000, help="Rows in the synthetic dataset")
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=[4096, 16384, 65536], help="Block sizes")
+    args = parser.parse_args()
+
+    benchmark_streaming(args.rows, args.block_sizes)
@@ -0,0 +1,105 @@
+# src/scripts/check_onnx_parity.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import load_model
+from embeddings.index_backends import top_k_indices
+from scripts.benchmark_embedding_pool import load_texts
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUERIES = [
+    "What are the symptoms of breast cancer?",
+    "How is breast cancer treated?",
+    "What are the side effects of chemotherapy?",
+    "When should I call my oncologist about a fever?",
+    "What does HER2 positive mean?",
+]
+
+def time_encode(model, texts, batch_size):
+    """Return (embeddings, single-query p50 ms, batch texts/sec) of a model."""
+    model.encode(QUERIES[0])  # Warm up
+    single = []
+    for query in QUERIES * 4:
+        start = time.perf_counter()
+        model.encode(query)
+        single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    embeddings = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    return embeddings, float(np.median(single)), len(texts) / elapsed if elapsed > 0 else 0.0
+
+def check_onnx_parity(model_name="all-MiniLM-L6-v2", backends=("onnx", "onnx_int8"), limit=256,
+                      batch_size=32, k=5, min_cosine=0.98, chunks_path="data/processed/all_chunks.json"):
+    """Compare ONNX Runtime embeddings with the PyTorch ones and report latency.
+
+    Parity is the cosine similarity between each text's PyTorch and ONNX
+    embedding, plus the overlap of the top-k chunks retrieved for a few
+    sample queries.
+
+    Args:
+        model_name: Embedding model
+        backends: ONNX backends to compare against "torch"
+        limit: Number of chunks to embed
+        batch_size: Texts per batch
+        k: Number of retrieved chunks compared per query
+        min_cosine: Smallest acceptable per-text cosine similarity
+        chunks_path: Chunks file to embed
+
+    Returns:
+        True if every backend is within ``min_cosine`` of PyTorch
+    """
+    texts = load_texts(chunks_path)[:limit]
+    normalize = lambda x: x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+    reference_model = load_model(model_name, "torch")
+    reference, p50, throughput = time_encode(reference_model, texts, batch_size)
+    reference = normalize(reference)
+    reference_queries = normalize(np.asarray(reference_model.encode(QUERIES), dtype=np.float32))
+    reference_top = [set(top_k_indices(-scores, k).tolist()) for scores in reference_queries @ reference.T]
+
+    print(f"\n{'backend':<10} {'min cos':>8} {'mean cos':>9} {f'top-{k} overlap':>14} "
+          f"{'p50 query ms':>13} {'texts/sec':>10}")
+    print(f"{'torch':<10} {1.0:>8.4f} {1.0:>9.4f} {1.0:>14.3f} {p50:>13.2f} {throughput:>10.1f}")
+
+    passed = True
+    for backend in backends:
+        model = load_model(model_name, backend)
+        embeddings, p50, throughput = time_encode(model, texts, batch_size)
+        cosines = np.sum(normalize(embeddings) * reference, axis=1)
+
+        queries = normalize(np.asarray(model.encode(QUERIES), dtype=np.float32))
+        top = [set(top_k_indices(-scores, k).tolist()) for scores in queries @ normalize(embeddings).T]
+        overlap = np.mean([len(a & b) / k for a, b in zip(top, reference_top)])
+
+        print(f"{backend:<10} {cosines.min():>8.4f} {cosines.mean():>9.4f} {overlap:>14.3f} "
+              f"{p50:>13.2f} {throughput:>10.1f}")
+        if cosines.min() < min_cosine:
+            logger.warning(f"{backend} embeddings diverge from torch (min cosine {cosines.min():.4f} < {min_cosine})")
+            passed = False
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check ONNX embedding parity and latency against PyTorch")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Embedding model")
+    parser.add_argument("--limit", type=int, default=256, help="Number of chunks to embed")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per batch")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Smallest acceptable cosine similarity")
+    args = parser.parse_args()
+
+    ok = check_onnx_parity(args.model, limit=args.limit, batch_size=args.batch_size, min_cosine=args.min_cosine)
+    sys.exit(0 if ok else 1)
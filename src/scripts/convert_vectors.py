@@ -0,0 +1,54 @@
+# src/scripts/convert_vectors.py
+
+import os
+import sys
+import logging
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore, LEGACY_SUFFIX
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def convert_all_vectors(remove_json=False):
+    """Convert every legacy *_vectors.json file to the binary vector format.
+    
+    Args:
+        remove_json: Whether to delete the JSON files after a successful conversion
+        
+    Returns:
+        List of converted dataset names
+    """
+    vector_store = VectorStore()
+    
+    json_files = [f for f in os.listdir(vector_store.vector_store_dir) if f.endswith(LEGACY_SUFFIX)]
+    if not json_files:
+        logger.info("No legacy vector files found")
+        return []
+    
+    converted = []
+    for file in sorted(json_files):
+        dataset_name = file[:-len(LEGACY_SUFFIX)]
+        logger.info(f"Converting {file}")
+        
+        matrix_path = vector_store.convert_json_vectors(dataset_name)
+        if not matrix_path:
+            logger.error(f"Failed to convert {file}")
+            continue
+        
+        converted.append(dataset_name)
+        if remove_json:
+            os.remove(os.path.join(vector_store.vector_store_dir, file))
+            logger.info(f"Removed {file}")
+    
+    logger.info(f"Converted {len(converted)} of {len(json_files)} datasets")
+    return converted
+
+if __name__ == "__main__":
+    convert_all_vectors(remove_json="--remove-json" in sys.argv[1:])
@@ -0,0 +1,67 @@
+# src/scripts/dedup_chunks.py
+
+import os
+import sys
+import json
+import time
+import logging
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_processing.dedup import deduplicate_chunks, format_report
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def dedup_all_chunks(chunks_path="data/processed/all_chunks.json", dry_run=False):
+    """Remove near-duplicate chunks from an existing all_chunks.json.
+
+    For the dictionary format, datasets are processed in order and each one is
+    deduplicated against the chunks kept from the datasets before it.
+
+    Args:
+        chunks_path: Path to the chunks file
+        dry_run: Only report what would be removed
+
+    Returns:
+        Report dictionary of the whole file
+    """
+    with open(chunks_path, "r") as f:
+        data = json.load(f)
+
+    start = time.perf_counter()
+    if isinstance(data, list):
+        data, report = deduplicate_chunks(data)
+    else:
+        report = {"input_chunks": 0, "kept_chunks": 0, "removed_chunks": 0,
+                  "bytes_before": 0, "bytes_after": 0, "bytes_saved": 0}
+        kept_so_far = []
+        for key, value in data.items():
+            if not isinstance(value, list):
+                continue
+            data[key], dataset_report = deduplicate_chunks(value, reference=kept_so_far)
+            kept_so_far = kept_so_far + data[key]
+            logger.info(f"{key}: {format_report(dataset_report)}")
+            for field in report:
+                report[field] += dataset_report[field]
+    elapsed = time.perf_counter() - start
+
+    print(format_report(report))
+    print(f"Deduplicated {report['input_chunks']} chunks in {elapsed:.2f}s")
+
+    if not dry_run and report["removed_chunks"]:
+        tmp_path = chunks_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, chunks_path)
+        print(f"Saved deduplicated chunks to {chunks_path} "
+              f"({os.path.getsize(chunks_path) / 1024:.1f} KB on disk)")
+    return report
+
+if __name__ == "__main__":
+    dedup_all_chunks(dry_run="--dry-run" in sys.argv[1:])
@@ -0,0 +1,104 @@
+# src/scripts/evaluate_projection.py
+
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings.vector_store import VectorStore
+from embeddings.projection import PCAProjection
+from embeddings.index_backends import top_k_indices
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_corpus(vector_store):
+    """Return the full-dimension live vectors of every loaded dataset as one matrix."""
+    matrices = []
+    for name in vector_store.vectors:
+        if not vector_store.vectors[name]:
+            continue
+        entry = vector_store.get_matrix(name)
+        if entry["matrix"].shape[0] == 0:
+            continue
+        matrices.append(entry["matrix"][~entry["deleted"]] if entry.get("n_deleted") else entry["matrix"])
+    return np.concatenate(matrices).astype(np.float32)
+
+def exact_top_k(queries, matrix, query_rows, k):
+    """Return each query's top k rows of ``matrix``, excluding the query's own row, and the scan time."""
+    start = time.perf_counter()
+    scores = 1.0 - queries @ matrix.T
+    scan_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    scores[np.arange(len(queries)), query_rows] = np.inf
+    return [set(top_k_indices(row, k).tolist()) for row in scores], scan_ms
+
+def evaluate_projection(dims=(256, 128, 96, 64, 32), k=10, n_queries=200, seed=0):
+    """Report recall@k of PCA-projected search against the full-dimension baseline.
+
+    Stored chunks serve as queries: each query's neighbours are computed by
+    exact search over the rest of the corpus, once at full dimension and once
+    per candidate dimension.
+
+    Args:
+        dims: Candidate projection dimensions
+        k: Number of neighbours compared
+        n_queries: Number of stored chunks used as queries
+        seed: Random seed for picking the queries
+
+    Returns:
+        Dictionary mapping each dimension to its recall@k
+    """
+    # Search the stored vectors without any saved projection
+    vector_store = VectorStore(index_backend="flat", projection_dim=0)
+    vector_store.load_vector_store()
+    matrix = load_corpus(vector_store)
+    n, full_dim = matrix.shape
+    k = min(k, n - 1)
+
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(n, size=min(n_queries, n), replace=False)
+    baseline, baseline_ms = exact_top_k(matrix[query_rows], matrix, query_rows, k)
+
+    print(f"\n{n} vectors, {len(query_rows)} queries, k={k}")
+    print(f"{'dim':>5} {'variance':>9} {f'recall@{k}':>10} {'MB':>8} {'scan ms/query':>14}")
+    print(f"{full_dim:>5} {1.0:>9.3f} {1.0:>10.3f} {matrix.nbytes / 1e6:>8.2f} {baseline_ms:>14.3f}")
+
+    results = {}
+    for dim in sorted(dims, reverse=True):
+        if dim >= full_dim or dim > n - 1:
+            continue
+        projection = PCAProjection().fit(matrix, dim)
+        projected = projection.transform(matrix)
+        neighbours, scan_ms = exact_top_k(projected[query_rows], projected, query_rows, k)
+        recall = float(np.mean([len(a & b) / k for a, b in zip(neighbours, baseline)]))
+        results[dim] = recall
+        print(f"{dim:>5} {projection.explained_variance_ratio:>9.3f} {recall:>10.3f} "
+              f"{projected.nbytes / 1e6:>8.2f} {scan_ms:>14.3f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report recall@k of PCA-projected search per dimension")
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 128, 96, 64, 32], help="Candidate dimensions")
+    parser.add_argument("--k", type=int, default=10, help="Number of neighbours compared")
+    parser.add_argument("--queries", type=int, default=200, help="Number of stored chunks used as queries")
+    parser.add_argument("--apply", type=int, default=None,
+                        help="Fit a projection of this dimension and save it with the store (0 removes it)")
+    args = parser.parse_args()
+
+    evaluate_projection(args.dims, args.k, args.queries)
+    if args.apply is not None:
+        vector_store = VectorStore(projection_dim=0)
+        vector_store.load_vector_store()
+        if args.apply:
+            vector_store.fit_projection(args.apply)
+        else:
+            vector_store.remove_projection()
@@ -0,0 +1,36 @@
+# tests/test_reranker.py
+
+import time
+
+from src.rag.reranker import CrossEncoderReranker
+
+class KeywordModel:
+    """Stands in for a cross-encoder: scores a chunk by how often it contains the query."""
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        return [content.count(query) for query, content in pairs]
+
+class SlowLoadingReranker(CrossEncoderReranker):
+    """Reranker whose model takes longer to load than the whole time budget."""
+
+    @property
+    def available(self):
+        return True
+
+    @property
+    def model(self):
+        if self._model is None:
+            time.sleep(self.time_budget_ms / 1000 * 2)
+            self._model = KeywordModel()
+        return self._model
+
+def test_model_load_does_not_disable_reranking():
+    reranker = SlowLoadingReranker(batch_size=4, time_budget_ms=50)
+    for query in ("alpha", "beta", "gamma"):
+        candidates = [{"content": f"chunk {i}", "source": "s", "score": i / 10} for i in range(8)]
+        candidates.append({"content": f"{query} {query}", "source": "s", "score": 1.0})
+        reranked = reranker.rerank(query, candidates, top_n=3)
+        assert reranked[0]["content"] == f"{query} {query}"
+        assert "retrieval_score" in reranked[0]
+    assert reranker.budget_cutoffs == 0
+    assert reranker.pairs_scored == 27
@@ -0,0 +1,54 @@
+# tests/test_retrieval.py
+
+import hashlib
+
+import numpy as np
+
+from src.rag.retrieval import RAGSystem
+
+class HashEncoder:
+    """Stands in for a sentence-transformers model: a fixed random vector per text."""
+
+    max_seq_length = 256
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        vectors = np.array([self.vector(text) for text in ([texts] if single else texts)])
+        return vectors[0] if single else vectors
+
+    @staticmethod
+    def vector(text):
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(32).astype(np.float32)
+
+class KeywordModel:
+    """Stands in for a cross-encoder: scores a chunk by how often it contains the query."""
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        return [content.count(query) for query, content in pairs]
+
+def near_duplicate_corpus():
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal(32)
+    # Three near-identical copies of the best chunk, then distinct chunks of decreasing relevance
+    chunks = [{"text": f"aspirin aspirin aspirin dose {i}", "chunk_id": f"dup{i}",
+               "embedding": base + rng.normal(scale=0.01, size=32)} for i in range(3)]
+    chunks += [{"text": f"{'aspirin ' * (2 if i < 4 else 0)}other chunk {i}", "chunk_id": f"other{i}",
+                "embedding": rng.standard_normal(32)} for i in range(12)]
+    return chunks
+
+def test_mmr_with_rerank_drops_near_duplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rag = RAGSystem(result_cache_size=0, rerank=True, mmr_pool=20)
+    rag.vector_store.model = HashEncoder()
+    rag.vector_store.add(near_duplicate_corpus(), "docs")
+    rag.reranker._model = KeywordModel()
+
+    reranked = [result["metadata"]["chunk_id"] for result in rag.retrieve("aspirin", k=3, mode="dense")]
+    diversified = [result["metadata"]["chunk_id"] for result in rag.retrieve("aspirin", k=3, mode="mmr")]
+
+    assert sorted(reranked) == ["dup0", "dup1", "dup2"]
+    assert diversified[0].startswith("dup")
+    assert sum(chunk_id.startswith("dup") for chunk_id in diversified) == 1
+    # The diverse picks are still the most relevant chunks that are not duplicates
+    assert all(chunk_id in ("other0", "other1", "other2", "other3") for chunk_id in diversified[1:])
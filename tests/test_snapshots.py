@@ -0,0 +1,28 @@
+# tests/test_snapshots.py
+
+import os
+
+import numpy as np
+
+from src.embeddings.snapshots import copy_files
+from src.embeddings.storage import write_matrix, write_matrix_rows
+
+def test_rows_rewritten_in_place_are_copied_not_linked(tmp_path):
+    live, first, second = tmp_path / "live", tmp_path / "1", tmp_path / "2"
+    for directory in (live, first, second):
+        directory.mkdir()
+    write_matrix(str(live / "a_vectors.npy"), np.zeros((4, 8), dtype=np.float32))
+    write_matrix(str(live / "b_vectors.npy"), np.ones((4, 8), dtype=np.float32))
+    files = ["a_vectors.npy", "b_vectors.npy"]
+    assert copy_files(str(live), files, str(first)) == 0
+
+    # Same size and, as on a filesystem with coarse timestamps, the same mtime
+    stat = os.stat(live / "a_vectors.npy")
+    write_matrix_rows(str(live / "a_vectors.npy"), [2], np.full((1, 8), 5, dtype=np.float32))
+    os.utime(live / "a_vectors.npy", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert copy_files(str(live), files, str(second), previous_dir=str(first)) == 1
+    assert os.path.samefile(second / "b_vectors.npy", first / "b_vectors.npy")
+    assert not os.path.samefile(second / "a_vectors.npy", first / "a_vectors.npy")
+    assert np.load(second / "a_vectors.npy")[2, 0] == 5
+    assert np.load(first / "a_vectors.npy")[2, 0] == 0
@@ -0,0 +1,56 @@
+# tests/test_streaming.py
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.embeddings.storage import write_matrix, write_metadata_log, append_metadata_log, DELETED_KEY
+from src.embeddings.streaming import StreamingDataset
+
+def make_dataset(tmp_path, n=400, dim=16):
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((n, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix_path, metadata_path = str(tmp_path / "a_vectors.npy"), str(tmp_path / "a_metadata.jsonl")
+    write_matrix(matrix_path, matrix)
+    write_metadata_log(metadata_path, [{"chunk_id": i} for i in range(n)])
+    return matrix, matrix_path, metadata_path
+
+@pytest.mark.parametrize("shared", [True, False], ids=["same dataset", "separate reader"])
+def test_search_during_compaction_stays_consistent(tmp_path, shared):
+    matrix, matrix_path, metadata_path = make_dataset(tmp_path)
+    writer = StreamingDataset(matrix_path, metadata_path, block_size=64)
+    reader = writer if shared else StreamingDataset(matrix_path, metadata_path, block_size=64)
+    queries = matrix[:8]
+    errors = []
+    done = threading.Event()
+
+    def search():
+        while not done.is_set():
+            try:
+                reader.refresh()
+                state = reader.state
+                distances, rows = reader.search(queries, 5, state=state)
+                records = reader.records(rows[rows >= 0], state=state)
+                for query, query_rows in zip(queries, rows):
+                    for row in query_rows[query_rows >= 0]:
+                        # Each row's record must belong to the vector that was scored
+                        chunk_id = records[int(row)]["chunk_id"]
+                        assert np.allclose(state.matrix[row], matrix[chunk_id])
+            except Exception as e:
+                errors.append(repr(e))
+
+    thread = threading.Thread(target=search)
+    thread.start()
+    try:
+        for _ in range(40):
+            writer.refresh()
+            rows = writer.scan(lambda record: record["chunk_id"] % 7 == 0 and record["chunk_id"] > 8)[:3]
+            append_metadata_log(metadata_path, [{DELETED_KEY: True}] * len(rows), rows=[int(row) for row in rows])
+            writer.compact()
+    finally:
+        done.set()
+        thread.join()
+    assert errors == []
+    assert reader.refresh() or reader.size == writer.size
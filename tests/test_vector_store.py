@@ -0,0 +1,63 @@
+# tests/test_vector_store.py
+
+import json
+import hashlib
+
+import numpy as np
+import pytest
+
+from src.embeddings.vector_store import VectorStore
+
+class HashEncoder:
+    """Stands in for a sentence-transformers model: a fixed random vector per text."""
+
+    max_seq_length = 256
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        vectors = np.array([self.vector(text) for text in ([texts] if single else texts)])
+        return vectors[0] if single else vectors
+
+    @staticmethod
+    def vector(text):
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(32).astype(np.float32)
+
+def open_store(tmp_path, streaming=False):
+    store = VectorStore(vector_store_dir=str(tmp_path / "vector_store"), use_embedding_cache=False,
+                        query_cache_size=0, index_backend="flat", streaming=streaming)
+    store.processed_dir = str(tmp_path / "processed")
+    store.model = HashEncoder()
+    store.load_vector_store()
+    return store
+
+CHUNKS = [{"text": f"chunk number {i}", "chunk_id": f"c{i}", "source": f"s{i % 4}"} for i in range(40)]
+
+@pytest.fixture(params=["legacy json", "all_chunks.json"])
+def corpus(request, tmp_path):
+    (tmp_path / "vector_store").mkdir()
+    (tmp_path / "processed").mkdir()
+    if request.param == "legacy json":
+        items = [{**chunk, "embedding": HashEncoder.vector(chunk["text"]).tolist()} for chunk in CHUNKS]
+        with open(tmp_path / "vector_store" / "docs_vectors.json", "w") as f:
+            json.dump(items, f)
+    else:
+        with open(tmp_path / "processed" / "all_chunks.json", "w") as f:
+            json.dump(CHUNKS, f)
+    return tmp_path
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["loaded", "streamed"])
+def test_delete_persists_across_reopen(corpus, streaming):
+    store = open_store(corpus, streaming=streaming)
+    assert store.search("chunk number 7", k=1)[0]["metadata"]["chunk_id"] == "c7"
+
+    assert store.delete(ids=["c7"]) == 1
+    assert store.delete(filters={"source": "s1"}) == 10
+    assert store.search("chunk number 7", k=1)[0]["metadata"]["chunk_id"] != "c7"
+
+    reopened = open_store(corpus, streaming=streaming)
+    results = reopened.search("chunk number 7", k=40)
+    chunk_ids = {result["metadata"]["chunk_id"] for result in results}
+    assert "c7" not in chunk_ids
+    assert not any(result["metadata"]["source"] == "s1" for result in results)
+    assert len(chunk_ids) == 29
@@ -17,8 +17,9 @@ class EnhancedRAGSystem(RAGSystem):
         Args:
             api_key: Your Google API key (optional if set as environment variable)
         """
-        # Initialize the base RAG system
-        super().__init__()
+        # Initialize the base RAG system; a cross-encoder reranks the retrieved chunks so
+        # only the best few go into the prompt, and newly published snapshots are picked up
+        super().__init__(rerank=True, hot_reload=True)
         
         # Configure Gemini API
         if api_key:
@@ -172,8 +173,9 @@ class EnhancedRAGSystem(RAGSystem):
     
     def answer_question(self, query):
         """Generate an answer to a question using the RAG approach."""
-        # Get the existing search method
-        contexts = self.vector_store.search(query, k=5)
+        # Retrieve through the RAG system so repeated questions hit the result cache;
+        # the top 3 reranked chunks are enough context for the prompt
+        contexts = self.retrieve(query, k=3)
         
         if not contexts:
             return "I couldn't find any relevant information to answer your question about breast cancer."